@@ -31,11 +31,14 @@ django_application = get_asgi_application()
 
 # Import websocket application here, so apps from django_application are loaded first
 from config.websocket import websocket_application
+from trading_journal.journal.live import balance_application
 
 
 async def application(scope, receive, send):
     if scope["type"] == "http":
         await django_application(scope, receive, send)
+    elif scope["type"] == "websocket" and scope["path"].startswith("/ws/journal/"):
+        await balance_application(scope, receive, send)
     elif scope["type"] == "websocket":
         await websocket_application(scope, receive, send)
     else:
@@ -126,6 +126,8 @@ AUTH_PASSWORD_VALIDATORS = [
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#middleware
 MIDDLEWARE = [
+    "trading_journal.core.profiling.ProfilingMiddleware",
+    "trading_journal.core.instrumentation.QueryInstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -281,3 +283,21 @@ CELERY_TASK_SEND_SENT_EVENT = True
 
 # Your stuff...
 # ------------------------------------------------------------------------------
+# SQL instrumentation
+# Queries slower than this many seconds are logged with the line that ran them, unset turns the log off.
+SQL_SLOW_QUERY_THRESHOLD = env.float("DJANGO_SQL_SLOW_QUERY_THRESHOLD", default=None)
+# Bearer token Prometheus sends to read the metrics at /metrics/, unset hides the endpoint.
+METRICS_TOKEN = env("DJANGO_METRICS_TOKEN", default="")
+# Port the Celery workers serve their Prometheus metrics on, unset for none.
+CELERY_METRICS_PORT = env.int("CELERY_METRICS_PORT", default=None)
+# Profiling
+# Fraction of requests to profile, requests carrying PROFILING_TOKEN in PROFILING_HEADER are always profiled.
+PROFILING_SAMPLE_RATE = 0.0
+PROFILING_HEADER = "X-Profile"
+PROFILING_TOKEN = ""
+# Names of the Celery tasks profiled on every run.
+PROFILING_TASKS: list[str] = []
+# Seconds between two samples of the stack, CPU-bound code is sampled at most every sys.getswitchinterval().
+PROFILING_INTERVAL = 0.005
+# Profiles kept in the media storage, the oldest ones are removed first.
+PROFILING_MAX_PROFILES = 500
@@ -148,3 +148,9 @@ LOGGING = {
 
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Profiling
+# Profiles of sampled requests and of the listed tasks end up in the media storage under profiles/.
+PROFILING_SAMPLE_RATE = env.float("DJANGO_PROFILING_SAMPLE_RATE", default=0.0)
+PROFILING_TOKEN = env("DJANGO_PROFILING_TOKEN", default="")
+PROFILING_TASKS = env.list("DJANGO_PROFILING_TASKS", default=[])
+PROFILING_MAX_PROFILES = env.int("DJANGO_PROFILING_MAX_PROFILES", default=500)
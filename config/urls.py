@@ -7,10 +7,15 @@ from django.urls import include
 from django.urls import path
 from django.views import defaults as default_views
 
+from trading_journal.core.views import MetricsView
+
 urlpatterns = [
     # Django Admin, use {% url 'admin:index' %}
     path(settings.ADMIN_URL, admin.site.urls),
     # User management
+    # Your stuff: custom urls includes go here
+    path("journal/", include("trading_journal.journal.urls", namespace="journal")),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
     # Media files
     *static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT),
 ]
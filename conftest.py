@@ -0,0 +1,91 @@
+"""Options and fixtures of the benchmark suite, loaded from the root so its options work wherever pytest runs."""
+
+import json
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+BENCHMARK_BASELINE = Path(__file__).parent / "trading_journal" / "journal" / "tests" / "benchmark_baseline.json"
+# Timings of a few milliseconds vary more than any tolerance between runs.
+BENCHMARK_SLACK = 0.01
+
+benchmark_results = pytest.StashKey[dict[str, dict[str, float]]]()
+
+
+def pytest_addoption(parser) -> None:
+    group = parser.getgroup("benchmark", "performance benchmarks")
+    group.addoption(
+        "--benchmark-baseline",
+        type=Path,
+        default=BENCHMARK_BASELINE,
+        help="JSON file with the timings and query counts benchmarks are compared to.",
+    )
+    group.addoption(
+        "--benchmark-save",
+        action="store_true",
+        help="Store the results of the run in the baseline instead of comparing them.",
+    )
+    group.addoption(
+        "--benchmark-tolerance",
+        type=float,
+        default=0.5,
+        help="How much slower than the baseline a benchmark may run before it fails, 0.5 for 50%%.",
+    )
+
+
+def pytest_configure(config) -> None:
+    config.stash[benchmark_results] = {}
+
+
+def pytest_sessionfinish(session) -> None:
+    """Merge the results of the run into the baseline when asked to save them."""
+    results = session.config.stash.get(benchmark_results, {})
+
+    if results and session.config.getoption("benchmark_save"):
+        path = session.config.getoption("benchmark_baseline")
+        baseline = json.loads(path.read_text()) if path.exists() else {}
+        baseline.update(results)
+        path.write_text(json.dumps(dict(sorted(baseline.items())), indent=2) + "\n")
+
+
+@pytest.fixture
+def benchmark_baseline(request) -> Callable[[str, float, int | None], None]:
+    """
+    Compare a benchmark result with the stored baseline.
+
+    The benchmark fails when it runs slower than the tolerance allows, needs more queries than before
+    or has no baseline yet.
+    """
+    config = request.config
+    path = config.getoption("benchmark_baseline")
+    baseline = json.loads(path.read_text()) if path.exists() else {}
+    tolerance = config.getoption("benchmark_tolerance")
+
+    def check(name: str, seconds: float, queries: int | None = None) -> None:
+        result = {"seconds": round(seconds, 4)}
+
+        if queries is not None:
+            result["queries"] = queries
+
+        config.stash[benchmark_results][name] = result
+
+        if config.getoption("benchmark_save"):
+            return
+
+        if name not in baseline:
+            pytest.fail(f"{name} has no baseline, run with --benchmark-save to record it.")
+
+        expected = baseline[name]
+        regressions = []
+
+        if seconds > expected["seconds"] * (1 + tolerance) + BENCHMARK_SLACK:
+            regressions.append(f"took {seconds:.3f}s against {expected['seconds']:.3f}s in the baseline")
+
+        if queries is not None and queries > expected.get("queries", queries):
+            regressions.append(f"ran {queries} queries against {expected['queries']}")
+
+        if regressions:
+            pytest.fail(f"{name} {' and '.join(regressions)}, run with --benchmark-save if that is expected.")
+
+    return check
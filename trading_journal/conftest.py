@@ -12,3 +12,18 @@ def _media_storage(settings, tmpdir) -> None:
 @pytest.fixture
 def user(db) -> User:
     return UserFactory()
+
+
+def pytest_terminal_summary(terminalreporter) -> None:
+    """Print the timings recorded with ``record_property`` by benchmarks and stress tests."""
+    lines = [
+        f"{report.nodeid}: {name} {value}"
+        for report in terminalreporter.getreports("passed")
+        for name, value in report.user_properties
+    ]
+
+    if lines:
+        terminalreporter.section("performance")
+
+        for line in lines:
+            terminalreporter.write_line(line)
@@ -0,0 +1,114 @@
+from urllib.parse import quote, unquote
+
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from trading_journal.core.paginators import EstimatedCountPaginator
+
+CURSOR_VAR = "cursor"
+CURSOR_SEPARATOR = "|"
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Change list paging with a cursor on the model admin's ``keyset_fields`` instead of an OFFSET.
+
+    The cursor holds the keyset values of the last row of the previous page, so every page is an index range scan
+    however deep it is. Sorting by a column falls back to the regular numbered pages.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = request.GET.get(CURSOR_VAR)
+        self.next_cursor = None
+        super().__init__(request, *args, **kwargs)
+
+    @property
+    def keyset_fields(self) -> tuple[str, ...]:
+        return self.model_admin.keyset_fields
+
+    @property
+    def uses_keyset(self) -> bool:
+        return ORDER_VAR not in self.params
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        if not self.uses_keyset:
+            return super().get_results(request)
+
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        queryset = self.queryset.order_by(*self.keyset_fields)
+
+        if self.cursor:
+            queryset = queryset.filter(self.get_cursor_filter(self.cursor))
+
+        rows = list(queryset[: self.list_per_page + 1])
+
+        if len(rows) > self.list_per_page:
+            rows = rows[: self.list_per_page]
+            self.next_cursor = self.get_cursor(rows[-1])
+
+        if self.model_admin.show_full_result_count:
+            full_result_count = self.model_admin.get_paginator(request, self.root_queryset, 1).count
+        else:
+            full_result_count = None
+
+        self.result_count = paginator.count
+        self.show_full_result_count = self.model_admin.show_full_result_count
+        self.show_admin_actions = not self.show_full_result_count or bool(full_result_count)
+        self.full_result_count = full_result_count
+        self.result_list = rows
+        self.can_show_all = False
+        self.multi_page = bool(self.cursor or self.next_cursor)
+        self.paginator = paginator
+        return None
+
+    def get_cursor(self, obj) -> str:
+        return CURSOR_SEPARATOR.join(quote(str(getattr(obj, field))) for field in self.keyset_fields)
+
+    def get_cursor_filter(self, cursor: str) -> Q:
+        values = cursor.split(CURSOR_SEPARATOR)
+
+        if len(values) != len(self.keyset_fields):
+            raise IncorrectLookupParameters
+
+        try:
+            values = [
+                self.lookup_opts.get_field(field).to_python(unquote(value))
+                for field, value in zip(self.keyset_fields, values, strict=True)
+            ]
+        except ValidationError as e:
+            raise IncorrectLookupParameters from e
+
+        # (a, b) > (x, y) spelled out, the leading ``a >= x`` bounds the index range scan.
+        after = Q(**{f"{self.keyset_fields[-1]}__gt": values[-1]})
+
+        for field, value in reversed(list(zip(self.keyset_fields[:-1], values[:-1], strict=True))):
+            after = Q(**{f"{field}__gt": value}) | (Q(**{field: value}) & after)
+
+        return Q(**{f"{self.keyset_fields[0]}__gte": values[0]}) & after
+
+    def get_next_page_url(self) -> str | None:
+        return self.get_query_string({CURSOR_VAR: self.next_cursor}) if self.next_cursor else None
+
+    def get_first_page_url(self) -> str | None:
+        return self.get_query_string(remove=[CURSOR_VAR]) if self.cursor else None
+
+
+class KeysetPaginationMixin:
+    """
+    Model admin mixin for huge tables: estimated counts and keyset pages ordered by ``keyset_fields``.
+    """
+
+    keyset_fields: tuple[str, ...] = ("pk",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = "admin/keyset_change_list.html"
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
@@ -5,3 +5,8 @@ from django.utils.translation import gettext_lazy as _
 class CoreConfig(AppConfig):
     name = "trading_journal.core"
     verbose_name = _("Core")
+
+    def ready(self):
+        # Connect the Celery signal handlers.
+        import trading_journal.core.instrumentation
+        import trading_journal.core.profiling  # noqa: F401
@@ -1,2 +1,52 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.db import connections
+from django.db.models import QuerySet, Value
+
+NAMES_SEPARATOR = ", "
+
+
+def get_joined_m2m_names_key(attr: str, sub_attr: str = "name") -> str:
+    return f"joined_{attr}_{sub_attr}"
+
+
+def annotate_joined_m2m_names(queryset: QuerySet, attr: str, sub_attr: str = "name") -> QuerySet:
+    """
+    Make ``get_joined_m2m_names`` free of queries for every object of the queryset.
+
+    On PostgreSQL the names are aggregated with ``STRING_AGG`` in the main query,
+    other backends prefetch the related objects in one extra query.
+    """
+    if connections[queryset.db].vendor != "postgresql":
+        return queryset.prefetch_related(attr)
+
+    lookup = f"{attr}__{sub_attr}"
+
+    return queryset.annotate(
+        **{
+            get_joined_m2m_names_key(attr, sub_attr): StringAgg(
+                lookup,
+                NAMES_SEPARATOR,
+                distinct=True,
+                ordering=lookup,
+                default=Value(""),
+            ),
+        },
+    )
+
+
 def get_joined_m2m_names(obj, attr: str, sub_attr: str = "name") -> str:
-    return "" if not hasattr(obj, attr) else ", ".join(obj.markets.values_list(sub_attr, flat=True))
+    """
+    Join the ``sub_attr`` of the objects related to ``obj`` through the many-to-many ``attr``, sorted.
+
+    Uses the annotation or the prefetched objects set up by ``annotate_joined_m2m_names`` when present.
+    """
+    if not hasattr(obj, attr):
+        return ""
+
+    key = get_joined_m2m_names_key(attr, sub_attr)
+
+    if hasattr(obj, key):
+        return getattr(obj, key)
+
+    # ``all()`` is served from the prefetch cache when there is one.
+    return NAMES_SEPARATOR.join(sorted({getattr(related, sub_attr) for related in getattr(obj, attr).all()}))
@@ -0,0 +1,201 @@
+import logging
+import os
+import traceback
+from collections import Counter as SqlCounter
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
+from time import perf_counter
+
+from asgiref.sync import sync_to_async
+from celery.signals import task_postrun, task_prerun, worker_ready
+from django.conf import settings
+from django.db import connections
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram, multiprocess, start_http_server
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LABELS = ["kind", "name"]
+UNRESOLVED = "<unresolved>"
+
+sql_queries = Histogram(
+    "trading_journal_sql_queries",
+    "Queries run by a request or a task.",
+    LABELS,
+    buckets=QUERY_BUCKETS,
+)
+sql_duration = Histogram(
+    "trading_journal_sql_duration_seconds",
+    "Time a request or a task spent waiting for the database.",
+    LABELS,
+    buckets=DURATION_BUCKETS,
+)
+sql_duplicates = Counter(
+    "trading_journal_sql_duplicate_queries",
+    "Queries repeating the SQL of an earlier query of the same request or task.",
+    LABELS,
+)
+sql_slow_queries = Counter(
+    "trading_journal_sql_slow_queries",
+    "Queries slower than SQL_SLOW_QUERY_THRESHOLD.",
+    LABELS,
+)
+
+
+def get_metrics_registry() -> CollectorRegistry:
+    """
+    Return the registry to export, which adds up the metrics of all processes when ``PROMETHEUS_MULTIPROC_DIR`` is set.
+
+    Gunicorn and Celery workers run several processes, so they need the directory to report more than one of them.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def get_query_location() -> str:
+    """
+    Return the innermost line of the project's own code in the current stack, which is where a query comes from.
+    """
+    apps_dir = str(settings.APPS_DIR)
+
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(apps_dir) and frame.filename != __file__:
+            return f"{frame.filename.removeprefix(apps_dir + os.sep)}:{frame.lineno} in {frame.name}"
+
+    return UNRESOLVED
+
+
+class QueryRecorder:
+    """
+    Count the queries of a request or a task, the time spent on them and how many repeat an earlier SQL string.
+
+    The recorder is a ``connection.execute_wrapper``. SQL is compared with its placeholders, so a query run in a
+    loop with different parameters counts as duplicated, the usual sign of a missing ``select_related``.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+        self.slow = 0
+        self.statements = SqlCounter()
+        self.slow_threshold = settings.SQL_SLOW_QUERY_THRESHOLD
+
+    @property
+    def duplicates(self) -> int:
+        return self.queries - len(self.statements)
+
+    def __call__(self, execute, sql, params, many, context):
+        started_at = perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - started_at
+            self.queries += 1
+            self.duration += elapsed
+            self.statements[sql] += 1
+
+            if self.slow_threshold is not None and elapsed >= self.slow_threshold:
+                self.slow += 1
+                logger.warning("Slow query (%.3fs) at %s: %s", elapsed, get_query_location(), sql)
+
+    @contextmanager
+    def record(self) -> Iterator["QueryRecorder"]:
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(self))
+
+            yield self
+
+    def export(self, kind: str, name: str):
+        sql_queries.labels(kind, name).observe(self.queries)
+        sql_duration.labels(kind, name).observe(self.duration)
+
+        if self.duplicates:
+            sql_duplicates.labels(kind, name).inc(self.duplicates)
+
+        if self.slow:
+            sql_slow_queries.labels(kind, name).inc(self.slow)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Export the query metrics of every request, labelled with the name of its URL pattern.
+
+    Queries of a streaming response run while its content is read, after the view returned, and are counted then.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+
+        with recorder.record():
+            response = self.get_response(request)
+
+        name = request.resolver_match.view_name if request.resolver_match else UNRESOLVED
+
+        if not response.streaming:
+            recorder.export("view", name)
+        elif response.is_async:
+            response.streaming_content = self._astream(response.streaming_content, recorder, name)
+        else:
+            response.streaming_content = self._stream(response.streaming_content, recorder, name)
+
+        return response
+
+    @staticmethod
+    def _stream(content, recorder: QueryRecorder, name: str):
+        try:
+            with recorder.record():
+                yield from content
+        finally:
+            recorder.export("view", name)
+
+    @staticmethod
+    async def _astream(content, recorder: QueryRecorder, name: str):
+        # Async content reads the database on the request's sync thread, whose connections are wrapped.
+        stack = ExitStack()
+        await sync_to_async(stack.enter_context, thread_sensitive=True)(recorder.record())
+
+        try:
+            async for chunk in content:
+                yield chunk
+        finally:
+            await sync_to_async(stack.close, thread_sensitive=True)()
+            recorder.export("view", name)
+
+
+# Recorders of the tasks running in this worker process, by task id.
+_task_recorders: dict[str, tuple[QueryRecorder, ExitStack]] = {}
+
+
+@task_prerun.connect
+def start_task_recording(task_id, task, **kwargs):
+    recorder = QueryRecorder()
+    stack = ExitStack()
+    stack.enter_context(recorder.record())
+    _task_recorders[task_id] = (recorder, stack)
+
+
+@task_postrun.connect
+def stop_task_recording(task_id, task, **kwargs):
+    if (recording := _task_recorders.pop(task_id, None)) is None:
+        return
+
+    recorder, stack = recording
+    stack.close()
+    recorder.export("task", task.name)
+
+
+@worker_ready.connect
+def serve_worker_metrics(**kwargs):
+    # Workers have no views, their metrics are served on a port of their own.
+    if settings.CELERY_METRICS_PORT:
+        start_http_server(settings.CELERY_METRICS_PORT, registry=get_metrics_registry())
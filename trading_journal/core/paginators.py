@@ -0,0 +1,34 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# Below this many rows an exact COUNT(*) is cheap and the estimate is the least reliable.
+ESTIMATED_COUNT_THRESHOLD = 100_000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator reading the row count of unfiltered querysets from the PostgreSQL planner statistics.
+
+    ``pg_class.reltuples`` is maintained by VACUUM and ANALYZE, so the count is approximate but free,
+    while ``COUNT(*)`` scans the whole table. Filtered querysets, small tables and other backends are
+    counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+
+        if connection.vendor == "postgresql" and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],  # noqa: SLF001
+                )
+                (estimate,) = cursor.fetchone()
+
+            if estimate >= ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+
+        return super().count
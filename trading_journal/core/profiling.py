@@ -0,0 +1,163 @@
+import hmac
+import logging
+import random
+import re
+import sys
+import threading
+from collections import Counter
+from types import CodeType, FrameType
+
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils.timezone import now
+
+logger = logging.getLogger(__name__)
+
+PROFILES_DIR = "profiles"
+UNSAFE_NAME = re.compile(r"[^\w.-]+")
+
+
+class SamplingProfiler:
+    """
+    Sample the stack of the thread that entered the profiler from a background thread at a fixed interval.
+
+    The profiled code runs untouched between samples, so the overhead depends on the interval rather than on the
+    number of calls like with ``cProfile``. Samples are counted per stack and written in the collapsed format read
+    by flamegraph.pl, speedscope and most other flame graph viewers.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._labels: dict[CodeType, str] = {}
+        # Longest first, so files are named after the most specific import path that holds them.
+        self._prefixes = sorted((f"{path}/" for path in sys.path if path), key=len, reverse=True)
+        self._thread_id = None
+        self._sampler = None
+        self._stopped = threading.Event()
+
+    def __enter__(self) -> "SamplingProfiler":
+        self._thread_id = threading.get_ident()
+        self._sampler = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._sampler.join()
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)  # noqa: SLF001
+
+            if frame is not None:
+                self.samples[self._collapse(frame)] += 1
+
+    def _collapse(self, frame: FrameType) -> str:
+        labels = []
+
+        while frame is not None:
+            labels.append(self._get_label(frame.f_code))
+            frame = frame.f_back
+
+        return ";".join(reversed(labels))
+
+    def _get_label(self, code: CodeType) -> str:
+        if (label := self._labels.get(code)) is None:
+            filename = code.co_filename
+
+            for prefix in self._prefixes:
+                if filename.startswith(prefix):
+                    filename = filename.removeprefix(prefix)
+                    break
+
+            label = self._labels[code] = f"{code.co_qualname} ({filename}:{code.co_firstlineno})".replace(";", ",")
+
+        return label
+
+    def to_folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def save_profile(profiler: SamplingProfiler, kind: str, name: str) -> str:
+    """
+    Store the profile in the media storage and remove the oldest profiles beyond ``PROFILING_MAX_PROFILES``.
+
+    Returns the name of the stored file.
+    """
+    filename = f"{PROFILES_DIR}/{now():%Y%m%dT%H%M%S%f}-{kind}-{UNSAFE_NAME.sub('_', name)}.folded"
+    filename = default_storage.save(filename, ContentFile(profiler.to_folded().encode()))
+
+    # Names start with the time, so they sort from the oldest profile to the newest.
+    _, profiles = default_storage.listdir(PROFILES_DIR)
+
+    for old in sorted(profiles)[: -settings.PROFILING_MAX_PROFILES]:
+        default_storage.delete(f"{PROFILES_DIR}/{old}")
+
+    return filename
+
+
+def is_profiled(request) -> bool:
+    """
+    Tell whether to profile the request, because it carries the profiling token or was sampled.
+    """
+    token = request.headers.get(settings.PROFILING_HEADER)
+
+    if token and settings.PROFILING_TOKEN:
+        return hmac.compare_digest(token, settings.PROFILING_TOKEN)
+
+    # Sampling requests has nothing to do with security.
+    return random.random() < settings.PROFILING_SAMPLE_RATE  # noqa: S311
+
+
+class ProfilingMiddleware:
+    """
+    Profile the requests picked by ``is_profiled`` and store their profiles, while others pass through untouched.
+
+    The content of a streaming response is produced after the view returned and is not profiled.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not is_profiled(request):
+            return self.get_response(request)
+
+        with SamplingProfiler(settings.PROFILING_INTERVAL) as profiler:
+            response = self.get_response(request)
+
+        name = request.resolver_match.view_name if request.resolver_match else "unresolved"
+
+        try:
+            save_profile(profiler, "view", name)
+        except Exception:
+            # Storage backends raise errors of their own, like botocore's for S3, and none may fail the request.
+            logger.exception("Storing the profile of %s failed", name)
+
+        return response
+
+
+# Profilers of the tasks running in this worker process, by task id.
+_task_profilers: dict[str, SamplingProfiler] = {}
+
+
+@task_prerun.connect
+def start_task_profiling(task_id, task, **kwargs):
+    if task.name in settings.PROFILING_TASKS:
+        _task_profilers[task_id] = SamplingProfiler(settings.PROFILING_INTERVAL).__enter__()
+
+
+@task_postrun.connect
+def stop_task_profiling(task_id, task, **kwargs):
+    if (profiler := _task_profilers.pop(task_id, None)) is None:
+        return
+
+    profiler.__exit__(None, None, None)
+
+    try:
+        save_profile(profiler, "task", task.name)
+    except Exception:
+        logger.exception("Storing the profile of %s failed", task.name)
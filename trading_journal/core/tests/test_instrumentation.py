@@ -0,0 +1,141 @@
+from decimal import Decimal
+from unittest import mock
+
+import fakeredis
+from celery.backends.base import DisabledBackend
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from trading_journal.core.instrumentation import QueryRecorder
+from trading_journal.journal.models import History
+from trading_journal.journal.tasks import drain_events
+from trading_journal.journal.tests.factories import AccountFactory, HistoryFactory
+
+
+def get_sample(name: str, kind: str, label: str) -> float:
+    return REGISTRY.get_sample_value(name, {"kind": kind, "name": label}) or 0.0
+
+
+class QueryRecorderTestCase(TestCase):
+    def test_duplicates(self) -> None:
+        """
+        Test that queries repeating the SQL of an earlier one are counted as duplicates, whatever their parameters.
+        """
+        accounts = AccountFactory.create_batch(3)
+
+        with QueryRecorder().record() as recorder:
+            for account in accounts:
+                History.objects.filter(account=account).exists()
+
+            History.objects.count()
+
+        self.assertEqual(recorder.queries, 4)
+        self.assertEqual(recorder.duplicates, 2)
+        self.assertGreater(recorder.duration, 0)
+
+    @override_settings(SQL_SLOW_QUERY_THRESHOLD=0)
+    def test_slow_query_log(self) -> None:
+        """
+        Test that slow queries are logged with the line of code that ran them.
+        """
+        with self.assertLogs("trading_journal.core.instrumentation", "WARNING") as logs, QueryRecorder().record():
+            History.objects.count()
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("core/tests/test_instrumentation.py:", logs.output[0])
+        self.assertIn("in test_slow_query_log", logs.output[0])
+
+
+class QueryInstrumentationTestCase(TestCase):
+    def setUp(self) -> None:
+        """
+        Set up a logged in owner of an account with a few history rows.
+        """
+        self.account = AccountFactory()
+        HistoryFactory.create_batch(3, account=self.account, profit=Decimal("10.00"))
+        self.client.force_login(self.account.owner)
+
+    def test_request(self) -> None:
+        """
+        Test that the queries of a streamed export are counted once its content is read, under the URL name.
+        """
+        count = get_sample("trading_journal_sql_queries_count", "view", "journal:export-history")
+        queries = get_sample("trading_journal_sql_queries_sum", "view", "journal:export-history")
+
+        response = self.client.get(reverse("journal:export-history"), {"format": "csv"})
+
+        self.assertEqual(get_sample("trading_journal_sql_queries_count", "view", "journal:export-history"), count)
+
+        b"".join(response.streaming_content)
+
+        self.assertEqual(get_sample("trading_journal_sql_queries_count", "view", "journal:export-history"), count + 1)
+        self.assertGreater(get_sample("trading_journal_sql_queries_sum", "view", "journal:export-history"), queries)
+
+    def test_task(self) -> None:
+        """
+        Test that tasks are measured under their name.
+        """
+        name = "trading_journal.journal.tasks.drain_events"
+        count = get_sample("trading_journal_sql_queries_count", "task", name)
+
+        with (
+            mock.patch("trading_journal.journal.events.get_redis_connection", return_value=fakeredis.FakeRedis()),
+            # Results are not needed, and storing them would need the result backend.
+            mock.patch.object(type(drain_events.app), "backend", DisabledBackend(drain_events.app)),
+        ):
+            drain_events.apply(args=[0])
+
+        self.assertEqual(get_sample("trading_journal_sql_queries_count", "task", name), count + 1)
+
+    @override_settings(METRICS_TOKEN="secret")  # noqa: S106
+    def test_metrics(self) -> None:
+        """
+        Test that the metrics are served in the Prometheus format to scrapers sending the token only.
+        """
+        response = self.client.get(reverse("metrics"), headers={"Authorization": "Bearer secret"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"# TYPE trading_journal_sql_queries histogram", response.content)
+
+        for authorization in ("", "Bearer wrong", "Basic secret"):
+            response = self.client.get(reverse("metrics"), headers={"Authorization": authorization})
+            self.assertEqual(response.status_code, 404)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_metrics_without_token(self) -> None:
+        """
+        Test that the metrics are not served at all while no token is set.
+        """
+        response = self.client.get(reverse("metrics"), headers={"Authorization": "Bearer "})
+
+        self.assertEqual(response.status_code, 404)
+
+
+class AsyncQueryInstrumentationTestCase(TransactionTestCase):
+    def setUp(self) -> None:
+        """
+        Set up an owner of an account with a few history rows.
+        """
+        self.account = AccountFactory()
+        HistoryFactory.create_batch(3, account=self.account, profit=Decimal("10.00"))
+
+    async def test_request(self) -> None:
+        """
+        Test that under ASGI the queries of a streamed export are counted once its content is read.
+        """
+        client = AsyncClient()
+        await client.aforce_login(self.account.owner)
+        count = get_sample("trading_journal_sql_queries_count", "view", "journal:export-history")
+        queries = get_sample("trading_journal_sql_queries_sum", "view", "journal:export-history")
+
+        response = await client.get(reverse("journal:export-history"), {"format": "csv"})
+
+        self.assertEqual(get_sample("trading_journal_sql_queries_count", "view", "journal:export-history"), count)
+
+        content = b"".join([chunk async for chunk in response])
+
+        self.assertEqual(len(content.splitlines()), 4)
+        self.assertEqual(get_sample("trading_journal_sql_queries_count", "view", "journal:export-history"), count + 1)
+        # The session, the user, and the export read while streaming.
+        self.assertEqual(get_sample("trading_journal_sql_queries_sum", "view", "journal:export-history"), queries + 3)
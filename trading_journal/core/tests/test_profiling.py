@@ -0,0 +1,115 @@
+from time import perf_counter
+from unittest import mock
+
+import fakeredis
+from celery.backends.base import DisabledBackend
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from trading_journal.core.profiling import PROFILES_DIR, SamplingProfiler, save_profile
+from trading_journal.journal.tasks import drain_events
+
+
+def busy(seconds: float):
+    started_at = perf_counter()
+
+    while perf_counter() - started_at < seconds:
+        pass
+
+
+def get_profiles() -> list[str]:
+    if not default_storage.exists(PROFILES_DIR):
+        return []
+
+    return sorted(default_storage.listdir(PROFILES_DIR)[1])
+
+
+class SamplingProfilerTestCase(TestCase):
+    def test_samples(self) -> None:
+        """
+        Test that the stacks of the profiled thread are sampled and written in the collapsed format.
+        """
+        with SamplingProfiler(0.001) as profiler:
+            busy(0.1)
+
+        self.assertGreater(profiler.samples.total(), 10)
+        stack, count = profiler.to_folded().splitlines()[0].rsplit(" ", 1)
+        self.assertIn("test_samples (trading_journal/core/tests/test_profiling.py:", stack)
+        self.assertTrue(
+            stack.endswith(f"busy (trading_journal/core/tests/test_profiling.py:{busy.__code__.co_firstlineno})"),
+        )
+        self.assertGreater(int(count), 0)
+
+    @override_settings(PROFILING_MAX_PROFILES=2)
+    def test_retention(self) -> None:
+        """
+        Test that only the newest profiles are kept.
+        """
+        with SamplingProfiler(0.001) as profiler:
+            busy(0.01)
+
+        names = [save_profile(profiler, "view", f"journal:view-{n}") for n in range(3)]
+
+        self.assertListEqual([f"{PROFILES_DIR}/{name}" for name in get_profiles()], names[1:])
+        self.assertTrue(names[2].endswith("-view-journal_view-2.folded"))
+
+
+@override_settings(PROFILING_SAMPLE_RATE=0, PROFILING_TOKEN="secret")  # noqa: S106
+class ProfilingMiddlewareTestCase(TestCase):
+    def test_sample_rate(self) -> None:
+        """
+        Test that sampled requests are profiled, and others are not.
+        """
+        self.client.get(reverse("metrics"))
+        self.assertListEqual(get_profiles(), [])
+
+        with override_settings(PROFILING_SAMPLE_RATE=1):
+            self.client.get(reverse("metrics"))
+
+        self.assertEqual(len(get_profiles()), 1)
+        self.assertIn("-view-metrics.folded", get_profiles()[0])
+
+    def test_header(self) -> None:
+        """
+        Test that requests carrying the token are profiled, and a wrong token is ignored.
+        """
+        self.client.get(reverse("metrics"), headers={"X-Profile": "wrong"})
+        self.assertListEqual(get_profiles(), [])
+
+        self.client.get(reverse("metrics"), headers={"X-Profile": "secret"})
+        self.assertEqual(len(get_profiles()), 1)
+
+    def test_task(self) -> None:
+        """
+        Test that selected tasks are profiled on every run.
+        """
+        with (
+            override_settings(PROFILING_TASKS=[drain_events.name]),
+            mock.patch("trading_journal.journal.events.get_redis_connection", return_value=fakeredis.FakeRedis()),
+            mock.patch.object(type(drain_events.app), "backend", DisabledBackend(drain_events.app)),
+        ):
+            drain_events.apply(args=[0])
+
+        self.assertEqual(len(get_profiles()), 1)
+        self.assertIn("-task-trading_journal.journal.tasks.drain_events.folded", get_profiles()[0])
+
+    def test_storage_error(self) -> None:
+        """
+        Test that a profile the storage fails to save is logged, and neither the request nor the task fails.
+        """
+        error = RuntimeError("The bucket is unreachable")
+
+        with (
+            mock.patch("trading_journal.core.profiling.save_profile", side_effect=error),
+            self.assertLogs("trading_journal.core.profiling", "ERROR") as logs,
+            override_settings(PROFILING_TASKS=[drain_events.name]),
+            mock.patch("trading_journal.journal.events.get_redis_connection", return_value=fakeredis.FakeRedis()),
+            mock.patch.object(type(drain_events.app), "backend", DisabledBackend(drain_events.app)),
+        ):
+            response = self.client.get(reverse("metrics"), headers={"X-Profile": "secret"})
+            result = drain_events.apply(args=[0])
+
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(result.successful())
+        self.assertEqual(len(logs.output), 2)
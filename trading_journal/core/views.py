@@ -0,0 +1,29 @@
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views import View
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from trading_journal.core.instrumentation import get_metrics_registry
+
+
+class MetricsView(View):
+    """
+    Serve the metrics in the Prometheus text format to scrapers sending ``METRICS_TOKEN`` as a bearer token.
+
+    Behind the proxy every request comes from the proxy's address, so the client cannot be told by it. The endpoint
+    does not exist while no token is set.
+    """
+
+    def get(self, request, *args, **kwargs):
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+
+        if (
+            not settings.METRICS_TOKEN
+            or scheme.lower() != "bearer"
+            or not hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode())
+        ):
+            raise Http404
+
+        return HttpResponse(generate_latest(get_metrics_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -1,26 +1,52 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 
-from trading_journal.journal.models import Account, History, Position
+from trading_journal.core.admin import KeysetPaginationMixin
+from trading_journal.journal.models import Account, AccountDailySnapshot, ApiToken, History, Position
 
 
 @admin.register(Account)
 class AccountAdmin(admin.ModelAdmin):
     list_display = ("pk", "name", "broker", "balance")
     list_display_links = list_display
+    list_select_related = ("broker",)
     readonly_fields = ("balance",)
     search_fields = ("name",)
 
 
+@admin.register(AccountDailySnapshot)
+class AccountDailySnapshotAdmin(admin.ModelAdmin):
+    list_display = ("account", "day", "closing_balance", "profit", "deposits", "withdrawals", "trades")
+    list_display_links = list_display
+    list_filter = ("account",)
+    list_select_related = ("account",)
+    readonly_fields = list_display
+
+
+@admin.register(ApiToken)
+class ApiTokenAdmin(admin.ModelAdmin):
+    # Keys are only shown once, by the create_api_token command, so tokens can be revoked here but not issued.
+    list_display = ("name", "owner", "created_at")
+    list_display_links = list_display
+    list_select_related = ("owner",)
+    readonly_fields = ("name", "owner", "created_at")
+
+    def has_add_permission(self, request):
+        return False
+
+
 @admin.register(History)
-class HistoryAdmin(admin.ModelAdmin):
+class HistoryAdmin(KeysetPaginationMixin, admin.ModelAdmin):
+    keyset_fields = ("created_at", "id")
     list_display = ("account", "operation", "created_at", "profit", "balance")
     list_display_links = ("account", "operation", "created_at", "profit", "balance")
     list_filter = ("account",)
+    list_select_related = ("account",)
 
 
 @admin.register(Position)
-class PositionAdmin(admin.ModelAdmin):
+class PositionAdmin(KeysetPaginationMixin, admin.ModelAdmin):
+    keyset_fields = ("opened_at", "id")
     autocomplete_fields = ("account",)
     list_display = (
         "account",
@@ -35,6 +61,7 @@ class PositionAdmin(admin.ModelAdmin):
         "profit",
     )
     list_display_links = list_display
+    list_select_related = ("account", "symbol")
     fieldsets = (
         (None, {"fields": ("account", "symbol", "volume")}),
         (_("Open"), {"fields": ("opened_at", "open_price")}),
@@ -43,3 +70,7 @@ class PositionAdmin(admin.ModelAdmin):
         (_("Swaps & commissions"), {"fields": ("commissions", "swaps")}),
         (_("Profit"), {"fields": ("profit",)}),
     )
+
+    def get_queryset(self, request):
+        # The modifications log is never shown and can be large.
+        return super().get_queryset(request).defer("modifications")
@@ -0,0 +1,127 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, datetime
+
+import numpy as np
+from django.db.models import FloatField, QuerySet
+from django.db.models.functions import Cast, Extract
+from django.utils.timezone import now
+
+from trading_journal.journal.models import Account, History, Position
+from trading_journal.journal.stats import NET_PROFIT
+from trading_journal.markets.rates import exchange_rates
+
+SERIES_DTYPE = [("account", "i8"), ("epoch", "f8"), ("profit", "f8")]
+
+
+@dataclass(frozen=True, slots=True)
+class ProfitSeries:
+    """
+    Profits of several accounts converted to one currency, in time order.
+
+    Every profit is converted with the rate of its UTC day. ``accounts`` holds the account id of every profit
+    and ``times`` are naive UTC ``datetime64[us]`` values.
+    """
+
+    currency: str
+    accounts: np.ndarray
+    times: np.ndarray
+    profits: np.ndarray
+
+    @property
+    def total(self) -> float:
+        return float(self.profits.sum())
+
+    def cumulative(self) -> np.ndarray:
+        return np.cumsum(self.profits)
+
+
+def _epoch(field: str) -> Cast:
+    # Seconds since the epoch as a float. Building an aware datetime for every row costs more than the query itself.
+    return Cast(Extract(field, "epoch"), FloatField())
+
+
+def _to_series(rows: QuerySet, currencies: dict[int, str], currency: str) -> ProfitSeries:
+    data = np.fromiter(rows, dtype=SERIES_DTYPE)
+    profits = data["profit"]
+    times = np.rint(data["epoch"] * 1e6).astype("i8").astype("M8[us]")
+    days = times.astype("M8[D]")
+
+    # One conversion per account currency, whatever the number of rows.
+    for account_currency in set(currencies.values()) - {currency}:
+        account_ids = [account_id for account_id, other in currencies.items() if other == account_currency]
+        mask = np.isin(data["account"], account_ids)
+        profits[mask] = exchange_rates.convert(profits[mask], days[mask], account_currency, currency)
+
+    return ProfitSeries(currency=currency, accounts=data["account"], times=times, profits=profits)
+
+
+def get_history_profits(
+    accounts: Iterable[Account],
+    currency: str,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> ProfitSeries:
+    """
+    Return the profits of the accounts' history rows created between ``since`` and ``until`` in ``currency``.
+
+    Deposits and withdrawals are included, so the cumulative sum follows the combined balance.
+    """
+    currencies = {account.pk: account.currency for account in accounts}
+    rows = History.objects.filter(account__in=currencies)
+
+    if since:
+        rows = rows.filter(created_at__gte=since)
+
+    if until:
+        rows = rows.filter(created_at__lt=until)
+
+    rows = rows.order_by("created_at", "id").values_list(
+        "account_id",
+        _epoch("created_at"),
+        Cast("profit", FloatField()),
+    )
+
+    return _to_series(rows, currencies, currency)
+
+
+def get_position_profits(
+    accounts: Iterable[Account],
+    currency: str,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> ProfitSeries:
+    """
+    Return the net profits of the accounts' positions closed between ``since`` and ``until`` in ``currency``.
+    """
+    currencies = {account.pk: account.currency for account in accounts}
+    positions = Position.objects.filter(account__in=currencies, closed_at__isnull=False)
+
+    if since:
+        positions = positions.filter(closed_at__gte=since)
+
+    if until:
+        positions = positions.filter(closed_at__lt=until)
+
+    rows = positions.order_by("closed_at", "id").values_list("account_id", _epoch("closed_at"), NET_PROFIT)
+
+    return _to_series(rows, currencies, currency)
+
+
+def get_consolidated_balance(accounts: Iterable[Account], currency: str, day: date | None = None) -> float:
+    """
+    Return the sum of the accounts' current balances in ``currency``, converted with the rates of ``day``.
+    """
+    day = day or now().date()
+    total = 0.0
+    balances: dict[str, list[float]] = {}
+
+    for account in accounts:
+        balances.setdefault(account.currency, []).append(float(account.balance))
+
+    for account_currency, amounts in balances.items():
+        total += float(
+            exchange_rates.convert(np.array(amounts), [day] * len(amounts), account_currency, currency).sum(),
+        )
+
+    return total
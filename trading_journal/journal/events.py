@@ -0,0 +1,364 @@
+import json
+import time as clock
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import DataError, IntegrityError, transaction
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive, make_aware
+from django_redis import get_redis_connection
+
+from trading_journal.journal.exceptions import InvalidEventError, UnknownSymbolError
+from trading_journal.journal.loaders import load_positions
+from trading_journal.journal.models import Account, History, Position
+from trading_journal.journal.types import EventType
+from trading_journal.markets.resolvers import symbol_resolver
+
+EVENTS_KEY_PREFIX = "journal:events"
+EVENT_SHARDS = 16
+DRAIN_BATCH_SIZE = 10_000
+DRAIN_LOCK_TIMEOUT = 5 * 60
+DRAIN_TIME_BUDGET = 60
+MAX_EVENTS_PER_REQUEST = 10_000
+SECURITY_FIELDS = ("sl", "tp")
+DATETIME_FIELDS = ("opened_at", "closed_at", "time")
+DECIMAL_FIELDS = ("volume", "open_price", "close_price", "commissions", "swaps", "profit", *SECURITY_FIELDS)
+
+
+@dataclass
+class DrainResult:
+    events: int = 0
+    positions: int = 0
+    history: int = 0
+    skipped: int = 0
+    failed: int = 0
+    pending: int = 0
+
+
+def get_shard(account_id: int) -> int:
+    return account_id % EVENT_SHARDS
+
+
+def _shard_key(shard: int) -> str:
+    return f"{EVENTS_KEY_PREFIX}:{shard}"
+
+
+def validate_events(events, account_ids: set[int]) -> list[dict]:
+    """
+    Check a batch of events: every event names one of ``account_ids``, a type and a ticket, and its trade data
+    has the right types, so that the consumer can apply it.
+
+    The consumer still sets aside the events it cannot apply, whatever put them in the buffer.
+    """
+    if not isinstance(events, list) or len(events) > MAX_EVENTS_PER_REQUEST:
+        msg = f"{InvalidEventError.error_message}: expected a list of at most {MAX_EVENTS_PER_REQUEST} events"
+        raise InvalidEventError(msg)
+
+    for index, event in enumerate(events):
+        if (
+            not isinstance(event, dict)
+            or event.get("account") not in account_ids
+            or event.get("type") not in EventType.values
+            or not isinstance(event.get("ticket"), int)
+            or not _has_valid_fields(event)
+        ):
+            msg = f"{InvalidEventError.error_message}: #{index}"
+            raise InvalidEventError(msg)
+
+    return events
+
+
+def _has_valid_fields(event: dict) -> bool:
+    if "symbol" in event and not isinstance(event["symbol"], str):
+        return False
+
+    try:
+        for key in DATETIME_FIELDS:
+            if key in event:
+                _datetime(event, key)
+
+        for key in DECIMAL_FIELDS:
+            _decimal(event, key)
+    except InvalidEventError:
+        return False
+
+    return True
+
+
+def push_events(events: list[dict]) -> set[int]:
+    """
+    Append events to the Redis lists of their accounts' shards in one round trip and return the shards.
+
+    All events of an account land in the same list in the order given, which is the order they are applied in.
+    """
+    shards = defaultdict(list)
+
+    for event in events:
+        shards[get_shard(event["account"])].append(json.dumps(event))
+
+    pipeline = get_redis_connection().pipeline(transaction=False)
+
+    for shard, payloads in shards.items():
+        pipeline.rpush(_shard_key(shard), *payloads)
+
+    pipeline.execute()
+
+    return set(shards)
+
+
+def drain_shard(
+    shard: int,
+    *,
+    batch_size: int = DRAIN_BATCH_SIZE,
+    time_budget: float = DRAIN_TIME_BUDGET,
+) -> DrainResult:
+    """
+    Apply the events buffered in a shard until it is empty or ``time_budget`` seconds have passed.
+
+    A lock keeps a single consumer per shard, which preserves the order of every account's events. Events are
+    removed from the list only once applied, so a crashed consumer leaves them for the next one, and applying
+    them twice changes nothing. Returns at once when another consumer holds the lock. Events left when the
+    time is up are counted as pending.
+    """
+    redis = get_redis_connection()
+    key = _shard_key(shard)
+    result = DrainResult()
+    deadline = clock.monotonic() + time_budget
+
+    while clock.monotonic() < deadline:
+        lock = redis.lock(f"{key}:lock", timeout=DRAIN_LOCK_TIMEOUT, blocking=False)
+
+        if not lock.acquire():
+            return result
+
+        try:
+            while clock.monotonic() < deadline and (payloads := redis.lrange(key, 0, batch_size - 1)):
+                apply_events([json.loads(payload) for payload in payloads], result)
+                redis.ltrim(key, len(payloads), -1)
+                lock.reacquire()
+        finally:
+            lock.release()
+
+        # Also catches events pushed after the last read, whose consumer found the lock still taken.
+        result.pending = redis.llen(key)
+
+        if not result.pending:
+            return result
+
+    return result
+
+
+def apply_events(events: list[dict], result: DrainResult | None = None) -> DrainResult:
+    """
+    Apply a batch of events of any number of accounts, in the order given for every account.
+
+    The batch is written in one transaction with a fixed number of queries. The events of an account that
+    cannot be applied are moved to a dead letter list and the other accounts go on, when the database refuses
+    the batch the accounts are retried one transaction each to find the culprit.
+    """
+    result = result or DrainResult()
+    by_account = defaultdict(list)
+    unowned = []
+
+    for event in events:
+        if isinstance(event, dict) and isinstance(event.get("account"), int):
+            by_account[event["account"]].append(event)
+        else:
+            unowned.append(event)
+
+    result.events += len(events)
+
+    if unowned:
+        _set_aside({None: unowned}, InvalidEventError(f"{InvalidEventError.error_message}: no account"), result)
+
+    changed = _apply_in_memory(by_account, result)
+
+    try:
+        with transaction.atomic():
+            _write(changed, result)
+    except (DataError, IntegrityError):
+        # Positions of the failed batch carry primary keys that were rolled back, start over from the events.
+        for account_id in {position.account_id for position in changed}:
+            account_events = {account_id: by_account[account_id]}
+            # Skipped events were already counted by the pass over the whole batch.
+            retry = DrainResult()
+
+            try:
+                with transaction.atomic():
+                    _write(_apply_in_memory(account_events, retry), result)
+            except (DataError, IntegrityError) as error:
+                _set_aside(account_events, error, result)
+
+            result.failed += retry.failed
+
+    return result
+
+
+def _set_aside(by_account: dict[int, list[dict]], error: Exception, result: DrainResult):
+    pipeline = get_redis_connection().pipeline(transaction=False)
+
+    for account_events in by_account.values():
+        result.failed += len(account_events)
+        pipeline.rpush(f"{EVENTS_KEY_PREFIX}:dead", json.dumps({"error": str(error), "events": account_events}))
+
+    pipeline.execute()
+
+
+def _write(positions: list[Position], result: DrainResult):
+    if not positions:
+        return
+
+    result.positions += load_positions(positions)
+    closed = {(position.account_id, position.ticket): position for position in positions if position.closed_at}
+
+    # Loading does not report primary keys, new positions need theirs to be booked.
+    for account_id, ticket, pk in Position.objects.filter(
+        account_id__in={account_id for account_id, _ in closed},
+        ticket__in={ticket for _, ticket in closed},
+    ).values_list("account_id", "ticket", "id"):
+        if position := closed.get((account_id, ticket)):
+            position.pk = pk
+
+    booked = set(History.objects.filter(position__in=closed.values()).values_list("position_id", flat=True))
+    rows = History.add_closed_positions_of_accounts(
+        [position for position in closed.values() if position.pk not in booked],
+        force=True,
+    )
+    result.history += len(rows)
+
+
+def _decimal(event: dict, key: str) -> Decimal | None:
+    if (value := event.get(key)) is None:
+        return None
+
+    try:
+        return Decimal(str(value))
+    except InvalidOperation as error:
+        msg = f"{InvalidEventError.error_message}: {key}={value!r}"
+        raise InvalidEventError(msg) from error
+
+
+def _datetime(event: dict, key: str) -> datetime:
+    try:
+        # Well formed but impossible dates, like February 30, raise instead of returning None.
+        value = parse_datetime(str(event.get(key) or ""))
+    except ValueError:
+        value = None
+
+    if value is None:
+        msg = f"{InvalidEventError.error_message}: {key}={event.get(key)!r}"
+        raise InvalidEventError(msg)
+
+    return make_aware(value) if is_naive(value) else value
+
+
+def _required_decimal(event: dict, key: str) -> Decimal:
+    if (value := _decimal(event, key)) is None:
+        msg = f"{InvalidEventError.error_message}: {key} is required"
+        raise InvalidEventError(msg)
+
+    return value
+
+
+def _open(position: Position, event: dict, symbol_ids: dict[str, int]):
+    position.symbol_id = symbol_ids[event["symbol"]]
+    position.volume = _required_decimal(event, "volume")
+    position.opened_at = _datetime(event, "opened_at")
+    position.open_price = _required_decimal(event, "open_price")
+    position.sl_price = _decimal(event, "sl")
+    position.tp_price = _decimal(event, "tp")
+
+
+def _modify(position: Position, event: dict):
+    modified_at = _datetime(event, "time").isoformat()
+
+    for field in SECURITY_FIELDS:
+        if field not in event:
+            continue
+
+        price = _decimal(event, field)
+        setattr(position, f"{field}_price", price)
+        entry = [modified_at, None if price is None else str(price)]
+        log = position.modifications.setdefault(field, [])
+
+        # Replayed events are already in the log.
+        if entry not in log:
+            log.append(entry)
+
+
+def _close(position: Position, event: dict):
+    position.closed_at = _datetime(event, "closed_at")
+    position.close_price = _required_decimal(event, "close_price")
+    position.commissions = _decimal(event, "commissions") or Decimal(0)
+    position.swaps = _decimal(event, "swaps") or Decimal(0)
+    position.profit = _decimal(event, "profit") or Decimal(0)
+
+
+def _apply_in_memory(by_account: dict[int, list[dict]], result: DrainResult) -> list[Position]:
+    accounts = Account.objects.in_bulk(list(by_account))
+    positions = {
+        (position.account_id, position.ticket): position
+        for position in Position.objects.filter(
+            account_id__in=list(by_account),
+            ticket__in={
+                event["ticket"]
+                for events in by_account.values()
+                for event in events
+                if isinstance(event.get("ticket"), int)
+            },
+        )
+    }
+    changed = []
+
+    for account_id, events in by_account.items():
+        try:
+            changed += _apply_account_events(accounts[account_id], events, positions, result)
+        except (KeyError, TypeError, ValueError, InvalidEventError, UnknownSymbolError) as error:
+            # Anything that cannot be applied must leave the buffer, or it would block the shard for good.
+            _set_aside({account_id: events}, error, result)
+
+    return changed
+
+
+def _apply_account_events(
+    account: Account,
+    events: list[dict],
+    positions: dict[tuple[int, int], Position],
+    result: DrainResult,
+) -> list[Position]:
+    codes = {event["symbol"] for event in events if "symbol" in event}
+    symbol_ids = symbol_resolver.by_broker(account.broker_id, codes) if codes else {}
+
+    if unknown := codes - symbol_ids.keys():
+        msg = f"{UnknownSymbolError.error_message}: {', '.join(sorted(unknown))}"
+        raise UnknownSymbolError(msg)
+
+    changed = {}
+    skipped = 0
+
+    for event in events:
+        key = (account.pk, event["ticket"])
+        position = changed.get(key) or positions.get(key)
+
+        # Open and close events carry the whole position, a close can stand in for an open that was never sent.
+        # An open of a known ticket is a replay and must not undo the modifications after it.
+        if position is None and "symbol" in event:
+            position = Position(account=account, ticket=event["ticket"], modifications={})
+            _open(position, event, symbol_ids)
+
+        if position is None:
+            skipped += 1
+            continue
+
+        if event["type"] == EventType.MODIFY:
+            _modify(position, event)
+        elif event["type"] == EventType.CLOSE:
+            _close(position, event)
+
+        changed[key] = position
+
+    result.skipped += skipped
+
+    return list(changed.values())
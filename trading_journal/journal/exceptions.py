@@ -2,6 +2,18 @@ from trading_journal.core.exceptions import CoreError
 from trading_journal.journal import messages
 
 
+class InvalidEventError(CoreError):
+    error_message = messages.INVALID_EVENT
+
+
+class InvalidStatementError(CoreError):
+    error_message = messages.INVALID_STATEMENT
+
+
+class PositionAccountMismatchError(CoreError):
+    error_message = messages.POSITION_ACCOUNT_MISMATCH
+
+
 class PositionAlreadyExistsError(CoreError):
     error_message = messages.POSITION_ALREADY_EXISTS
 
@@ -12,3 +24,7 @@ class PositionNotClosedError(CoreError):
 
 class TemporalDisturbanceError(CoreError):
     error_message = messages.TEMPORAL_DISTURBANCE
+
+
+class UnknownSymbolError(CoreError):
+    error_message = messages.UNKNOWN_SYMBOL
@@ -0,0 +1,248 @@
+import csv
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from datetime import datetime
+from io import StringIO
+from itertools import islice
+from pathlib import Path
+from typing import IO
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+
+from trading_journal.journal.models import Account, History, Position
+from trading_journal.journal.types import ColumnarFormat, ExportFormat, ExportKind
+
+EXPORT_CHUNK_SIZE = 5000
+POSITION_EXPORT_FIELDS = (
+    "account_id",
+    "ticket",
+    "symbol__code",
+    "volume",
+    "opened_at",
+    "open_price",
+    "sl_price",
+    "tp_price",
+    "closed_at",
+    "close_price",
+    "commissions",
+    "swaps",
+    "profit",
+)
+HISTORY_EXPORT_FIELDS = (
+    "account_id",
+    "created_at",
+    "operation",
+    "profit",
+    "balance",
+    "position__ticket",
+)
+EXPORT_FIELDS = {
+    ExportKind.POSITIONS: POSITION_EXPORT_FIELDS,
+    ExportKind.HISTORY: HISTORY_EXPORT_FIELDS,
+}
+_TIMESTAMP = pa.timestamp("us", tz="UTC")
+_PRICE = pa.decimal128(10, 4)
+_AMOUNT = pa.decimal128(10, 2)
+# Column types follow the model fields, positions gain the float net profit the statistics run on.
+COLUMNAR_SCHEMAS = {
+    ExportKind.POSITIONS: pa.schema(
+        [
+            ("account_id", pa.int64()),
+            ("ticket", pa.uint64()),
+            ("symbol_code", pa.string()),
+            ("volume", _PRICE),
+            ("opened_at", _TIMESTAMP),
+            ("open_price", _PRICE),
+            ("sl_price", _PRICE),
+            ("tp_price", _PRICE),
+            ("closed_at", _TIMESTAMP),
+            ("close_price", _PRICE),
+            ("commissions", _PRICE),
+            ("swaps", _PRICE),
+            ("profit", _PRICE),
+            ("net_profit", pa.float64()),
+        ],
+    ),
+    ExportKind.HISTORY: pa.schema(
+        [
+            ("account_id", pa.int64()),
+            ("created_at", _TIMESTAMP),
+            ("operation", pa.string()),
+            ("profit", _AMOUNT),
+            ("balance", _AMOUNT),
+            ("position_ticket", pa.uint64()),
+        ],
+    ),
+}
+CONTENT_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.JSONL: "application/jsonl",
+}
+
+
+def get_export_header(kind: str) -> tuple[str, ...]:
+    return tuple(field.replace("__", "_") for field in EXPORT_FIELDS[kind])
+
+
+def get_export_rows(
+    kind: str,
+    accounts: QuerySet[Account],
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> tuple[tuple[str, ...], QuerySet]:
+    """
+    Return the column names and the ``values_list`` queryset of the rows to export.
+
+    History is filtered by creation time and positions by close time, ordered to match the (account, time)
+    indexes, so a date range is an index range scan per account. Open positions are exported only without a range.
+    """
+    if kind == ExportKind.HISTORY:
+        model, time_field, ordering = History, "created_at", ("created_at", "id")
+    else:
+        model, time_field, ordering = Position, "closed_at", ("closed_at", "id")
+
+    rows = model.objects.filter(account__in=accounts)
+
+    if since:
+        rows = rows.filter(**{f"{time_field}__gte": since})
+
+    if until:
+        rows = rows.filter(**{f"{time_field}__lt": until})
+
+    return get_export_header(kind), rows.order_by("account_id", *ordering).values_list(*EXPORT_FIELDS[kind])
+
+
+def _chunks(rows: QuerySet, chunk_size: int) -> Iterator[list[tuple]]:
+    # A server-side cursor on PostgreSQL, rows are fetched chunk_size at a time.
+    rows = rows.iterator(chunk_size=chunk_size)
+
+    while chunk := list(islice(rows, chunk_size)):
+        yield chunk
+
+
+def stream_csv(header: Iterable[str], rows: QuerySet, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+
+    for chunk in _chunks(rows, chunk_size):
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def stream_jsonl(header: Iterable[str], rows: QuerySet, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    header = tuple(header)
+    encoder = DjangoJSONEncoder()
+
+    for chunk in _chunks(rows, chunk_size):
+        yield "".join(f"{encoder.encode(dict(zip(header, row, strict=True)))}\n" for row in chunk)
+
+
+STREAMERS: dict[str, Callable[[Iterable[str], QuerySet, int], Iterator[str]]] = {
+    ExportFormat.CSV: stream_csv,
+    ExportFormat.JSONL: stream_jsonl,
+}
+
+
+def export_rows(
+    export_format: str,
+    header: Iterable[str],
+    rows: QuerySet,
+    *,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[str]:
+    """
+    Stream the rows of ``get_export_rows`` as CSV or JSON lines, one string per chunk of rows.
+
+    Memory use depends on ``chunk_size`` only, not on the number of exported rows.
+    """
+    return STREAMERS[export_format](header, rows, chunk_size)
+
+
+async def aiter_chunks(chunks: Iterator[str]) -> AsyncIterator[str]:
+    """
+    Serve the chunks of ``export_rows`` to an ASGI response one at a time.
+
+    Over ASGI, Django reads a sync iterator into a list before it sends the first byte. Every chunk is pulled on
+    the request's sync thread, which owns the connection of the server-side cursor.
+    """
+    pull = sync_to_async(next, thread_sensitive=True)
+    done = object()
+
+    try:
+        while (chunk := await pull(chunks, done)) is not done:
+            yield chunk
+    finally:
+        # Closes the cursor when the client goes away before the end.
+        await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+def _net_profit(columns: dict[str, pa.Array]) -> pa.Array:
+    zero = pa.scalar(0, _PRICE)
+    net_profit = pc.subtract(
+        pc.add(columns["profit"].fill_null(zero), columns["swaps"].fill_null(zero)),
+        columns["commissions"].fill_null(zero),
+    )
+    return pc.cast(net_profit, pa.float64())
+
+
+def _record_batches(kind: str, rows: QuerySet, batch_size: int) -> Iterator[pa.RecordBatch]:
+    schema = COLUMNAR_SCHEMAS[kind]
+    header = get_export_header(kind)
+
+    for chunk in _chunks(rows, batch_size):
+        columns = {
+            name: pa.array(values, type=schema.field(name).type)
+            for name, values in zip(header, zip(*chunk, strict=True), strict=True)
+        }
+
+        if kind == ExportKind.POSITIONS:
+            columns["net_profit"] = _net_profit(columns)
+
+        yield pa.RecordBatch.from_arrays([columns[name] for name in schema.names], schema=schema)
+
+
+def write_columnar(
+    file_format: str,
+    kind: str,
+    rows: QuerySet,
+    sink: str | Path | IO[bytes],
+    *,
+    batch_size: int = EXPORT_CHUNK_SIZE,
+) -> int:
+    """
+    Write the rows of ``get_export_rows`` to a Parquet or Arrow IPC file, one record batch per chunk of rows.
+
+    Only closed positions are written. Batches are built straight from the cursor, so memory use depends on
+    ``batch_size`` only. Returns the number of written rows.
+    """
+    if kind == ExportKind.POSITIONS:
+        rows = rows.filter(closed_at__isnull=False)
+
+    schema = COLUMNAR_SCHEMAS[kind]
+    writer = pq.ParquetWriter(sink, schema) if file_format == ColumnarFormat.PARQUET else pa.ipc.new_file(sink, schema)
+    written = 0
+
+    with writer:
+        for batch in _record_batches(kind, rows, batch_size):
+            writer.write_batch(batch)
+            written += batch.num_rows
+
+    return written
+
+
+def read_arrow(path: str | Path) -> pa.Table:
+    """
+    Memory-map an Arrow IPC file written by ``write_columnar``.
+
+    The columns of the returned table point into the mapped file, nothing is read until it is accessed.
+    """
+    return pa.ipc.open_file(pa.memory_map(str(path))).read_all()
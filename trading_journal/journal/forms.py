@@ -0,0 +1,34 @@
+from django import forms
+from django.utils.translation import gettext_lazy as _
+
+from trading_journal.journal.models import Account
+from trading_journal.journal.types import ExportFormat
+
+
+class ExportForm(forms.Form):
+    account = forms.ModelChoiceField(Account.objects.none(), required=False, label=_("Account"))
+    format = forms.ChoiceField(choices=ExportFormat.choices, required=False, label=_("Format"))
+    since = forms.DateTimeField(required=False, label=_("Since"))
+    until = forms.DateTimeField(required=False, label=_("Until"))
+
+    def __init__(self, *args, owner, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["account"].queryset = Account.objects.filter(owner=owner)
+
+    def clean_format(self):
+        return self.cleaned_data["format"] or ExportFormat.CSV
+
+    def clean(self):
+        cleaned_data = super().clean()
+        since, until = cleaned_data.get("since"), cleaned_data.get("until")
+
+        if since and until and since >= until:
+            raise forms.ValidationError(_("The start of the range must be before its end."))
+
+        return cleaned_data
+
+    def get_accounts(self):
+        if account := self.cleaned_data["account"]:
+            return self.fields["account"].queryset.filter(pk=account.pk)
+
+        return self.fields["account"].queryset
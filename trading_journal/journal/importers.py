@@ -0,0 +1,369 @@
+import codecs
+import csv
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from html.parser import HTMLParser
+from io import TextIOWrapper
+from itertools import islice
+from typing import IO, TypeVar
+
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive, make_aware
+
+from trading_journal.journal.exceptions import InvalidStatementError, UnknownSymbolError
+from trading_journal.journal.models import Account, History, Position
+from trading_journal.journal.types import StatementFormat
+from trading_journal.markets.models import Market
+from trading_journal.markets.resolvers import symbol_resolver
+
+IMPORT_CHUNK_SIZE = 5000
+READ_SIZE = 64 * 1024
+QUANTUM = Decimal("0.0001")
+SIDES = ("buy", "sell")
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True, slots=True)
+class StatementRow:
+    ticket: int
+    symbol: str
+    volume: Decimal
+    opened_at: datetime
+    open_price: Decimal
+    sl_price: Decimal | None = None
+    tp_price: Decimal | None = None
+    closed_at: datetime | None = None
+    close_price: Decimal | None = None
+    commissions: Decimal = Decimal(0)
+    swaps: Decimal = Decimal(0)
+    profit: Decimal = Decimal(0)
+
+    def to_position(self, account: Account, symbol_id: int) -> Position:
+        return Position(
+            account=account,
+            ticket=self.ticket,
+            volume=self.volume,
+            symbol_id=symbol_id,
+            opened_at=self.opened_at,
+            open_price=self.open_price,
+            sl_price=self.sl_price,
+            tp_price=self.tp_price,
+            closed_at=self.closed_at,
+            close_price=self.close_price,
+            commissions=self.commissions,
+            swaps=self.swaps,
+            profit=self.profit,
+        )
+
+
+@dataclass
+class ImportResult:
+    positions: int = 0
+    history: int = 0
+
+
+def _decimal(value: str | None) -> Decimal | None:
+    # MetaTrader separates thousands with (non-breaking) spaces and reports partial volumes as "0.1 / 0.1".
+    cleaned = (value or "").split("/")[0].replace(" ", "").replace("\xa0", "")
+
+    try:
+        return Decimal(cleaned).quantize(QUANTUM) if cleaned else None
+    except InvalidOperation as error:
+        msg = f"{value!r} is not a number"
+        raise ValueError(msg) from error
+
+
+def _money(value: str | None) -> Decimal:
+    return _decimal(value) or Decimal(0)
+
+
+def _price(value: str | None) -> Decimal | None:
+    # MetaTrader reports a missing stop loss or take profit as zero.
+    return _decimal(value) or None
+
+
+def _datetime(value: str | None) -> datetime | None:
+    value = (value or "").strip()
+
+    if not value:
+        return None
+
+    if value[4:5] == ".":
+        # MetaTrader "2024.01.31 12:00:00".
+        value = value.replace(".", "-", 2)
+
+    # Well formed but impossible dates, like February 30, raise on their own.
+    if (parsed := parse_datetime(value)) is None:
+        msg = f"{value!r} is not a date"
+        raise ValueError(msg)
+
+    return make_aware(parsed) if is_naive(parsed) else parsed
+
+
+def _required(value: T | None, field: str) -> T:
+    if value is None:
+        msg = f"{field} is missing"
+        raise ValueError(msg)
+
+    return value
+
+
+def _parse_row(where: str, parse: Callable[..., StatementRow], *args) -> StatementRow:
+    """
+    Parse a row of a statement, turning any bad cell into an error that tells which row it is in.
+    """
+    try:
+        return parse(*args)
+    except ValueError as error:
+        msg = f"{InvalidStatementError.error_message}: {where}: {error}"
+        raise InvalidStatementError(msg) from error
+
+
+class _TableRowParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows: list[list[str]] = []
+        self._row: list[str] | None = None
+        self._cell: list[str] | None = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "tr":
+            self._row = []
+        elif tag in ("td", "th") and self._row is not None:
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        if tag in ("td", "th") and self._row is not None and self._cell is not None:
+            self._row.append(" ".join("".join(self._cell).split()))
+            self._cell = None
+        elif tag == "tr" and self._row is not None:
+            self.rows.append(self._row)
+            self._row = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+def read_html_rows(file: IO[str]) -> Iterator[list[str]]:
+    """
+    Yield the cells of every table row of an HTML document, reading it in fixed-size chunks.
+    """
+    parser = _TableRowParser()
+
+    while chunk := file.read(READ_SIZE):
+        parser.feed(chunk)
+        yield from parser.rows
+        parser.rows.clear()
+
+    parser.close()
+    yield from parser.rows
+
+
+def read_html_sections(file: IO[str]) -> Iterator[tuple[str, list[str]]]:
+    """
+    Yield table rows together with the title of the report section they belong to.
+
+    MetaTrader reports are a single table split into sections by rows holding only a title.
+    """
+    section = ""
+
+    for cells in read_html_rows(file):
+        values = [cell for cell in cells if cell]
+
+        if len(values) == 1:
+            section = values[0].rstrip(":").strip().lower()
+        elif values:
+            yield section, cells
+
+
+def _csv_row(record: dict[str, str]) -> StatementRow:
+    return StatementRow(
+        ticket=int(record["ticket"]),
+        symbol=_required(record["symbol"], "symbol").strip(),
+        volume=_required(_decimal(record["volume"]), "volume"),
+        opened_at=_required(_datetime(record["opened_at"]), "opened_at"),
+        open_price=_required(_decimal(record["open_price"]), "open_price"),
+        sl_price=_price(record.get("sl_price")),
+        tp_price=_price(record.get("tp_price")),
+        closed_at=_datetime(record.get("closed_at")),
+        close_price=_decimal(record.get("close_price")),
+        commissions=_money(record.get("commissions")),
+        swaps=_money(record.get("swaps")),
+        profit=_money(record.get("profit")),
+    )
+
+
+def read_csv(file: IO[str]) -> Iterator[StatementRow]:
+    """
+    Read a CSV statement with a header row named after the Position fields.
+    """
+    reader = csv.DictReader(file)
+
+    for record in reader:
+        yield _parse_row(f"line {reader.line_num}", _csv_row, record)
+
+
+def read_mt4(file: IO[str]) -> Iterator[StatementRow]:
+    """
+    Read the closed transactions and open trades of a MetaTrader 4 detailed statement.
+    """
+    for section, cells in read_html_sections(file):
+        if section not in ("closed transactions", "open trades") or len(cells) < 14:  # noqa: PLR2004
+            continue
+
+        if not cells[0].isdigit() or cells[2] not in SIDES:
+            continue
+
+        yield _parse_row(f"ticket {cells[0]}", _mt4_row, cells, section == "closed transactions")
+
+
+def _mt4_row(cells: list[str], closed: bool) -> StatementRow:  # noqa: FBT001
+    return StatementRow(
+        ticket=int(cells[0]),
+        symbol=cells[4],
+        volume=_required(_decimal(cells[3]), "size"),
+        opened_at=_required(_datetime(cells[1]), "open time"),
+        open_price=_required(_decimal(cells[5]), "open price"),
+        sl_price=_price(cells[6]),
+        tp_price=_price(cells[7]),
+        closed_at=_required(_datetime(cells[8]), "close time") if closed else None,
+        close_price=_required(_decimal(cells[9]), "close price") if closed else None,
+        # Commissions and taxes are reported as negative amounts.
+        commissions=-(_money(cells[10]) + _money(cells[11])),
+        swaps=_money(cells[12]),
+        profit=_money(cells[13]),
+    )
+
+
+def read_mt5(file: IO[str]) -> Iterator[StatementRow]:
+    """
+    Read the closed and open positions of a MetaTrader 5 trade report.
+    """
+    for section, cells in read_html_sections(file):
+        if len(cells) < 11 or not cells[1].isdigit() or cells[3] not in SIDES:  # noqa: PLR2004
+            continue
+
+        if section == "positions" and len(cells) >= 13:  # noqa: PLR2004
+            yield _parse_row(f"position {cells[1]}", _mt5_closed_row, cells)
+        elif section == "open positions":
+            yield _parse_row(f"position {cells[1]}", _mt5_open_row, cells)
+
+
+def _mt5_closed_row(cells: list[str]) -> StatementRow:
+    return StatementRow(
+        ticket=int(cells[1]),
+        symbol=cells[2],
+        volume=_required(_decimal(cells[4]), "volume"),
+        opened_at=_required(_datetime(cells[0]), "open time"),
+        open_price=_required(_decimal(cells[5]), "open price"),
+        sl_price=_price(cells[6]),
+        tp_price=_price(cells[7]),
+        closed_at=_required(_datetime(cells[8]), "close time"),
+        close_price=_required(_decimal(cells[9]), "close price"),
+        commissions=-_money(cells[10]),
+        swaps=_money(cells[11]),
+        profit=_money(cells[12]),
+    )
+
+
+def _mt5_open_row(cells: list[str]) -> StatementRow:
+    return StatementRow(
+        ticket=int(cells[1]),
+        symbol=cells[2],
+        volume=_required(_decimal(cells[4]), "volume"),
+        opened_at=_required(_datetime(cells[0]), "open time"),
+        open_price=_required(_decimal(cells[5]), "open price"),
+        sl_price=_price(cells[6]),
+        tp_price=_price(cells[7]),
+        swaps=_money(cells[9]),
+        profit=_money(cells[10]),
+    )
+
+
+READERS: dict[str, Callable[[IO[str]], Iterator[StatementRow]]] = {
+    StatementFormat.CSV: read_csv,
+    StatementFormat.MT4: read_mt4,
+    StatementFormat.MT5: read_mt5,
+}
+
+
+def open_statement(file: IO[bytes]) -> IO[str]:
+    """
+    Wrap a binary statement file for reading as text.
+
+    MetaTrader 5 saves its reports as UTF-16, everything else is expected to be UTF-8.
+    """
+    head = file.read(2)
+    file.seek(0)
+    encoding = "utf-16" if head in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE) else "utf-8-sig"
+
+    return TextIOWrapper(file, encoding=encoding, newline="")
+
+
+class SymbolLookup:
+    """
+    Resolve symbol codes of a market to symbol ids through the shared symbol resolver.
+    """
+
+    def __init__(self, market: Market):
+        self.market = market
+
+    def resolve(self, codes: Iterable[str]) -> dict[str, int]:
+        codes = set(codes)
+        ids = symbol_resolver.by_market(self.market, codes)
+
+        if unknown := codes - ids.keys():
+            msg = f"{UnknownSymbolError.error_message}: {', '.join(sorted(unknown))}"
+            raise UnknownSymbolError(msg)
+
+        return ids
+
+
+def book_closed_positions(account: Account, positions: list[Position]) -> list[History]:
+    """
+    Add the closed positions that are not in the account's history yet.
+
+    Statements are not ordered by close time, so earlier trades found in later chunks are booked as backdated rows.
+    """
+    closed = [position for position in positions if position.closed_at]
+    booked = set(History.objects.filter(account=account, position__in=closed).values_list("position_id", flat=True))
+
+    return History.add_closed_positions(
+        account,
+        [position for position in closed if position.pk not in booked],
+        force=True,
+    )
+
+
+def import_statement(
+    account: Account,
+    market: Market,
+    file: IO[str],
+    statement_format: str,
+    *,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> ImportResult:
+    """
+    Stream a broker statement into the account's positions and history.
+
+    The file is parsed row by row and written in chunks of ``chunk_size`` positions, so memory use does not depend
+    on the size of the statement. Positions are upserted by ticket, which makes re-importing a statement safe.
+    A row missing a required cell stops the import with an ``InvalidStatementError`` naming it, the chunks before
+    it stay imported.
+    """
+    rows = READERS[statement_format](file)
+    symbols = SymbolLookup(market)
+    result = ImportResult()
+
+    while chunk := list(islice(rows, chunk_size)):
+        symbol_ids = symbols.resolve(row.symbol for row in chunk)
+        positions = Position.upsert(row.to_position(account, symbol_ids[row.symbol]) for row in chunk)
+
+        result.positions += len(positions)
+        result.history += len(book_closed_positions(account, positions))
+
+    return result
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import re
+from contextlib import suppress
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import close_old_connections
+from django.http import parse_cookie
+from django.http.request import split_domain_port, validate_host
+from django.utils.module_loading import import_string
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from trading_journal.journal.models import BALANCE_CHANNEL_PREFIX, Account, get_balance_channel
+
+logger = logging.getLogger(__name__)
+
+BALANCE_PATH = re.compile(r"/ws/journal/accounts/(?P<account_id>\d+)/")
+# Messages carry the current balance, so a client that cannot keep up only needs the latest ones.
+SOCKET_QUEUE_SIZE = 16
+READ_TIMEOUT = 1.0
+RECONNECT_DELAY = 1.0
+CLOSE_NOT_FOUND = 4404
+CLOSE_FORBIDDEN = 4403
+CLOSE_UNAVAILABLE = 1011
+
+
+def get_async_redis_connection() -> Redis:
+    """
+    Return an asyncio client of the Redis server behind the default cache, where balance changes are published.
+    """
+    cache_settings = settings.CACHES["default"]
+
+    if not cache_settings["BACKEND"].startswith("django_redis."):
+        msg = "Live balance updates need the Redis cache backend."
+        raise NotImplementedError(msg)
+
+    return Redis.from_url(cache_settings["LOCATION"])
+
+
+class BalanceHub:
+    """
+    Fan balance changes out from a single Redis subscription to every socket of the process.
+
+    A channel is subscribed while at least one socket listens to its account, so idle sockets cost a queue each
+    and no Redis or database connection of their own.
+    """
+
+    def __init__(self, connect=get_async_redis_connection):
+        self._connect = connect
+        self._queues: dict[int, set[asyncio.Queue]] = {}
+        self._pubsub = None
+        self._reader: asyncio.Task | None = None
+        # The pubsub client connects on its first command, concurrent first commands would each open a connection.
+        self._commands = asyncio.Lock()
+
+    @property
+    def subscribers(self) -> int:
+        return sum(len(queues) for queues in self._queues.values())
+
+    async def subscribe(self, account_id: int, queue: asyncio.Queue):
+        queues = self._queues.setdefault(account_id, set())
+        queues.add(queue)
+
+        if len(queues) == 1:
+            try:
+                async with self._commands:
+                    if self._pubsub is None:
+                        self._pubsub = self._connect().pubsub(ignore_subscribe_messages=True)
+
+                    await self._pubsub.subscribe(get_balance_channel(account_id))
+            except Exception:
+                queues.discard(queue)
+
+                if not queues:
+                    del self._queues[account_id]
+                raise
+
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read())
+
+    async def unsubscribe(self, account_id: int, queue: asyncio.Queue):
+        queues = self._queues.get(account_id, set())
+        queues.discard(queue)
+
+        if not queues and self._queues.pop(account_id, None) is not None:
+            async with self._commands:
+                with suppress(RedisError):
+                    await self._pubsub.unsubscribe(get_balance_channel(account_id))
+
+    async def _read(self):
+        while self._queues:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=READ_TIMEOUT)
+            except RedisError:
+                # The client reconnects and subscribes again on the next read.
+                logger.exception("Reading balance changes failed")
+                await asyncio.sleep(RECONNECT_DELAY)
+                continue
+
+            if message is not None:
+                self._dispatch(message["channel"], message["data"])
+
+    def _dispatch(self, channel: bytes, data: bytes):
+        account_id = int(channel.decode().removeprefix(f"{BALANCE_CHANNEL_PREFIX}:"))
+        text = data.decode()
+
+        for queue in self._queues.get(account_id, ()):
+            if queue.full():
+                queue.get_nowait()
+
+            queue.put_nowait(text)
+
+
+balance_hub = BalanceHub()
+
+
+def _is_allowed_origin(headers: dict[bytes, bytes]) -> bool:
+    # Browsers always send the origin, a foreign one means another site is opening the socket with our cookies.
+    if b"origin" not in headers:
+        return True
+
+    host, _ = split_domain_port(headers[b"origin"].decode("latin-1").partition("://")[2])
+    return validate_host(host, settings.ALLOWED_HOSTS)
+
+
+def _is_owner(headers: dict[bytes, bytes], account_id: int) -> bool:
+    # Like around every request, connections that are broken or past CONN_MAX_AGE are closed and others are reused.
+    close_old_connections()
+
+    try:
+        cookies = parse_cookie(headers.get(b"cookie", b"").decode("latin-1"))
+        session_store = import_string(f"{settings.SESSION_ENGINE}.SessionStore")
+        user = get_user(SimpleNamespace(session=session_store(cookies.get(settings.SESSION_COOKIE_NAME))))
+
+        return user.is_authenticated and Account.objects.filter(pk=account_id, owner=user).exists()
+    finally:
+        close_old_connections()
+
+
+async def _forward(queue: asyncio.Queue, send):
+    while True:
+        await send({"type": "websocket.send", "text": await queue.get()})
+
+
+async def balance_application(scope, receive, send, hub: BalanceHub = balance_hub):
+    """
+    Push the balance changes of one of the user's accounts to a WebSocket at ``/ws/journal/accounts/<id>/``.
+
+    The user and the account are checked once when the socket connects, afterwards the socket only waits on its
+    queue, so the number of open sockets does not affect the database.
+    """
+    if (await receive())["type"] != "websocket.connect":
+        return
+
+    headers = dict(scope["headers"])
+
+    if not (match := BALANCE_PATH.fullmatch(scope["path"])):
+        await send({"type": "websocket.close", "code": CLOSE_NOT_FOUND})
+        return
+
+    account_id = int(match["account_id"])
+
+    if not _is_allowed_origin(headers) or not await sync_to_async(_is_owner)(headers, account_id):
+        await send({"type": "websocket.close", "code": CLOSE_FORBIDDEN})
+        return
+
+    queue = asyncio.Queue(maxsize=SOCKET_QUEUE_SIZE)
+
+    try:
+        await hub.subscribe(account_id, queue)
+    except (NotImplementedError, RedisError):
+        logger.exception("Subscribing to balance changes failed")
+        await send({"type": "websocket.close", "code": CLOSE_UNAVAILABLE})
+        return
+
+    forwarder = None
+
+    try:
+        await send({"type": "websocket.accept"})
+        forwarder = asyncio.create_task(_forward(queue, send))
+
+        # Clients only listen, anything they send is ignored.
+        while (await receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        if forwarder is not None:
+            forwarder.cancel()
+
+        await hub.unsubscribe(account_id, queue)
@@ -0,0 +1,164 @@
+from collections.abc import Iterable, Iterator
+from functools import partial
+from itertools import islice
+from typing import TYPE_CHECKING
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections, models, transaction
+
+from trading_journal.journal.models import Account, History, Position, invalidate_account_summaries
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+LOAD_BATCH_SIZE = 10_000
+
+
+def _columns(model: type[models.Model]) -> list[models.Field]:
+    return [field for field in model._meta.concrete_fields if not field.primary_key]  # noqa: SLF001
+
+
+def _identity(value):
+    return value
+
+
+def _copy_into_staging(model: type[models.Model], objs: Iterable[models.Model]) -> tuple[str, list[str]]:
+    """
+    Stream the objects through ``COPY FROM STDIN`` into a temporary table shaped like the model's table.
+
+    The table also numbers the objects in ``staging_order``, in the order they came. The connection is busy
+    until the stream is exhausted, so producing the objects must not query the database.
+    """
+    fields = _columns(model)
+    columns = [connection.ops.quote_name(field.column) for field in fields]
+    table = connection.ops.quote_name(model._meta.db_table)  # noqa: SLF001
+    staging = connection.ops.quote_name(f"{model._meta.db_table}_staging")  # noqa: SLF001
+    # psycopg adapts numbers and datetimes itself, only JSON needs Django's preparation. Resolving the
+    # ``connection`` proxy and quantizing decimals for every value would cost more than the COPY itself.
+    db = connections[DEFAULT_DB_ALIAS]
+    converters = [
+        (
+            field.attname,
+            partial(field.get_db_prep_save, connection=db) if isinstance(field, models.JSONField) else _identity,
+        )
+        for field in fields
+    ]
+
+    with connection.cursor() as cursor:
+        # ON COMMIT DROP does not fire when the load runs inside an outer transaction, the loaders drop the table.
+        # Both statements go in one round trip.
+        cursor.execute(
+            f"""
+            CREATE TEMPORARY TABLE {staging} ON COMMIT DROP AS SELECT {", ".join(columns)} FROM {table} WITH NO DATA;
+            ALTER TABLE {staging} ADD COLUMN staging_order bigint GENERATED ALWAYS AS IDENTITY
+            """,  # noqa: S608
+        )
+
+        # The COPY object is psycopg's own, its errors are translated to Django's like those of execute().
+        with connection.wrap_database_errors, cursor.copy(f"COPY {staging} ({', '.join(columns)}) FROM STDIN") as copy:
+            for obj in objs:
+                copy.write_row([prepare(getattr(obj, attname)) for attname, prepare in converters])
+
+    return staging, columns
+
+
+def load_positions(positions: Iterable[Position], *, batch_size: int = LOAD_BATCH_SIZE) -> int:
+    """
+    Load a stream of positions, inserting new tickets and updating the changed ones.
+
+    On PostgreSQL the positions go through ``COPY`` into a staging table and are merged with a single
+    ``INSERT ... ON CONFLICT`` statement, other backends fall back to ``Position.upsert_batch``.
+    When a ticket comes more than once, its last occurrence wins, but a closed position is never reopened.
+    Returns the number of inserted or updated rows.
+    """
+    if connection.vendor != "postgresql":
+        written = 0
+        positions = iter(positions)
+
+        with transaction.atomic():
+            while batch := list(islice(positions, batch_size)):
+                # Keyed by ticket, so that only the last occurrence within the batch is written.
+                batch = list({(position.account_id, position.ticket): position for position in batch}.values())
+                written += Position.upsert_batch(batch)
+
+        return written
+
+    table = connection.ops.quote_name(Position._meta.db_table)  # noqa: SLF001
+
+    with transaction.atomic():
+        staging, columns = _copy_into_staging(Position, positions)
+        updated = [column for column in columns if column not in ('"account_id"', '"ticket"')]
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} ({", ".join(columns)})
+                -- A row can be updated once per statement, the last occurrence of a ticket wins.
+                SELECT DISTINCT ON (account_id, ticket) {", ".join(columns)} FROM {staging}
+                ORDER BY account_id, ticket, staging_order DESC
+                ON CONFLICT (account_id, ticket) DO UPDATE
+                SET {", ".join(f"{column} = EXCLUDED.{column}" for column in updated)}
+                WHERE ({", ".join(f"{table}.{column}" for column in updated)})
+                    IS DISTINCT FROM ({", ".join(f"EXCLUDED.{column}" for column in updated)})
+                    AND ({table}.closed_at IS NULL OR EXCLUDED.closed_at IS NOT NULL)
+                """,  # noqa: S608
+            )
+            written = cursor.rowcount
+            cursor.execute(f"SELECT DISTINCT account_id FROM {staging}")  # noqa: S608
+            invalidate_account_summaries(account_id for (account_id,) in cursor.fetchall())
+            cursor.execute(f"DROP TABLE {staging}")
+
+    return written
+
+
+def load_history(rows: Iterable[History], *, batch_size: int = LOAD_BATCH_SIZE) -> int:
+    """
+    Load a stream of history rows and repair the balances of the affected accounts.
+
+    Rows of positions that are already booked are skipped. Balances of the loaded rows are ignored,
+    every affected account is recalculated from its earliest loaded row instead.
+    On PostgreSQL the rows go through ``COPY`` into a staging table and the number of inserted rows is returned,
+    other backends fall back to ``bulk_create`` which does not report skipped rows.
+    """
+    since: dict[int, datetime] = {}
+
+    def track(rows: Iterable[History]) -> Iterator[History]:
+        for row in rows:
+            if row.account_id not in since or row.created_at < since[row.account_id]:
+                since[row.account_id] = row.created_at
+
+            yield row
+
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            table = connection.ops.quote_name(History._meta.db_table)  # noqa: SLF001
+            staging, columns = _copy_into_staging(History, track(rows))
+
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT DISTINCT account_id FROM {staging}")  # noqa: S608
+                # Lock the accounts before touching their ledgers, like every other history write.
+                accounts = Account.objects.select_for_update().in_bulk([account_id for (account_id,) in cursor])
+                cursor.execute(
+                    f"""
+                    INSERT INTO {table} ({", ".join(columns)})
+                    SELECT {", ".join(columns)} FROM {staging}
+                    ON CONFLICT (account_id, position_id) WHERE position_id IS NOT NULL DO NOTHING
+                    """,  # noqa: S608
+                )
+                written = cursor.rowcount
+                # Statistics from before the load make the planner take the loaded accounts for small ones and
+                # plan the balance recalculation below with nested loops.
+                cursor.execute(f"ANALYZE {table}")
+                cursor.execute(f"DROP TABLE {staging}")
+        else:
+            written = 0
+            rows = track(rows)
+
+            while batch := list(islice(rows, batch_size)):
+                written += len(History.objects.bulk_create(batch, ignore_conflicts=True))
+
+            accounts = Account.objects.select_for_update().in_bulk(list(since))
+
+        for account_id, account in accounts.items():
+            History.recalculate_balance(account, since=since[account_id])
+
+    return written
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from trading_journal.journal.models import ApiToken
+from trading_journal.users.models import User
+
+
+class Command(BaseCommand):
+    help = "Issue an API token with which trading terminals send the events of the user's accounts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("email", help="Email of the owner of the accounts")
+        parser.add_argument("name", help="Name telling the token apart, like the terminal using it")
+
+    def handle(self, *args, **options):
+        try:
+            owner = User.objects.get(email=options["email"])
+        except User.DoesNotExist as error:
+            msg = f"No user with the email {options['email']}."
+            raise CommandError(msg) from error
+
+        _, key = ApiToken.issue(owner, options["name"])
+
+        self.stdout.write(key)
+        self.stdout.write(self.style.SUCCESS("Issued the API token, it will not be shown again."))
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive, make_aware
+
+from trading_journal.journal.exporters import EXPORT_CHUNK_SIZE, export_rows, get_export_rows, write_columnar
+from trading_journal.journal.models import Account
+from trading_journal.journal.types import ColumnarFormat, ExportFormat, ExportKind
+
+
+def _datetime(value: str):
+    if (parsed := parse_datetime(value)) is None:
+        msg = f"Invalid date and time: {value}"
+        raise CommandError(msg)
+
+    return make_aware(parsed) if is_naive(parsed) else parsed
+
+
+class Command(BaseCommand):
+    help = "Stream the positions or history of accounts as CSV or JSON lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=ExportKind.values)
+        parser.add_argument("--account", type=int, action="append", dest="accounts", help="Account id, repeatable")
+        parser.add_argument("--owner", type=int, help="Export all accounts of the user with this id")
+        parser.add_argument("--format", choices=ExportFormat.values + ColumnarFormat.values, default=ExportFormat.CSV)
+        parser.add_argument("--since", help="Start of the date range, inclusive")
+        parser.add_argument("--until", help="End of the date range, exclusive")
+        parser.add_argument(
+            "--output",
+            type=Path,
+            help="Output file, standard output by default, required by the columnar formats",
+        )
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if not options["accounts"] and options["owner"] is None:
+            msg = "Pass --account or --owner."
+            raise CommandError(msg)
+
+        if options["format"] in ColumnarFormat.values and options["output"] is None:
+            msg = f"The {options['format']} format is written to a file, pass --output."
+            raise CommandError(msg)
+
+        accounts = Account.objects.all()
+
+        if options["accounts"]:
+            accounts = accounts.filter(pk__in=options["accounts"])
+
+        if options["owner"] is not None:
+            accounts = accounts.filter(owner_id=options["owner"])
+
+        header, rows = get_export_rows(
+            options["kind"],
+            accounts,
+            _datetime(options["since"]) if options["since"] else None,
+            _datetime(options["until"]) if options["until"] else None,
+        )
+
+        if options["format"] in ColumnarFormat.values:
+            written = write_columnar(
+                options["format"],
+                options["kind"],
+                rows,
+                options["output"],
+                batch_size=options["chunk_size"],
+            )
+            self.stderr.write(self.style.SUCCESS(f"Exported {written} {options['kind']} rows to {options['output']}."))
+            return
+
+        chunks = export_rows(options["format"], header, rows, chunk_size=options["chunk_size"])
+
+        if options["output"] is None:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+
+        with options["output"].open("w", newline="") as file:
+            file.writelines(chunks)
+
+        self.stderr.write(self.style.SUCCESS(f"Exported {options['kind']} to {options['output']}."))
@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from trading_journal.journal.exceptions import InvalidStatementError, UnknownSymbolError
+from trading_journal.journal.importers import IMPORT_CHUNK_SIZE, import_statement, open_statement
+from trading_journal.journal.models import Account
+from trading_journal.journal.types import StatementFormat
+from trading_journal.markets.models import Market
+
+
+class Command(BaseCommand):
+    help = "Stream a broker statement into an account's positions and history."
+
+    def add_arguments(self, parser):
+        parser.add_argument("account", type=int, help="Account id")
+        parser.add_argument("path", type=Path, help="Statement file")
+        parser.add_argument("--market", type=int, required=True, help="Id of the market the symbols belong to")
+        parser.add_argument("--format", choices=StatementFormat.values, default=StatementFormat.CSV)
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        account = Account.objects.get(pk=options["account"])
+        market = Market.objects.get(pk=options["market"])
+
+        with options["path"].open("rb") as file:
+            try:
+                result = import_statement(
+                    account,
+                    market,
+                    open_statement(file),
+                    options["format"],
+                    chunk_size=options["chunk_size"],
+                )
+            except (InvalidStatementError, UnknownSymbolError) as error:
+                raise CommandError(str(error)) from error
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {result.positions} positions, booked {result.history} history rows."),
+        )
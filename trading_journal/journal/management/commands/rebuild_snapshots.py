@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from trading_journal.journal.models import Account, AccountDailySnapshot
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily snapshots of accounts from their history."
+
+    def add_arguments(self, parser):
+        parser.add_argument("accounts", type=int, nargs="*", help="Account ids, all accounts when omitted")
+
+    def handle(self, *args, **options):
+        accounts = Account.objects.order_by("pk")
+
+        if options["accounts"]:
+            accounts = accounts.filter(pk__in=options["accounts"])
+
+        for account in accounts.iterator():
+            AccountDailySnapshot.rebuild(account)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the daily snapshots of {accounts.count()} accounts."))
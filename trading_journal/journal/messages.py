@@ -1,5 +1,10 @@
 from django.utils.translation import gettext_lazy as _
 
+INVALID_API_TOKEN = _("Invalid API token")
+INVALID_EVENT = _("Invalid event")
+INVALID_STATEMENT = _("Invalid statement")
+POSITION_ACCOUNT_MISMATCH = _("Position belongs to another account")
 POSITION_ALREADY_EXISTS = _("Position already exists")
 POSITION_NOT_CLOSED = _("Position is not closed")
 TEMPORAL_DISTURBANCE = _("Temporal disturbance")
+UNKNOWN_SYMBOL = _("Unknown symbol")
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.9 on 2026-10-17 06:55
+
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # The ledger tables can be large, build the indexes without blocking writes.
+    atomic = False
+
+    dependencies = [
+        ('journal', '0002_account_currency_alter_account_balance_and_more'),
+        ('markets', '0002_alter_symboltype_unique_together_and_more'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='history',
+            index=models.Index(fields=['account', 'created_at', 'id'], name='history_account_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='position',
+            index=models.Index(fields=['account', 'opened_at'], name='position_account_opened_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='position',
+            index=models.Index(fields=['account', 'closed_at'], name='position_account_closed_idx'),
+        ),
+        migrations.AlterField(
+            model_name='history',
+            name='account',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='history', to='journal.account', verbose_name='Account'),
+        ),
+        migrations.AlterField(
+            model_name='position',
+            name='account',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='positions', to='journal.account', verbose_name='Account'),
+        ),
+    ]
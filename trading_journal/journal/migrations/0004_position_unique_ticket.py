@@ -0,0 +1,83 @@
+# Generated by Django 5.0.9 on 2026-10-17 06:56
+
+from django.db import migrations, models
+
+# Re-imports stored some tickets more than once. The latest row of every ticket is kept.
+DUPLICATES_SQL = """
+CREATE TEMPORARY TABLE duplicate_position ON COMMIT DROP AS
+SELECT id, kept_id
+FROM (
+    SELECT id, max(id) OVER (PARTITION BY account_id, ticket) AS kept_id
+    FROM journal_position
+) AS ranked
+WHERE id <> kept_id
+"""
+
+# The history keeps one row per position, so a single booking of a ticket moves over to the kept row.
+REPOINT_SQL = """
+UPDATE journal_history
+SET position_id = booking.kept_id
+FROM (
+    SELECT DISTINCT ON (duplicate_position.kept_id) duplicate_position.kept_id, journal_history.id
+    FROM journal_history
+    JOIN duplicate_position ON duplicate_position.id = journal_history.position_id
+    WHERE NOT EXISTS (
+        SELECT 1 FROM journal_history AS kept WHERE kept.position_id = duplicate_position.kept_id
+    )
+    ORDER BY duplicate_position.kept_id, journal_history.id
+) AS booking
+WHERE journal_history.id = booking.id
+"""
+
+# A ticket booked more than once keeps its other rows, and the balances built on them, without a position.
+DETACH_SQL = """
+UPDATE journal_history
+SET position_id = NULL
+WHERE position_id IN (SELECT id FROM duplicate_position)
+"""
+
+DELETE_SQL = "DELETE FROM journal_position WHERE id IN (SELECT id FROM duplicate_position)"
+
+
+def remove_duplicate_positions(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for sql in (DUPLICATES_SQL, REPOINT_SQL, DETACH_SQL, DELETE_SQL):
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    # The positions table can be large, build the unique index without blocking writes.
+    atomic = False
+
+    dependencies = [
+        ('journal', '0003_history_position_account_indexes'),
+        ('markets', '0002_alter_symboltype_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_positions, migrations.RunPython.noop, atomic=True),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                # A failed attempt leaves an invalid index behind.
+                migrations.RunSQL(
+                    "DROP INDEX CONCURRENTLY IF EXISTS unique_ticket",
+                    migrations.RunSQL.noop,
+                ),
+                migrations.RunSQL(
+                    "CREATE UNIQUE INDEX CONCURRENTLY unique_ticket ON journal_position (account_id, ticket)",
+                    "DROP INDEX CONCURRENTLY IF EXISTS unique_ticket",
+                ),
+                migrations.RunSQL(
+                    "ALTER TABLE journal_position ADD CONSTRAINT unique_ticket UNIQUE USING INDEX unique_ticket",
+                    "ALTER TABLE journal_position DROP CONSTRAINT unique_ticket",
+                ),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='position',
+                    constraint=models.UniqueConstraint(fields=('account', 'ticket'), name='unique_ticket'),
+                ),
+            ],
+        ),
+    ]
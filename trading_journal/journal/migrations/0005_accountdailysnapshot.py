@@ -0,0 +1,36 @@
+# Generated by Django 5.0.9 on 2026-10-17 07:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0004_position_unique_ticket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountDailySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Day')),
+                ('closing_balance', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Closing balance')),
+                ('profit', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Profit')),
+                ('deposits', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Deposits')),
+                ('withdrawals', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Withdrawals')),
+                ('trades', models.PositiveIntegerField(default=0, verbose_name='Trades')),
+                ('account', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_snapshots', to='journal.account', verbose_name='Account')),
+            ],
+            options={
+                'verbose_name': 'Daily snapshot',
+                'verbose_name_plural': 'Daily snapshots',
+                'ordering': ['day'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='accountdailysnapshot',
+            constraint=models.UniqueConstraint(fields=('account', 'day'), name='unique_snapshot_day'),
+        ),
+    ]
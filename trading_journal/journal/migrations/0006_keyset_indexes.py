@@ -0,0 +1,26 @@
+# Generated by Django 5.0.9 on 2026-10-17 07:42
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # The ledger tables can be large, build the indexes without blocking writes.
+    atomic = False
+
+    dependencies = [
+        ('journal', '0005_accountdailysnapshot'),
+        ('markets', '0002_alter_symboltype_unique_together_and_more'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='history',
+            index=models.Index(fields=['created_at', 'id'], name='history_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='position',
+            index=models.Index(fields=['opened_at', 'id'], name='position_opened_idx'),
+        ),
+    ]
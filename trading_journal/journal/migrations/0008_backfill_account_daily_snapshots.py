@@ -0,0 +1,76 @@
+# Generated by Django 5.0.9 on 2026-10-17 14:05
+
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+BATCH_SIZE = 5000
+
+# The values of OperationType, which may change after this migration.
+DEPOSIT = "DE"
+POSITION_CLOSE = "PC"
+WITHDRAWAL = "WD"
+
+
+def backfill_snapshots(apps, schema_editor):
+    """
+    Rebuild the snapshots of every account from its history, like ``AccountDailySnapshot.rebuild``.
+
+    0005 created the table empty and the ledger API only records the rows written since.
+    The history of all accounts is aggregated per day in a single query.
+    """
+    History = apps.get_model("journal", "History")
+    AccountDailySnapshot = apps.get_model("journal", "AccountDailySnapshot")
+    days = (
+        History.objects.annotate(day=TruncDate("created_at"))
+        .order_by("account_id", "day")
+        .values("account_id", "day")
+        .annotate(
+            total=Sum("profit"),
+            day_deposits=Sum("profit", filter=Q(operation=DEPOSIT), default=0),
+            day_withdrawals=Sum("profit", filter=Q(operation=WITHDRAWAL), default=0),
+            day_trades=Count("id", filter=Q(operation=POSITION_CLOSE)),
+        )
+    )
+    account_id = None
+    balance = Decimal(0)
+    rebuilt = []
+
+    AccountDailySnapshot.objects.all().delete()
+
+    for day in days.iterator(chunk_size=BATCH_SIZE):
+        if day["account_id"] != account_id:
+            account_id = day["account_id"]
+            balance = Decimal(0)
+
+        balance += day["total"]
+        rebuilt.append(
+            AccountDailySnapshot(
+                account_id=account_id,
+                day=day["day"],
+                closing_balance=balance,
+                profit=day["total"] - day["day_deposits"] - day["day_withdrawals"],
+                deposits=day["day_deposits"],
+                withdrawals=day["day_withdrawals"],
+                trades=day["day_trades"],
+            ),
+        )
+
+        if len(rebuilt) == BATCH_SIZE:
+            AccountDailySnapshot.objects.bulk_create(rebuilt)
+            rebuilt = []
+
+    AccountDailySnapshot.objects.bulk_create(rebuilt)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0007_apitoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
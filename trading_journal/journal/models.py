@@ -1,21 +1,128 @@
-from datetime import datetime
-from decimal import Decimal
-
-from django.db import models
-from django.db.models import Q
+import hashlib
+import json
+import secrets
+import time as clock
+from collections import defaultdict
+from collections.abc import Iterable
+from contextlib import suppress
+from datetime import date, datetime, time
+from decimal import ROUND_HALF_UP, Decimal
+from functools import partial
+
+from django.core.cache import cache
+from django.db import connection, models, transaction
+from django.db.models import Count, Max, OuterRef, Q, Subquery, Sum
 from django.db.models.constraints import UniqueConstraint
-from django.utils.timezone import now
+from django.db.models.functions import TruncDate
+from django.utils.timezone import localdate, make_aware, now
 from django.utils.translation import gettext_lazy as _
+from django_redis import get_redis_connection
 
 from trading_journal.core.models import OwnerModel
 from trading_journal.journal.exceptions import (
+    PositionAccountMismatchError,
     PositionAlreadyExistsError,
     PositionNotClosedError,
     TemporalDisturbanceError,
 )
-from trading_journal.journal.types import OperationType
+from trading_journal.journal.types import AccountSummary, OperationType
 from trading_journal.markets.models import Broker, Symbol
 
+RECALCULATE_BATCH_SIZE = 2000
+UPSERT_BATCH_SIZE = 1000
+UPSERT_KEY_FIELDS = ["account_id", "ticket"]
+SNAPSHOT_FIELDS = ["closing_balance", "profit", "deposits", "withdrawals", "trades"]
+SUMMARY_CACHE_PREFIX = "journal:account-summary"
+SUMMARY_CACHE_TIMEOUT = 5 * 60
+BALANCE_CHANNEL_PREFIX = "journal:balance"
+
+
+def _bump_summary_versions(account_ids: Iterable[int]):
+    for account_id in account_ids:
+        # Without a version yet, the next read starts a fresh one.
+        with suppress(ValueError):
+            cache.incr(f"{SUMMARY_CACHE_PREFIX}:{account_id}:version")
+
+
+def invalidate_account_summaries(account_ids: Iterable[int]):
+    """
+    Make the cached summaries of the accounts unreachable once the current transaction commits.
+
+    Summaries are stored under a per-account version that is bumped here, so a summary computed
+    from data older than the write is never read again and simply expires.
+    """
+    transaction.on_commit(partial(_bump_summary_versions, set(account_ids)))
+
+
+def get_balance_channel(account_id: int) -> str:
+    return f"{BALANCE_CHANNEL_PREFIX}:{account_id}"
+
+
+def _publish(messages: dict[int, str]):
+    try:
+        client = get_redis_connection()
+    except NotImplementedError:
+        # Not a Redis cache, so there cannot be any subscribers either.
+        return
+
+    pipeline = client.pipeline(transaction=False)
+
+    for account_id, message in messages.items():
+        pipeline.publish(get_balance_channel(account_id), message)
+
+    pipeline.execute()
+
+
+def publish_balance_changes(accounts: Iterable["Account"], rows: Iterable["History"] = ()):
+    """
+    Publish the new balances of the accounts and the profit of their new history rows once the transaction commits.
+
+    Every account gets one compact message on its own channel, which live clients apply instead of polling.
+    A failed publish is logged and does not affect the write.
+    """
+    profits = defaultdict(Decimal)
+    counts = defaultdict(int)
+
+    for row in rows:
+        profits[row.account_id] += Decimal(row.profit)
+        counts[row.account_id] += 1
+
+    messages = {
+        account.pk: json.dumps(
+            {
+                "account": account.pk,
+                "balance": str(account.balance),
+                "profit": str(profits[account.pk]),
+                "rows": counts[account.pk],
+            },
+            separators=(",", ":"),
+        )
+        for account in accounts
+    }
+    transaction.on_commit(partial(_publish, messages), robust=True)
+
+
+def _count_summary_cache(outcome: str):
+    key = f"{SUMMARY_CACHE_PREFIX}:{outcome}"
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def get_summary_cache_stats() -> dict[str, int]:
+    """
+    Return the number of account summaries served from the cache and computed since the counters were reset.
+    """
+    counters = cache.get_many([f"{SUMMARY_CACHE_PREFIX}:hits", f"{SUMMARY_CACHE_PREFIX}:misses"])
+
+    return {
+        "hits": counters.get(f"{SUMMARY_CACHE_PREFIX}:hits", 0),
+        "misses": counters.get(f"{SUMMARY_CACHE_PREFIX}:misses", 0),
+    }
+
 
 class Account(OwnerModel):
     name = models.CharField(_("Name"), max_length=300)
@@ -40,6 +147,53 @@ class Account(OwnerModel):
     def __str__(self):
         return self.name
 
+    def lock(self):
+        """
+        Lock the account row until the end of the current transaction.
+
+        Ledger writes take this lock first, so concurrent writes to one account are serialized
+        while writes to different accounts still run in parallel.
+        """
+        Account.objects.select_for_update().only("pk").get(pk=self.pk)
+
+    def get_summary(self) -> AccountSummary:
+        """
+        Return the dashboard summary of the account, computing it only when the cache has no current one.
+        """
+        # A version key lost to eviction restarts from the clock, above every version used before.
+        version = cache.get_or_set(f"{SUMMARY_CACHE_PREFIX}:{self.pk}:version", clock.time_ns, timeout=None)
+        key = f"{SUMMARY_CACHE_PREFIX}:{self.pk}:{version}"
+        summary = cache.get(key)
+
+        if summary is None:
+            _count_summary_cache("misses")
+            summary = self._compute_summary()
+            cache.set(key, summary, SUMMARY_CACHE_TIMEOUT)
+        else:
+            _count_summary_cache("hits")
+
+        return summary
+
+    def invalidate_summary(self):
+        invalidate_account_summaries([self.pk])
+
+    def _compute_summary(self) -> AccountSummary:
+        positions = Position.objects.filter(account=self).aggregate(
+            open_positions=Count("pk", filter=Q(closed_at__isnull=True)),
+            last_opened_at=Max("opened_at"),
+            last_closed_at=Max("closed_at"),
+        )
+        last_trades = [positions["last_opened_at"], positions["last_closed_at"]]
+
+        return AccountSummary(
+            balance=Account.objects.values_list("balance", flat=True).get(pk=self.pk),
+            open_positions=positions["open_positions"],
+            today_profit=(
+                self.daily_snapshots.filter(day=localdate()).values_list("profit", flat=True).first() or Decimal(0)
+            ),
+            last_trade_at=max(filter(None, last_trades), default=None),
+        )
+
 
 class Position(models.Model):
     account = models.ForeignKey(
@@ -47,6 +201,8 @@ class Position(models.Model):
         verbose_name=_("Account"),
         on_delete=models.CASCADE,
         related_name="positions",
+        # Covered by the composite indexes below, which all lead with the account.
+        db_index=False,
     )
     ticket = models.PositiveBigIntegerField(_("Ticket no."))
     volume = models.DecimalField(_("Volume"), max_digits=10, decimal_places=4)
@@ -113,17 +269,108 @@ class Position(models.Model):
         verbose_name = _("Position")
         verbose_name_plural = _("Positions")
         ordering = ["opened_at"]
+        indexes = [
+            models.Index(fields=["account", "opened_at"], name="position_account_opened_idx"),
+            models.Index(fields=["account", "closed_at"], name="position_account_closed_idx"),
+            # Keyset pages of the admin changelist.
+            models.Index(fields=["opened_at", "id"], name="position_opened_idx"),
+        ]
+        constraints = [
+            UniqueConstraint(fields=["account", "ticket"], name="unique_ticket"),
+        ]
 
     def __str__(self):
         return f"{self.ticket} @ {self.account.name}"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_account_summaries([self.account_id])
+
+    def delete(self, *args, **kwargs):
+        invalidate_account_summaries([self.account_id])
+        return super().delete(*args, **kwargs)
+
+    @classmethod
+    def upsert(cls, positions: Iterable["Position"], *, batch_size: int = UPSERT_BATCH_SIZE) -> list["Position"]:
+        """
+        Insert or update positions identified by their account and ticket.
+
+        Every batch costs one SELECT of the matching rows, positions identical to the stored ones are skipped
+        and the rest is written with a single ``INSERT ... ON CONFLICT DO UPDATE``.
+        Re-importing an unchanged statement therefore writes nothing.
+        A closed position is never reopened, an open position coming in for it takes the stored values instead.
+        All positions get their primary key set.
+        """
+        positions = list(positions)
+
+        with transaction.atomic():
+            for start in range(0, len(positions), batch_size):
+                cls.upsert_batch(positions[start : start + batch_size])
+
+        return positions
+
+    @classmethod
+    def upsert_batch(cls, batch: list["Position"]) -> int:
+        """
+        Upsert one batch of positions like ``upsert`` and return the number of written positions.
+        """
+        fields = [field.attname for field in cls._meta.concrete_fields if field.attname not in UPSERT_KEY_FIELDS]
+        fields.remove("id")
+        stored = {
+            (row[0], row[1]): row[2:]
+            for row in cls.objects.filter(
+                account_id__in={position.account_id for position in batch},
+                ticket__in={position.ticket for position in batch},
+            ).values_list(*UPSERT_KEY_FIELDS, "id", *fields)
+        }
+        changed = []
+
+        for position in batch:
+            key = (position.account_id, position.ticket)
+
+            if key in stored:
+                position.pk, *values = stored[key]
+
+                if values == [getattr(position, field) for field in fields]:
+                    continue
+
+                # An older statement, the position has been closed since.
+                if position.closed_at is None and values[fields.index("closed_at")] is not None:
+                    for field, value in zip(fields, values, strict=True):
+                        setattr(position, field, value)
+                    continue
+
+            changed.append(position)
+
+        if changed:
+            cls.objects.bulk_create(
+                changed,
+                update_conflicts=True,
+                unique_fields=UPSERT_KEY_FIELDS,
+                update_fields=fields,
+            )
+            invalidate_account_summaries(position.account_id for position in changed)
+
+        return len(changed)
+
 
 class History(models.Model):
+    """
+    The ledger of an account, every deposit, withdrawal and booked position with the balance after it.
+
+    Each write of the ledger API is one transaction holding the account lock from its first query to its last.
+    Django has no async transactions, so async callers run a whole write in a single hop to the sync thread,
+    like ``await sync_to_async(History.add_row)(account, profit, operation_type)``, rather than porting it to
+    the async ORM, which would spend a hop per query and could not hold the lock between them.
+    """
+
     account = models.ForeignKey(
         Account,
         verbose_name=_("Account"),
         on_delete=models.CASCADE,
         related_name="history",
+        # Covered by the composite indexes below, which all lead with the account.
+        db_index=False,
     )
     profit = models.DecimalField(
         _("Profit"),
@@ -152,6 +399,11 @@ class History(models.Model):
         verbose_name = _("History")
         verbose_name_plural = _("History")
         ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["account", "created_at", "id"], name="history_account_created_idx"),
+            # Keyset pages of the admin changelist.
+            models.Index(fields=["created_at", "id"], name="history_created_idx"),
+        ]
         constraints = [
             UniqueConstraint(
                 fields=["account", "position"],
@@ -163,35 +415,203 @@ class History(models.Model):
     def __str__(self):
         return f"{self.created_at} @ {self.account.name}"
 
+    @staticmethod
+    def get_position_profit(position: Position) -> Decimal:
+        return position.profit + position.swaps - position.commissions
+
     @classmethod
     def add_closed_position(cls, position: Position, *, force=False):
         if position.closed_at is None:
             raise PositionNotClosedError
 
-        if cls.objects.filter(account=position.account, position=position).exists():
-            raise PositionAlreadyExistsError
+        profit = cls.get_position_profit(position)
 
-        last_one = cls.objects.filter(account=position.account).order_by("-created_at").first()
+        with transaction.atomic():
+            position.account.lock()
 
-        if not force and last_one and last_one.created_at > position.closed_at:
-            raise TemporalDisturbanceError
+            if cls.objects.filter(account=position.account, position=position).exists():
+                raise PositionAlreadyExistsError
 
-        profit = position.profit + position.swaps - position.commissions
+            last_one = cls.objects.filter(account=position.account).order_by("-created_at", "-id").first()
+            backdated = last_one is not None and last_one.created_at > position.closed_at
 
-        row = cls.objects.create(
-            account=position.account,
-            position=position,
-            operation=OperationType.POSITION_CLOSE,
-            created_at=position.closed_at,
-            profit=profit,
-            balance=profit + (last_one.balance if last_one else 0),
-        )
+            if not force and backdated:
+                raise TemporalDisturbanceError
+
+            row = cls.objects.create(
+                account=position.account,
+                position=position,
+                operation=OperationType.POSITION_CLOSE,
+                created_at=position.closed_at,
+                profit=profit,
+                balance=profit + (last_one.balance if last_one else 0),
+            )
 
-        position.account.balance = row.balance
-        position.account.save(update_fields=["balance"])
+            if backdated:
+                cls._rebalance_backdated([row])
+            else:
+                position.account.balance = row.balance
+                position.account.save(update_fields=["balance"])
+                AccountDailySnapshot.record(position.account, [row])
+
+            position.account.invalidate_summary()
+            publish_balance_changes([position.account], [row])
 
         return row
 
+    @classmethod
+    def add_closed_positions(cls, account: Account, positions: Iterable[Position], *, force=False):
+        """
+        Add many closed positions of one account to the history at once.
+
+        Positions are booked in ``closed_at`` order with the same rules as ``add_closed_position``,
+        but the whole batch is validated up front and written with a single ``bulk_create``.
+        """
+        positions = list(positions)
+
+        if not positions:
+            return []
+
+        if any(position.account_id != account.pk for position in positions):
+            raise PositionAccountMismatchError
+
+        if any(position.closed_at is None for position in positions):
+            raise PositionNotClosedError
+
+        positions.sort(key=lambda position: position.closed_at)
+
+        # Unsaved positions all share a None primary key, tickets tell every position apart.
+        if len({position.ticket for position in positions}) != len(positions):
+            raise PositionAlreadyExistsError
+
+        with transaction.atomic():
+            account.lock()
+
+            if cls.objects.filter(account=account, position__in=positions).exists():
+                raise PositionAlreadyExistsError
+
+            last_one = cls.objects.filter(account=account).order_by("-created_at", "-id").first()
+            backdated = last_one is not None and last_one.created_at > positions[0].closed_at
+
+            if not force and backdated:
+                raise TemporalDisturbanceError
+
+            rows = cls._build_close_rows(account, positions, last_one.balance if last_one else Decimal(0))
+            balance = rows[-1].balance
+            rows = cls.objects.bulk_create(rows)
+
+            if backdated:
+                cls._rebalance_backdated(rows)
+            else:
+                account.balance = balance
+                account.save(update_fields=["balance"])
+                AccountDailySnapshot.record(account, rows)
+
+            account.invalidate_summary()
+            publish_balance_changes([account], rows)
+
+        return rows
+
+    @classmethod
+    def add_closed_positions_of_accounts(cls, positions: Iterable[Position], *, force=False):
+        """
+        Add closed positions of any number of accounts to the history at once.
+
+        Every account's positions are booked with the rules of ``add_closed_positions``, but locking, validation
+        and writing take a fixed number of queries for the whole batch instead of a few per account.
+        With ``force``, accounts whose positions land before their last row go through ``add_closed_positions``.
+        """
+        positions = list(positions)
+
+        if not positions:
+            return []
+
+        if any(position.closed_at is None for position in positions):
+            raise PositionNotClosedError
+
+        if len({(position.account_id, position.ticket) for position in positions}) != len(positions):
+            raise PositionAlreadyExistsError
+
+        by_account: dict[int, list[Position]] = {}
+
+        for position in sorted(positions, key=lambda position: position.closed_at):
+            by_account.setdefault(position.account_id, []).append(position)
+
+        with transaction.atomic():
+            # Locked in a fixed order, so two batches sharing accounts cannot deadlock.
+            accounts = {
+                account.pk: account
+                for account in Account.objects.select_for_update().filter(pk__in=by_account).order_by("pk")
+            }
+
+            if cls.objects.filter(position__in=positions).exists():
+                raise PositionAlreadyExistsError
+
+            last_ones = cls._get_last_rows(list(by_account))
+            rows = []
+            backdated = []
+
+            for account_id, account_positions in by_account.items():
+                last_one = last_ones.get(account_id)
+
+                if last_one is not None and last_one.created_at > account_positions[0].closed_at:
+                    if not force:
+                        raise TemporalDisturbanceError
+
+                    backdated.append(account_id)
+                    continue
+
+                account_rows = cls._build_close_rows(
+                    accounts[account_id],
+                    account_positions,
+                    last_one.balance if last_one else Decimal(0),
+                )
+                accounts[account_id].balance = account_rows[-1].balance
+                rows += account_rows
+
+            rows = cls.objects.bulk_create(rows)
+            booked = [accounts[account_id] for account_id in by_account if account_id not in backdated]
+            Account.objects.bulk_update(booked, ["balance"])
+            AccountDailySnapshot.record_many(rows)
+            invalidate_account_summaries(by_account)
+            publish_balance_changes(booked, rows)
+
+            for account_id in backdated:
+                rows += cls.add_closed_positions(accounts[account_id], by_account[account_id], force=True)
+
+        return rows
+
+    @classmethod
+    def _build_close_rows(cls, account: Account, positions: list[Position], balance: Decimal) -> list["History"]:
+        rows = []
+
+        for position in positions:
+            # Round like the database column does, so the running balance matches row-by-row booking.
+            profit = Decimal(cls.get_position_profit(position)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+            balance += profit
+            rows.append(
+                cls(
+                    account=account,
+                    position=position,
+                    operation=OperationType.POSITION_CLOSE,
+                    created_at=position.closed_at,
+                    profit=profit,
+                    balance=balance,
+                ),
+            )
+
+        return rows
+
+    @classmethod
+    def _get_last_rows(cls, account_ids: list[int]) -> dict[int, "History"]:
+        # One index probe per account, where DISTINCT ON would sort the whole history of the accounts.
+        last_ids = Account.objects.filter(pk__in=account_ids).values(
+            last_id=Subquery(
+                cls.objects.filter(account=OuterRef("pk")).order_by("-created_at", "-id").values("pk")[:1],
+            ),
+        )
+        return {row.account_id: row for row in cls.objects.filter(pk__in=last_ids)}
+
     @classmethod
     def add_row(
         cls,
@@ -202,33 +622,328 @@ class History(models.Model):
         *,
         force=False,
     ):
-        last_one = cls.objects.filter(account=account).order_by("-created_at").first()
-        new_created_at = created_at or now()
-
-        if not force and last_one and last_one.created_at > new_created_at:
-            raise TemporalDisturbanceError
-
-        row = cls.objects.create(
-            account=account,
-            operation=operation_type,
-            created_at=new_created_at,
-            profit=profit,
-            balance=profit + (last_one.balance if last_one else 0),
+        with transaction.atomic():
+            account.lock()
+            # Taken only after the lock, so a writer that waited for it does not land before the row it waited for.
+            new_created_at = created_at or now()
+
+            last_one = cls.objects.filter(account=account).order_by("-created_at", "-id").first()
+            backdated = last_one is not None and last_one.created_at > new_created_at
+
+            if not force and backdated:
+                raise TemporalDisturbanceError
+
+            row = cls.objects.create(
+                account=account,
+                operation=operation_type,
+                created_at=new_created_at,
+                profit=profit,
+                balance=profit + (last_one.balance if last_one else 0),
+            )
+
+            if backdated:
+                cls._rebalance_backdated([row])
+            else:
+                account.balance = row.balance
+                account.save(update_fields=["balance"])
+                AccountDailySnapshot.record(account, [row])
+
+            account.invalidate_summary()
+            publish_balance_changes([account], [row])
+
+        return row
+
+    @classmethod
+    def recalculate_balance(cls, account: Account, since: datetime | None = None):
+        """
+        Recompute the running balance of the account's history rows.
+
+        Only rows created at or after ``since`` are rewritten, starting from the balance of the row preceding them.
+        On PostgreSQL this is a single ``UPDATE`` driven by a ``SUM() OVER`` window,
+        other backends fall back to chunked ``bulk_update`` calls.
+        The daily snapshots from the day of ``since`` on are rebuilt as well.
+        """
+        with transaction.atomic():
+            account.lock()
+
+            if connection.vendor == "postgresql":
+                cls._update_balances_with_window(account, since)
+            else:
+                cls._update_balances_in_chunks(account, since)
+
+            balance = (
+                cls.objects.filter(account=account)
+                .order_by("-created_at", "-id")
+                .values_list("balance", flat=True)
+                .first()
+            )
+
+            account.balance = balance or Decimal(0)
+            account.save(update_fields=["balance"])
+            AccountDailySnapshot.rebuild(account, since=localdate(since) if since else None)
+            account.invalidate_summary()
+            publish_balance_changes([account])
+
+    @classmethod
+    def _rebalance_backdated(cls, rows: list["History"]):
+        account = rows[0].account
+        cls.recalculate_balance(account, since=min(row.created_at for row in rows))
+
+        balances = dict(cls.objects.filter(pk__in=[row.pk for row in rows]).values_list("pk", "balance"))
+
+        for row in rows:
+            row.balance = balances[row.pk]
+
+    @classmethod
+    def _get_opening_balance(cls, account: Account, since: datetime | None) -> Decimal:
+        if since is None:
+            return Decimal(0)
+
+        balance = (
+            cls.objects.filter(account=account, created_at__lt=since)
+            .order_by("-created_at", "-id")
+            .values_list("balance", flat=True)
+            .first()
         )
 
-        account.balance = row.balance
-        account.save(update_fields=["balance"])
+        return balance or Decimal(0)
 
-        return row
+    @classmethod
+    def _update_balances_with_window(cls, account: Account, since: datetime | None = None):
+        table = connection.ops.quote_name(cls._meta.db_table)
+        opening_balance = cls._get_opening_balance(account, since)
+        condition, params = ("AND created_at >= %s", [since]) if since else ("", [])
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {table} AS history
+                SET balance = running.balance
+                FROM (
+                    SELECT id, %s + SUM(profit) OVER (ORDER BY created_at, id) AS balance
+                    FROM {table}
+                    WHERE account_id = %s {condition}
+                ) AS running
+                WHERE history.account_id = %s AND history.id = running.id AND history.balance <> running.balance
+                """,  # noqa: S608
+                [opening_balance, account.pk, *params, account.pk],
+            )
 
     @classmethod
-    def recalculate_balance(cls, account: Account):
-        balance = 0
+    def _update_balances_in_chunks(cls, account: Account, since: datetime | None = None):
+        rows = cls.objects.filter(account=account)
+
+        if since:
+            rows = rows.filter(created_at__gte=since)
+
+        rows = rows.order_by("created_at", "id").values_list("id", "profit", "balance")
+        balance = cls._get_opening_balance(account, since)
+        changed = []
+
+        # Streamed, the rows after ``since`` can be the whole ledger. Updates leave the order of the rows alone.
+        for pk, profit, current in rows.iterator(chunk_size=RECALCULATE_BATCH_SIZE):
+            balance += profit
+
+            if current != balance:
+                changed.append(cls(pk=pk, balance=balance))
+
+            if len(changed) >= RECALCULATE_BATCH_SIZE:
+                cls.objects.bulk_update(changed, ["balance"])
+                changed = []
+
+        if changed:
+            cls.objects.bulk_update(changed, ["balance"])
+
+
+class AccountDailySnapshot(models.Model):
+    """
+    End of day state of an account, one row per day with history.
+
+    ``profit`` is the trading result of the day (closed positions and dividends),
+    deposits and withdrawals are kept apart with the sign they have in the history.
+    Days follow the current time zone.
+    """
+
+    account = models.ForeignKey(
+        Account,
+        verbose_name=_("Account"),
+        on_delete=models.CASCADE,
+        related_name="daily_snapshots",
+        # Covered by the unique constraint below, which leads with the account.
+        db_index=False,
+    )
+    day = models.DateField(_("Day"))
+    closing_balance = models.DecimalField(_("Closing balance"), max_digits=10, decimal_places=2, default=0)
+    profit = models.DecimalField(_("Profit"), max_digits=10, decimal_places=2, default=0)
+    deposits = models.DecimalField(_("Deposits"), max_digits=10, decimal_places=2, default=0)
+    withdrawals = models.DecimalField(_("Withdrawals"), max_digits=10, decimal_places=2, default=0)
+    trades = models.PositiveIntegerField(_("Trades"), default=0)
+
+    class Meta:
+        verbose_name = _("Daily snapshot")
+        verbose_name_plural = _("Daily snapshots")
+        ordering = ["day"]
+        constraints = [
+            UniqueConstraint(fields=["account", "day"], name="unique_snapshot_day"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} @ {self.account.name}"
+
+    @classmethod
+    def record(cls, account: Account, rows: list[History]):
+        """
+        Add history rows appended to the end of the account's ledger to the snapshots of their days.
+
+        Costs one SELECT of the touched snapshots and one ``INSERT ... ON CONFLICT DO UPDATE``,
+        however many days the rows span. The caller must hold the account lock.
+        """
+        cls.record_many(rows)
+
+    @classmethod
+    def record_many(cls, rows: list[History]):
+        """
+        Like ``record``, for rows of any number of accounts, in the same two queries.
+        """
+        days: dict[tuple[int, date], dict] = {}
+
+        for row in rows:
+            totals = days.setdefault((row.account_id, localdate(row.created_at)), dict.fromkeys(SNAPSHOT_FIELDS, 0))
+            # Round like the database column does, rows from add_row may carry a float.
+            profit = Decimal(row.profit).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+            totals["closing_balance"] = row.balance
+
+            if row.operation == OperationType.DEPOSIT:
+                totals["deposits"] += profit
+            elif row.operation == OperationType.WITHDRAWAL:
+                totals["withdrawals"] += profit
+            else:
+                totals["profit"] += profit
+
+            if row.operation == OperationType.POSITION_CLOSE:
+                totals["trades"] += 1
+
+        snapshots = {
+            (snapshot.account_id, snapshot.day): snapshot
+            for snapshot in cls.objects.filter(
+                account_id__in={account_id for account_id, _ in days},
+                day__in={day for _, day in days},
+            )
+        }
+
+        for (account_id, day), totals in days.items():
+            snapshot = snapshots.setdefault((account_id, day), cls(account_id=account_id, day=day))
+            snapshot.closing_balance = totals["closing_balance"]
+
+            for field in SNAPSHOT_FIELDS[1:]:
+                setattr(snapshot, field, getattr(snapshot, field) + totals[field])
+
+        cls.objects.bulk_create(
+            # The SELECT matches every combination of the accounts and days, only the touched ones are written.
+            [snapshots[key] for key in days],
+            update_conflicts=True,
+            unique_fields=["account", "day"],
+            update_fields=SNAPSHOT_FIELDS,
+        )
+
+    @classmethod
+    def rebuild(cls, account: Account, since: date | None = None):
+        """
+        Recompute the account's snapshots from its history, all of them or those from ``since`` on.
+
+        The history is aggregated per day in the database, the closing balances are the running sum
+        of the daily totals on top of the balance the account had before ``since``.
+        """
+        rows = History.objects.filter(account=account)
+        snapshots = cls.objects.filter(account=account)
+        balance = Decimal(0)
+
+        with transaction.atomic():
+            account.lock()
+
+            if since:
+                start = make_aware(datetime.combine(since, time.min))
+                balance = (
+                    rows.filter(created_at__lt=start)
+                    .order_by("-created_at", "-id")
+                    .values_list("balance", flat=True)
+                    .first()
+                ) or Decimal(0)
+                rows = rows.filter(created_at__gte=start)
+                snapshots = snapshots.filter(day__gte=since)
+
+            days = (
+                rows.annotate(day=TruncDate("created_at"))
+                .order_by("day")
+                .values("day")
+                .annotate(
+                    total=Sum("profit"),
+                    day_deposits=Sum("profit", filter=Q(operation=OperationType.DEPOSIT), default=0),
+                    day_withdrawals=Sum("profit", filter=Q(operation=OperationType.WITHDRAWAL), default=0),
+                    day_trades=Count("id", filter=Q(operation=OperationType.POSITION_CLOSE)),
+                )
+            )
+            rebuilt = []
+
+            for day in days:
+                balance += day["total"]
+                rebuilt.append(
+                    cls(
+                        account=account,
+                        day=day["day"],
+                        closing_balance=balance,
+                        profit=day["total"] - day["day_deposits"] - day["day_withdrawals"],
+                        deposits=day["day_deposits"],
+                        withdrawals=day["day_withdrawals"],
+                        trades=day["day_trades"],
+                    ),
+                )
+
+            snapshots.delete()
+            cls.objects.bulk_create(rebuilt)
+
+
+class ApiToken(OwnerModel):
+    """
+    A key machine clients, like expert advisors, send instead of a session to act for the owner of the accounts.
+
+    Only a digest of the key is stored, the key itself is shown once when issued.
+    """
+
+    name = models.CharField(_("Name"), max_length=100)
+    digest = models.CharField(_("Digest"), max_length=64, unique=True, editable=False)
+    created_at = models.DateTimeField(_("Created at"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("API token")
+        verbose_name_plural = _("API tokens")
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def get_digest(key: str) -> str:
+        # The keys are random and long, a plain hash is enough to keep a leaked table useless.
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @classmethod
+    def issue(cls, owner, name: str) -> tuple["ApiToken", str]:
+        """
+        Create a token of the owner and return it together with its key.
+        """
+        key = secrets.token_urlsafe(32)
+        return cls.objects.create(owner=owner, name=name, digest=cls.get_digest(key)), key
+
+    @classmethod
+    def authenticate(cls, authorization: str):
+        """
+        Return the active owner of the token in an ``Authorization: Bearer <key>`` header, or None.
+        """
+        scheme, _, key = authorization.partition(" ")
+
+        if scheme.lower() != "bearer" or not key:
+            return None
 
-        for row in cls.objects.filter(account=account).order_by("created_at").all():
-            balance += row.profit
-            row.balance = balance
-            row.save(update_fields=["balance"])
+        token = cls.objects.select_related("owner").filter(digest=cls.get_digest(key.strip())).first()
 
-        account.balance = balance
-        account.save(update_fields=["balance"])
+        return token.owner if token and token.owner.is_active else None
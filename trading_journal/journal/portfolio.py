@@ -0,0 +1,91 @@
+import heapq
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+
+from trading_journal.journal.models import Account, History
+from trading_journal.users.models import User
+
+PORTFOLIO_CHUNK_SIZE = 2000
+
+
+@dataclass(frozen=True, slots=True)
+class EquityPoint:
+    """
+    A history row of one account together with the combined balance of all accounts right after it.
+    """
+
+    created_at: datetime
+    account_id: int
+    profit: Decimal
+    balance: Decimal
+
+
+def _opening_balances(accounts: list[Account], since: datetime | None) -> dict[int, Decimal]:
+    if since is None:
+        return dict.fromkeys((account.pk for account in accounts), Decimal(0))
+
+    balances = {}
+
+    for account in accounts:
+        balances[account.pk] = (
+            History.objects.filter(account=account, created_at__lt=since)
+            .order_by("-created_at", "-id")
+            .values_list("balance", flat=True)
+            .first()
+        ) or Decimal(0)
+
+    return balances
+
+
+def _stream(account: Account, since: datetime | None, chunk_size: int) -> Iterator[tuple]:
+    rows = History.objects.filter(account=account)
+
+    if since:
+        rows = rows.filter(created_at__gte=since)
+
+    # On PostgreSQL ``iterator`` reads through a server-side cursor, a chunk at a time.
+    return (
+        rows.order_by("created_at", "id")
+        .values_list("created_at", "id", "account_id", "profit", "balance")
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def get_equity_curve(
+    accounts: Iterable[Account],
+    since: datetime | None = None,
+    *,
+    chunk_size: int = PORTFOLIO_CHUNK_SIZE,
+) -> Iterator[EquityPoint]:
+    """
+    Lazily yield the combined balance of the accounts after every history row of any of them, in time order.
+
+    Every account's history is streamed in ``created_at`` order and the streams are merged with a heap, so
+    memory depends on the number of accounts and the chunk size, not on the length of the histories.
+    The combined balance adds up the stored balances of the accounts as they are, in their own currencies.
+    With ``since``, the curve starts from the balances the accounts had at that time.
+    """
+    accounts = list(accounts)
+    balances = _opening_balances(accounts, since)
+    combined = sum(balances.values(), Decimal(0))
+    streams = [_stream(account, since, chunk_size) for account in accounts]
+
+    for created_at, _, account_id, profit, balance in heapq.merge(*streams, key=lambda row: row[:2]):
+        combined += balance - balances[account_id]
+        balances[account_id] = balance
+
+        yield EquityPoint(created_at=created_at, account_id=account_id, profit=profit, balance=combined)
+
+
+def get_owner_equity_curve(
+    owner: User,
+    since: datetime | None = None,
+    *,
+    chunk_size: int = PORTFOLIO_CHUNK_SIZE,
+) -> Iterator[EquityPoint]:
+    """
+    Lazily yield the equity curve of all accounts of the owner, see ``get_equity_curve``.
+    """
+    return get_equity_curve(Account.objects.filter(owner=owner).order_by("pk"), since, chunk_size=chunk_size)
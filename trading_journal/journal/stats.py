@@ -0,0 +1,156 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+from django.db.models import DurationField, ExpressionWrapper, F, FloatField, Value
+from django.db.models.functions import Cast, Coalesce
+
+from trading_journal.journal.exporters import read_arrow
+from trading_journal.journal.models import Account, Position
+
+# Net profit of a position as a float, computed by the database.
+NET_PROFIT = Cast(
+    Coalesce("profit", Value(0)) + Coalesce("swaps", Value(0)) - Coalesce("commissions", Value(0)),
+    FloatField(),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class TradeStatistics:
+    """
+    Performance figures of a series of closed trades.
+
+    Amounts are in the account currency and include swaps and commissions, the average loss is a positive amount.
+    Ratios that are undefined for the series, such as the profit factor without a losing trade, are ``None``.
+    """
+
+    trades: int = 0
+    wins: int = 0
+    losses: int = 0
+    win_rate: float | None = None
+    net_profit: float = 0.0
+    expectancy: float | None = None
+    profit_factor: float | None = None
+    average_win: float | None = None
+    average_loss: float | None = None
+    payoff_ratio: float | None = None
+    longest_win_streak: int = 0
+    longest_loss_streak: int = 0
+    max_drawdown: float = 0.0
+    average_holding_time: timedelta | None = None
+
+
+def _longest_run(mask: np.ndarray) -> int:
+    # Run boundaries are where the padded mask flips, starts and ends alternate.
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], mask, [False]))))
+    return int((edges[1::2] - edges[::2]).max(initial=0))
+
+
+def _ratio(numerator: float, denominator: float) -> float | None:
+    return float(numerator / denominator) if denominator else None
+
+
+def compute_statistics(profits: np.ndarray, holding_times: np.ndarray | None = None) -> TradeStatistics:
+    """
+    Compute the statistics of trades given their net profits in close time order.
+
+    Args:
+        profits (np.ndarray): Net profit of every trade as floats.
+        holding_times (np.ndarray | None): Time every trade was open as ``timedelta64``.
+    """
+    if not profits.size:
+        return TradeStatistics()
+
+    wins = profits > 0
+    losses = profits < 0
+    win_count = int(np.count_nonzero(wins))
+    loss_count = int(np.count_nonzero(losses))
+    # Clipping is several times faster than summing with a ``where`` mask.
+    gross_profit = float(profits.clip(min=0).sum())
+    gross_loss = float(-profits.clip(max=0).sum())
+    average_win = _ratio(gross_profit, win_count)
+    average_loss = _ratio(gross_loss, loss_count)
+
+    equity = np.cumsum(profits)
+    # The equity curve starts at zero, before the first trade.
+    peaks = np.maximum(np.maximum.accumulate(equity), 0)
+
+    return TradeStatistics(
+        trades=profits.size,
+        wins=win_count,
+        losses=loss_count,
+        win_rate=win_count / profits.size,
+        net_profit=float(equity[-1]),
+        expectancy=float(equity[-1] / profits.size),
+        profit_factor=_ratio(gross_profit, gross_loss),
+        average_win=average_win,
+        average_loss=average_loss,
+        payoff_ratio=_ratio(average_win, average_loss) if average_win is not None else None,
+        longest_win_streak=_longest_run(wins),
+        longest_loss_streak=_longest_run(losses),
+        max_drawdown=float((peaks - equity).max()),
+        average_holding_time=(
+            holding_times.mean().astype("timedelta64[us]").item()
+            if holding_times is not None and holding_times.size
+            else None
+        ),
+    )
+
+
+def get_trade_statistics(
+    account: Account,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> TradeStatistics:
+    """
+    Compute the statistics of the account's positions closed between ``since`` and ``until``.
+
+    Net profits and holding times are computed by the database and fetched with a single ``values_list``
+    straight into NumPy arrays, no model instances are created.
+    """
+    positions = Position.objects.filter(account=account, closed_at__isnull=False)
+
+    if since:
+        positions = positions.filter(closed_at__gte=since)
+
+    if until:
+        positions = positions.filter(closed_at__lt=until)
+
+    rows = positions.order_by("closed_at", "id").values_list(
+        NET_PROFIT,
+        ExpressionWrapper(F("closed_at") - F("opened_at"), output_field=DurationField()),
+    )
+    trades = np.fromiter(rows, dtype=[("profit", "f8"), ("holding_time", "m8[us]")])
+
+    return compute_statistics(trades["profit"], trades["holding_time"])
+
+
+def _column(table: pa.Table, name: str) -> np.ndarray:
+    column = table.column(name)
+
+    if column.num_chunks == 1:
+        return column.chunk(0).to_numpy(zero_copy_only=True)
+
+    # Every record batch is a separate region of the file, a column spanning several is concatenated.
+    return column.to_numpy()
+
+
+def get_file_trade_statistics(path: str | Path) -> TradeStatistics:
+    """
+    Compute the statistics of the closed positions in an Arrow IPC file written by ``write_columnar``.
+
+    The file is memory-mapped and the net profit and time columns are viewed as NumPy arrays without copying
+    or parsing the rows. Trades of several accounts are ordered by close time, as if traded in one account.
+    """
+    table = read_arrow(path)
+    profits = _column(table, "net_profit")
+    opened_at = _column(table, "opened_at")
+    closed_at = _column(table, "closed_at")
+
+    if (closed_at[1:] < closed_at[:-1]).any():
+        order = np.argsort(closed_at, kind="stable")
+        profits, opened_at, closed_at = profits[order], opened_at[order], closed_at[order]
+
+    return compute_statistics(profits, closed_at - opened_at)
@@ -0,0 +1,44 @@
+from dataclasses import asdict
+
+from celery import shared_task
+from django.core.files.storage import default_storage
+
+from trading_journal.journal import events, importers
+from trading_journal.journal.models import Account
+from trading_journal.markets.models import Market
+
+
+@shared_task(soft_time_limit=60 * 60, time_limit=61 * 60)
+def import_statement(
+    account_id: int,
+    market_id: int,
+    name: str,
+    statement_format: str,
+    chunk_size: int = importers.IMPORT_CHUNK_SIZE,
+) -> dict:
+    """Stream a broker statement saved in the default storage into the account's positions and history."""
+    account = Account.objects.get(pk=account_id)
+    market = Market.objects.get(pk=market_id)
+
+    with default_storage.open(name, "rb") as file:
+        result = importers.import_statement(
+            account,
+            market,
+            importers.open_statement(file),
+            statement_format,
+            chunk_size=chunk_size,
+        )
+
+    return asdict(result)
+
+
+@shared_task(soft_time_limit=events.DRAIN_LOCK_TIMEOUT, time_limit=events.DRAIN_LOCK_TIMEOUT + 60)
+def drain_events(shard: int) -> dict:
+    """Apply the trade events buffered in a shard, unless another worker is already draining it."""
+    result = events.drain_shard(shard)
+
+    if result.pending:
+        # Out of time with events still coming in, hand the shard over instead of holding a worker.
+        drain_events.delay(shard)
+
+    return asdict(result)
@@ -0,0 +1,134 @@
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+
+import factory
+from django.utils.timezone import now
+
+from trading_journal.journal.models import Account, History, Position
+from trading_journal.journal.types import OperationType
+from trading_journal.markets.tests.factories import BrokerFactory, SymbolFactory
+from trading_journal.users.tests.factories import UserFactory
+
+
+class AccountFactory(factory.django.DjangoModelFactory):
+    """
+    Factory for creating Account instances.
+
+    Attributes:
+        owner (User): The owner of the account, created using UserFactory.
+        name (str): The name of the account, generated using Faker.
+        broker (Broker): The broker the account is held at, created using BrokerFactory.
+    """
+
+    class Meta:
+        model = Account
+
+    owner = factory.SubFactory(UserFactory)
+    name = factory.Faker("word")
+    broker = factory.SubFactory(BrokerFactory)
+
+
+class PositionFactory(factory.django.DjangoModelFactory):
+    """
+    Factory for creating closed Position instances.
+
+    Attributes:
+        account (Account): The account the position belongs to, created using AccountFactory.
+        ticket (int): The broker ticket number, generated from a sequence.
+        symbol (Symbol): The traded symbol, created using SymbolFactory.
+        opened_at (datetime): The open time, generated from a sequence of minutes.
+        closed_at (datetime): The close time, an hour after ``opened_at``.
+    """
+
+    class Meta:
+        model = Position
+
+    account = factory.SubFactory(AccountFactory)
+    ticket = factory.Sequence(lambda n: n + 1)
+    volume = Decimal("0.1000")
+    symbol = factory.SubFactory(SymbolFactory)
+    opened_at = factory.Sequence(lambda n: now() - timedelta(days=365) + timedelta(minutes=n))
+    closed_at = factory.LazyAttribute(lambda o: o.opened_at + timedelta(hours=1))
+    open_price = Decimal("1.1000")
+    close_price = Decimal("1.1010")
+    commissions = Decimal("0.5000")
+    swaps = Decimal("0.0000")
+    profit = Decimal("10.0000")
+
+
+class HistoryFactory(factory.django.DjangoModelFactory):
+    """
+    Factory for creating History rows.
+
+    Attributes:
+        account (Account): The account the row belongs to, created using AccountFactory.
+        operation (str): The operation type, a deposit by default.
+        created_at (datetime): The booking time, generated from a sequence of minutes.
+    """
+
+    class Meta:
+        model = History
+
+    account = factory.SubFactory(AccountFactory)
+    operation = OperationType.DEPOSIT
+    profit = Decimal("100.00")
+    balance = factory.LazyAttribute(lambda o: o.profit)
+    created_at = factory.Sequence(lambda n: now() - timedelta(days=365) + timedelta(minutes=n))
+
+
+def seed_history(account: Account, size: int, *, batch_size: int = 10_000) -> None:
+    """
+    Bulk insert ``size`` history rows with stale balances, bypassing the factory for speed.
+
+    Args:
+        account (Account): The account to seed.
+        size (int): The number of rows to insert.
+        batch_size (int): The number of rows per INSERT statement.
+    """
+    started_at = now() - timedelta(minutes=size)
+    rows = (
+        History(
+            account=account,
+            operation=OperationType.DEPOSIT if n % 2 else OperationType.WITHDRAWAL,
+            profit=Decimal(100 if n % 2 else -50),
+            balance=Decimal(0),
+            created_at=started_at + timedelta(minutes=n),
+        )
+        for n in range(size)
+    )
+
+    while batch := list(islice(rows, batch_size)):
+        History.objects.bulk_create(batch)
+
+
+def seed_positions(account: Account, size: int, *, batch_size: int = 10_000) -> None:
+    """
+    Bulk insert ``size`` closed positions of a single symbol, bypassing the factory for speed.
+
+    Args:
+        account (Account): The account to seed.
+        size (int): The number of positions to insert.
+        batch_size (int): The number of rows per INSERT statement.
+    """
+    symbol = SymbolFactory()
+    started_at = now() - timedelta(minutes=size)
+    positions = (
+        Position(
+            account=account,
+            ticket=n + 1,
+            volume=Decimal("0.1000"),
+            symbol=symbol,
+            opened_at=started_at + timedelta(minutes=n),
+            open_price=Decimal("1.1000"),
+            closed_at=started_at + timedelta(minutes=n, seconds=30),
+            close_price=Decimal("1.1010") if n % 3 else Decimal("1.0990"),
+            commissions=Decimal("0.5000"),
+            swaps=Decimal("0.0000"),
+            profit=Decimal("10.0000") if n % 3 else Decimal("-10.0000"),
+        )
+        for n in range(size)
+    )
+
+    while batch := list(islice(positions, batch_size)):
+        Position.objects.bulk_create(batch)
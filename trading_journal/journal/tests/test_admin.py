@@ -0,0 +1,141 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from trading_journal.core.paginators import EstimatedCountPaginator
+from trading_journal.journal.models import History
+from trading_journal.journal.tests.factories import AccountFactory, HistoryFactory, PositionFactory
+
+pytestmark = pytest.mark.django_db
+
+PAGE_SIZE = 100
+
+
+@pytest.fixture
+def account():
+    return AccountFactory()
+
+
+def test_position_changelist(admin_client, account, django_assert_max_num_queries):
+    """
+    A full page of positions renders in a fixed number of queries without loading the modifications.
+    """
+    PositionFactory.create_batch(PAGE_SIZE, account=account, symbol=PositionFactory(account=account).symbol)
+
+    with django_assert_max_num_queries(7) as captured:
+        response = admin_client.get(reverse("admin:journal_position_changelist"))
+
+    assert response.status_code == 200  # noqa: PLR2004
+    assert not any("modifications" in query["sql"] for query in captured.captured_queries)
+
+
+def test_history_changelist(admin_client, account, django_assert_max_num_queries):
+    """
+    A full page of history rows renders in a fixed number of queries.
+    """
+    HistoryFactory.create_batch(PAGE_SIZE, account=account)
+
+    with django_assert_max_num_queries(8):
+        response = admin_client.get(reverse("admin:journal_history_changelist"))
+
+    assert response.status_code == 200  # noqa: PLR2004
+    assert len(response.context["cl"].result_list) == PAGE_SIZE
+    assert f"About {PAGE_SIZE} History" in response.content.decode()
+
+
+def test_account_changelist(admin_client, account, django_assert_max_num_queries):
+    """
+    A page of accounts renders in a fixed number of queries.
+    """
+    AccountFactory.create_batch(PAGE_SIZE - 1, broker=account.broker)
+
+    with django_assert_max_num_queries(7):
+        response = admin_client.get(reverse("admin:journal_account_changelist"))
+
+    assert response.status_code == 200  # noqa: PLR2004
+
+
+def get_page(admin_client, url):
+    response = admin_client.get(url)
+    assert response.status_code == 200  # noqa: PLR2004
+    return response.context["cl"]
+
+
+def test_history_changelist_keyset_pages(admin_client, account):
+    """
+    Pages follow each other through the cursor without gaps or repeats, also across rows with equal timestamps.
+    """
+    rows = HistoryFactory.create_batch(PAGE_SIZE * 2 + 50, account=account)
+    History.objects.filter(pk__in=[row.pk for row in rows[90:110]]).update(created_at=rows[90].created_at)
+    url = reverse("admin:journal_history_changelist")
+    seen = []
+
+    while url:
+        cl = get_page(admin_client, url)
+        seen.extend(row.pk for row in cl.result_list)
+        url = cl.get_next_page_url() and reverse("admin:journal_history_changelist") + cl.get_next_page_url()
+
+    assert seen == list(History.objects.order_by("created_at", "id").values_list("pk", flat=True))
+
+
+def test_position_changelist_keyset_filtered(admin_client, account):
+    """
+    The cursor is kept next to the filters and is not taken for a filter itself.
+    """
+    PositionFactory.create_batch(PAGE_SIZE + 1, account=account, symbol=PositionFactory(account=account).symbol)
+    PositionFactory.create_batch(3)
+    url = reverse("admin:journal_position_changelist")
+
+    cl = get_page(admin_client, f"{url}?account__id__exact={account.pk}")
+    cl = get_page(admin_client, url + cl.get_next_page_url())
+
+    assert len(cl.result_list) == 2  # noqa: PLR2004
+    assert all(position.account_id == account.pk for position in cl.result_list)
+    assert cl.result_count == PAGE_SIZE + 2
+    assert cl.get_next_page_url() is None
+
+
+def test_changelist_sorted_by_column(admin_client, account):
+    """
+    Sorting by a column falls back to numbered pages.
+    """
+    HistoryFactory.create_batch(3, account=account)
+
+    cl = get_page(admin_client, reverse("admin:journal_history_changelist") + "?o=-4")
+
+    assert not cl.uses_keyset
+    assert [row.profit for row in cl.result_list] == sorted((row.profit for row in cl.result_list), reverse=True)
+
+
+def test_changelist_invalid_cursor(admin_client):
+    """
+    A broken cursor sends the admin to its error page.
+    """
+    response = admin_client.get(reverse("admin:journal_history_changelist") + "?cursor=nonsense")
+
+    assert response.status_code == 302  # noqa: PLR2004
+    assert response.url.endswith("?e=1")
+
+
+def test_estimated_count(account):
+    """
+    Unfiltered querysets are counted from the planner statistics, filtered ones exactly.
+    """
+    HistoryFactory.create_batch(20, account=account)
+    HistoryFactory.create_batch(5)
+
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE journal_history")
+
+    with (
+        mock.patch("trading_journal.core.paginators.ESTIMATED_COUNT_THRESHOLD", 0),
+        CaptureQueriesContext(connection) as captured,
+    ):
+        assert EstimatedCountPaginator(History.objects.all(), 10).count == 25  # noqa: PLR2004
+        assert EstimatedCountPaginator(History.objects.filter(account=account), 10).count == 20  # noqa: PLR2004
+
+    assert "pg_class" in captured[0]["sql"]
+    assert "COUNT(" in captured[1]["sql"]
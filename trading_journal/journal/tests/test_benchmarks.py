@@ -0,0 +1,415 @@
+import resource
+import tempfile
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from time import perf_counter
+from unittest import mock
+
+import fakeredis
+import numpy as np
+import pytest
+from django.db import connection
+from django.urls import reverse
+from django.utils.timezone import now
+
+from trading_journal.journal.consolidation import get_history_profits
+from trading_journal.journal.events import EVENT_SHARDS, drain_shard, push_events
+from trading_journal.journal.exporters import export_rows, get_export_rows, write_columnar
+from trading_journal.journal.loaders import load_history, load_positions
+from trading_journal.journal.models import Account, History, Position
+from trading_journal.journal.portfolio import get_owner_equity_curve
+from trading_journal.journal.stats import compute_statistics, get_file_trade_statistics, get_trade_statistics
+from trading_journal.journal.tests.factories import AccountFactory, PositionFactory, seed_history, seed_positions
+from trading_journal.journal.types import ColumnarFormat, EventType, ExportFormat, ExportKind, OperationType
+from trading_journal.markets.models import ExchangeRate
+from trading_journal.markets.rates import exchange_rates, load_rates
+from trading_journal.markets.tests.factories import SymbolFactory
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+SIZES = [10_000, 100_000, 1_000_000]
+# Single bookings are measured over a batch of calls, one is too short to time reliably.
+CALLS = 100
+PAGE_SIZE = 100
+# The row by row reference takes well over half an hour on the largest dataset.
+ROW_BY_ROW_MAX_SIZE = 100_000
+
+
+def recalculate_balance_row_by_row(account: Account):
+    """The original implementation, kept as the reference point for the set-based one."""
+    balance = Decimal(0)
+
+    for row in History.objects.filter(account=account).order_by("created_at").all():
+        balance += row.profit
+        row.balance = balance
+        row.save(update_fields=["balance"])
+
+    account.balance = balance
+    account.save(update_fields=["balance"])
+
+
+def recalculate_balance_in_chunks(account: Account):
+    with mock.patch.object(connection, "vendor", "unknown"):
+        History.recalculate_balance(account)
+
+
+@pytest.fixture
+def report(record_property, benchmark_baseline):
+    """
+    Record a timing, and the number of queries if counted, and compare them with the baseline.
+
+    The rate is given for ``items`` when an operation handles fewer rows than the dataset holds.
+    """
+
+    def write(name: str, size: int, elapsed: float, *, queries: int | None = None, items: int | None = None):
+        summary = f"{elapsed:.3f}s ({(items or size) / elapsed:,.0f} rows/s)"
+
+        if queries is not None:
+            summary = f"{summary[:-1]}, {queries} queries)"
+
+        record_property(f"{name} {size} rows", summary)
+        benchmark_baseline(f"{name} {size} rows", elapsed, queries)
+
+    return write
+
+
+@pytest.fixture
+def measure(report):
+    """
+    Time the block and count its queries, without keeping them around like ``CaptureQueriesContext`` does.
+    """
+
+    @contextmanager
+    def run(name: str, size: int, *, items: int | None = None):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            started_at = perf_counter()
+            yield
+            elapsed = perf_counter() - started_at
+
+        report(name, size, elapsed, queries=queries, items=items)
+
+    return run
+
+
+@pytest.mark.parametrize("size", SIZES, ids=["10k", "100k", "1m"])
+def test_recalculate_balance(size, measure):
+    account = AccountFactory()
+    seed_history(account, size)
+
+    # Like load_history does after a bulk load.
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {History._meta.db_table}")  # noqa: SLF001
+    expected = History.objects.filter(account=account).values_list("profit", flat=True)
+    expected = sum(expected, Decimal(0))
+
+    methods = [
+        ("row by row", recalculate_balance_row_by_row),
+        ("chunked bulk_update", recalculate_balance_in_chunks),
+        ("window update", History.recalculate_balance),
+    ]
+
+    for name, recalculate in methods[size > ROW_BY_ROW_MAX_SIZE :]:
+        History.objects.filter(account=account).update(balance=0)
+
+        with measure(name, size):
+            recalculate(account)
+
+        assert History.objects.filter(account=account).latest("created_at").balance == expected
+
+
+@pytest.mark.parametrize("size", SIZES, ids=["10k", "100k", "1m"])
+def test_add_row(size, measure):
+    account = AccountFactory()
+    seed_history(account, size)
+
+    with measure("add row", size, items=CALLS):
+        for _ in range(CALLS):
+            History.add_row(account, Decimal("1.00"), OperationType.DEPOSIT)
+
+    assert History.objects.filter(account=account).count() == size + CALLS
+
+
+@pytest.mark.parametrize("size", SIZES, ids=["10k", "100k", "1m"])
+def test_add_closed_position(size, measure):
+    account = AccountFactory()
+    seed_history(account, size)
+    symbol = SymbolFactory()
+    positions = [
+        PositionFactory(account=account, symbol=symbol, opened_at=now() + timedelta(seconds=n)) for n in range(CALLS)
+    ]
+
+    with measure("add closed position", size, items=CALLS):
+        for position in positions:
+            History.add_closed_position(position)
+
+    assert History.objects.filter(account=account, position__isnull=False).count() == CALLS
+
+
+@pytest.mark.parametrize("size", SIZES, ids=["10k", "100k", "1m"])
+def test_admin_changelists(size, measure, admin_client):
+    account = AccountFactory()
+    seed_history(account, size)
+    seed_positions(account, size)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {History._meta.db_table}, {Position._meta.db_table}")  # noqa: SLF001
+
+    for model in ("history", "position"):
+        url = reverse(f"admin:journal_{model}_changelist")
+
+        for name, query in (("", ""), (" of an account", f"?account__id__exact={account.pk}")):
+            with measure(f"{model} changelist{name}", size, items=PAGE_SIZE):
+                response = admin_client.get(url + query)
+
+            assert response.status_code == 200  # noqa: PLR2004
+            assert len(response.context["cl"].result_list) == PAGE_SIZE
+
+
+def generate_positions(account: Account, size: int):
+    # The symbol is created before the stream is consumed, the connection is busy during COPY.
+    symbol = SymbolFactory()
+    started_at = now() - timedelta(minutes=size)
+
+    return (
+        Position(
+            account=account,
+            ticket=n + 1,
+            volume=Decimal("0.1000"),
+            symbol=symbol,
+            opened_at=started_at + timedelta(minutes=n),
+            open_price=Decimal("1.1000"),
+            closed_at=started_at + timedelta(minutes=n, seconds=30),
+            close_price=Decimal("1.1010"),
+            profit=Decimal("10.0000"),
+        )
+        for n in range(size)
+    )
+
+
+def generate_history(account: Account, size: int):
+    started_at = now() - timedelta(minutes=size)
+
+    for n in range(size):
+        yield History(
+            account=account,
+            operation=OperationType.DEPOSIT,
+            profit=Decimal("1.00"),
+            created_at=started_at + timedelta(minutes=n),
+        )
+
+
+@pytest.mark.parametrize("size", SIZES, ids=["10k", "100k", "1m"])
+def test_load(size, report):
+    for name, load, generate in (
+        ("positions", load_positions, generate_positions),
+        ("history", load_history, generate_history),
+    ):
+        for path, vendor in (("bulk_create", "unknown"), ("COPY", connection.vendor)):
+            account = AccountFactory()
+
+            with mock.patch.object(connection, "vendor", vendor):
+                started_at = perf_counter()
+                load(generate(account, size))
+                report(f"load {name} via {path}", size, perf_counter() - started_at)
+
+    assert Position.objects.count() == 2 * size
+    assert account.history.latest("created_at").balance == size
+
+
+def test_compute_statistics(report):
+    size = 1_000_000
+    rng = np.random.default_rng(0)
+    profits = rng.normal(1.0, 50.0, size)
+    holding_times = rng.integers(60, 86_400, size).astype("m8[s]")
+    compute_statistics(profits[:1000], holding_times[:1000])
+
+    started_at = perf_counter()
+    stats = compute_statistics(profits, holding_times)
+    elapsed = perf_counter() - started_at
+    report("compute statistics", size, elapsed)
+
+    assert stats.trades == size
+    assert elapsed < 0.1  # noqa: PLR2004
+
+
+@pytest.mark.parametrize("size", SIZES, ids=["10k", "100k", "1m"])
+def test_get_trade_statistics(size, report):
+    account = AccountFactory()
+    seed_positions(account, size)
+
+    started_at = perf_counter()
+    stats = get_trade_statistics(account)
+    report("trade statistics from the database", size, perf_counter() - started_at)
+
+    assert stats.trades == size
+
+
+@pytest.mark.parametrize("size", SIZES, ids=["10k", "100k", "1m"])
+def test_get_history_profits(size, report):
+    accounts = [AccountFactory(currency="USD"), AccountFactory(currency="EUR")]
+
+    for account in accounts:
+        seed_history(account, size // 2)
+
+    first_day = (now() - timedelta(minutes=size)).date()
+    load_rates(
+        ExchangeRate(day=first_day + timedelta(days=n), base="USD", currency="EUR", rate=Decimal("0.9"))
+        for n in range((now().date() - first_day).days + 1)
+    )
+    # The test transaction never commits, so loading the rates does not drop the ones cached by earlier runs.
+    exchange_rates.clear()
+
+    started_at = perf_counter()
+    series = get_history_profits(accounts, "USD")
+    report("history profits in USD", size, perf_counter() - started_at)
+
+    assert series.profits.size == size
+
+
+def sort_equity_curve(accounts: list[Account]):
+    rows = []
+
+    for account in accounts:
+        rows.extend(account.history.values_list("created_at", "id", "account_id", "balance"))
+
+    rows.sort()
+    balances = dict.fromkeys((account.pk for account in accounts), Decimal(0))
+
+    for _, _, account_id, balance in rows:
+        balances[account_id] = balance
+
+    return sum(balances.values())
+
+
+@pytest.mark.parametrize("size", SIZES, ids=["10k", "100k", "1m"])
+def test_equity_curve(size, report, record_property):
+    accounts = AccountFactory.create_batch(30, owner=AccountFactory().owner)
+
+    for account in accounts:
+        seed_history(account, size // len(accounts))
+
+    for name, build in (
+        ("sorted equity curve", sort_equity_curve),
+        ("merged equity curve", lambda accounts: deque(get_owner_equity_curve(accounts[0].owner), maxlen=1)),
+    ):
+        started_at = perf_counter()
+        build(accounts)
+        report(name, size, perf_counter() - started_at)
+
+        # Tracing slows every allocation down, so memory is measured in a separate run.
+        tracemalloc.start()
+        build(accounts)
+        record_property(f"{name} {size} rows peak memory", f"{tracemalloc.get_traced_memory()[1] / 2**20:.1f} MiB")
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("size", [100_000, 1_000_000, 5_000_000], ids=["100k", "1m", "5m"])
+@pytest.mark.parametrize("export_format", ExportFormat.values)
+def test_export(size, export_format, report, record_property):
+    account = AccountFactory()
+
+    with connection.cursor() as cursor:
+        # Millions of rows are generated in the database, building them in Python would dominate the run.
+        cursor.execute(
+            f"""
+            INSERT INTO {History._meta.db_table} (account_id, operation, profit, balance, created_at)
+            SELECT %s, %s, 1, n, now() - make_interval(mins => %s - n)
+            FROM generate_series(1, %s) AS n
+            """,  # noqa: S608, SLF001
+            [account.pk, OperationType.DEPOSIT, size, size],
+        )
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    exported = 0
+    started_at = perf_counter()
+
+    for chunk in export_rows(
+        export_format,
+        *get_export_rows(ExportKind.HISTORY, Account.objects.filter(pk=account.pk)),
+    ):
+        exported += len(chunk)
+
+    report(f"export history as {export_format}", size, perf_counter() - started_at)
+    # ru_maxrss is the peak resident set in KiB, its growth is what the export itself needed.
+    growth = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+    record_property(f"export history as {export_format} {size} rows peak RSS growth", f"{growth:.1f} MiB")
+
+    assert exported > size
+    assert growth < 100  # noqa: PLR2004
+
+
+@pytest.mark.parametrize("size", SIZES, ids=["10k", "100k", "1m"])
+def test_file_trade_statistics(size, report):
+    account = AccountFactory()
+    seed_positions(account, size)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "positions.arrow"
+        started_at = perf_counter()
+        write_columnar(
+            ColumnarFormat.ARROW,
+            ExportKind.POSITIONS,
+            get_export_rows(ExportKind.POSITIONS, Account.objects.filter(pk=account.pk))[1],
+            path,
+        )
+        report("export positions as arrow", size, perf_counter() - started_at)
+
+        started_at = perf_counter()
+        stats = get_file_trade_statistics(path)
+        report("trade statistics from a memory-mapped file", size, perf_counter() - started_at)
+
+    assert stats == get_trade_statistics(account)
+
+
+def generate_events(accounts: list[Account], positions: int):
+    started_at = now() - timedelta(days=1)
+
+    for n in range(positions):
+        account = accounts[n % len(accounts)]
+        opened_at = started_at + timedelta(seconds=n)
+        common = {"account": account.pk, "ticket": n + 1}
+        yield {
+            **common,
+            "type": EventType.OPEN,
+            "symbol": "EURUSD",
+            "volume": "0.10",
+            "opened_at": opened_at.isoformat(),
+            "open_price": "1.1000",
+        }
+        yield {**common, "type": EventType.MODIFY, "time": opened_at.isoformat(), "sl": "1.0900", "tp": "1.1200"}
+        yield {
+            **common,
+            "type": EventType.CLOSE,
+            "closed_at": (opened_at + timedelta(minutes=1)).isoformat(),
+            "close_price": "1.1010",
+            "profit": "10.00",
+        }
+
+
+@pytest.mark.parametrize("size", [30_000, 300_000], ids=["30k", "300k"])
+def test_ingest_events(size, report):
+    accounts = AccountFactory.create_batch(200, broker=AccountFactory().broker)
+    SymbolFactory(code="EURUSD", brokers=[accounts[0].broker])
+    events = list(generate_events(accounts, size // 3))
+
+    with mock.patch("trading_journal.journal.events.get_redis_connection", return_value=fakeredis.FakeRedis()):
+        for start in range(0, len(events), 1000):
+            push_events(events[start : start + 1000])
+
+        started_at = perf_counter()
+        results = [drain_shard(shard) for shard in range(EVENT_SHARDS)]
+        report("drain events", size, perf_counter() - started_at)
+
+    assert sum(result.events for result in results) == size
+    assert History.objects.filter(account__in=accounts).count() == size // 3
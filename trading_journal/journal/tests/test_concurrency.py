@@ -0,0 +1,217 @@
+import asyncio
+import json
+import multiprocessing
+import resource
+from decimal import Decimal
+from functools import partial
+from time import perf_counter
+from unittest import mock
+
+import fakeredis
+import pytest
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.conf import settings
+from django.db import connection, connections
+from django.utils.timezone import now
+
+from trading_journal.journal.live import BalanceHub, balance_application
+from trading_journal.journal.models import Account, History
+from trading_journal.journal.tests.factories import AccountFactory
+from trading_journal.journal.tests.test_live import Socket
+from trading_journal.journal.types import OperationType
+
+PROCESSES = 4
+WRITES_PER_PROCESS = 50
+CONCURRENT_REQUESTS = 32
+WRITES_PER_REQUEST = 10
+IDLE_SOCKETS = 10_000
+SOCKET_ACCOUNTS = 100
+
+
+def write_rows(account_ids: list[int], writes: int):
+    try:
+        for _ in range(writes):
+            for account in Account.objects.filter(pk__in=account_ids):
+                History.add_row(account, Decimal("1.00"), OperationType.DEPOSIT)
+    finally:
+        connections.close_all()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_add_row_loses_no_updates(record_property):
+    """
+    Several processes appending to the same accounts at once must not lose a single balance update.
+    """
+    accounts = AccountFactory.create_batch(2)
+    account_ids = [account.pk for account in accounts]
+    # Forked processes must open their own database connections.
+    connections.close_all()
+
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=write_rows, args=(account_ids, WRITES_PER_PROCESS)) for _ in range(PROCESSES)]
+    started_at = perf_counter()
+
+    for process in processes:
+        process.start()
+
+    for process in processes:
+        process.join()
+
+    elapsed = perf_counter() - started_at
+    writes = PROCESSES * WRITES_PER_PROCESS * len(accounts)
+
+    assert all(process.exitcode == 0 for process in processes)
+
+    for account in Account.objects.filter(pk__in=account_ids):
+        balances = list(
+            History.objects.filter(account=account).order_by("created_at").values_list("balance", flat=True),
+        )
+
+        assert account.balance == PROCESSES * WRITES_PER_PROCESS
+        assert balances == [Decimal(n) for n in range(1, PROCESSES * WRITES_PER_PROCESS + 1)]
+
+    record_property("add_row", f"{writes} writes in {elapsed:.3f}s ({writes / elapsed:,.0f} writes/s)")
+
+
+def add_row_unlocked(account: Account, profit: Decimal, operation_type: OperationType):
+    # The queries add_row cannot do without, with no lock, transaction or snapshots around them.
+    last_one = History.objects.filter(account=account).order_by("-created_at", "-id").first()
+    row = History.objects.create(
+        account=account,
+        operation=operation_type,
+        created_at=now(),
+        profit=profit,
+        balance=profit + (last_one.balance if last_one else 0),
+    )
+    Account.objects.filter(pk=account.pk).update(balance=row.balance)
+
+
+async def add_row_query_by_query(account: Account, profit: Decimal, operation_type: OperationType):
+    # add_row_unlocked ported to the async ORM, every query is a hop of its own to the sync thread.
+    last_one = await History.objects.filter(account=account).order_by("-created_at", "-id").afirst()
+    row = await History.objects.acreate(
+        account=account,
+        operation=operation_type,
+        created_at=now(),
+        profit=profit,
+        balance=profit + (last_one.balance if last_one else 0),
+    )
+    await Account.objects.filter(pk=account.pk).aupdate(balance=row.balance)
+
+
+async def request(account: Account, add_row):
+    # Like Django's ASGI handler, every request gets its own thread for sync code and thus its own connection.
+    async with ThreadSensitiveContext():
+        try:
+            for _ in range(WRITES_PER_REQUEST):
+                await add_row(account, Decimal("1.00"), OperationType.DEPOSIT)
+        finally:
+            await sync_to_async(connections.close_all)()
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db(transaction=True)
+def test_async_add_row_throughput(record_property, benchmark_baseline):
+    """
+    Compare concurrent requests booking through a single ``sync_to_async(History.add_row)`` hop with async queries.
+
+    The async ORM cannot hold the account lock, so the same unlocked queries run once in a single hop and
+    once as a hop per query, which is the cost of porting the ledger API query by query.
+    """
+    # An account per request, the query by query variant holds no lock and would lose updates to a shared one.
+    accounts = AccountFactory.create_batch(CONCURRENT_REQUESTS)
+    connections.close_all()
+
+    for name, add_row in (
+        ("sync_to_async(add_row)", sync_to_async(History.add_row)),
+        ("unlocked in one hop", sync_to_async(add_row_unlocked)),
+        ("unlocked query by query", add_row_query_by_query),
+    ):
+
+        async def run(add_row=add_row):
+            await asyncio.gather(*(request(account, add_row) for account in accounts))
+
+        started_at = perf_counter()
+        asyncio.run(run())
+        elapsed = perf_counter() - started_at
+        writes = CONCURRENT_REQUESTS * WRITES_PER_REQUEST
+        record_property(name, f"{writes} writes in {elapsed:.3f}s ({writes / elapsed:,.0f} writes/s)")
+        benchmark_baseline(f"{name} {writes} concurrent writes", elapsed)
+
+    for account in Account.objects.filter(pk__in=[account.pk for account in accounts]):
+        assert account.balance == 3 * WRITES_PER_REQUEST
+
+
+def count_database_connections() -> int:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()")
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db(transaction=True)
+def test_idle_balance_sockets(client, record_property, benchmark_baseline):
+    """
+    One worker holds 10k idle sockets on a single Redis subscription and pushes a balance change to all of them.
+    """
+    accounts = AccountFactory.create_batch(SOCKET_ACCOUNTS, owner=AccountFactory().owner)
+    client.force_login(accounts[0].owner)
+    cookie = f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}".encode()
+    server = fakeredis.FakeServer()
+    hub = BalanceHub(connect=partial(fakeredis.FakeAsyncRedis, server=server))
+    connections_before = count_database_connections()
+    memory_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    async def run():
+        sockets = [
+            Socket(
+                partial(balance_application, hub=hub),
+                f"/ws/journal/accounts/{accounts[n % SOCKET_ACCOUNTS].pk}/",
+                [(b"cookie", cookie)],
+                # Every socket is checked against the database once, one after the other.
+                timeout=300,
+            )
+            for n in range(IDLE_SOCKETS)
+        ]
+        started_at = perf_counter()
+        accepted = await asyncio.gather(*(socket.connect() for socket in sockets))
+        elapsed = perf_counter() - started_at
+        record_property("connect", f"{IDLE_SOCKETS} sockets in {elapsed:.3f}s")
+        benchmark_baseline(f"connect {IDLE_SOCKETS} idle sockets", elapsed)
+
+        assert all(message == {"type": "websocket.accept"} for message in accepted)
+        assert hub.subscribers == IDLE_SOCKETS
+        assert await sync_to_async(count_database_connections)() <= connections_before + 1
+
+        started_at = perf_counter()
+
+        for account in accounts:
+            await sync_to_async(History.add_row)(account, Decimal("1.00"), OperationType.DEPOSIT)
+
+        pushed = await asyncio.gather(*(socket.next() for socket in sockets))
+        elapsed = perf_counter() - started_at
+        record_property("push", f"{IDLE_SOCKETS} messages in {elapsed:.3f}s")
+        benchmark_baseline(f"push to {IDLE_SOCKETS} idle sockets", elapsed)
+
+        assert all(json.loads(message["text"])["balance"] == "1.00" for message in pushed)
+
+        await asyncio.gather(*(socket.disconnect() for socket in sockets))
+
+        assert hub.subscribers == 0
+
+    # Connections are kept between requests in production, instead of being closed after every check.
+    with (
+        mock.patch.dict(connection.settings_dict, {"CONN_MAX_AGE": 60}),
+        mock.patch(
+            "trading_journal.journal.models.get_redis_connection",
+            return_value=fakeredis.FakeRedis(server=server),
+        ),
+    ):
+        asyncio.run(run())
+
+    connections.close_all()
+    memory = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - memory_before) / 1024
+    record_property(
+        "memory",
+        f"{memory:.1f} MiB for {IDLE_SOCKETS} sockets ({memory * 1024 / IDLE_SOCKETS:.1f} KiB each)",
+    )
@@ -0,0 +1,69 @@
+from datetime import UTC, date, datetime
+from decimal import Decimal
+from io import StringIO
+
+import numpy as np
+from django.core.cache import cache
+from django.test import TestCase
+
+from trading_journal.journal.consolidation import get_consolidated_balance, get_history_profits, get_position_profits
+from trading_journal.journal.models import History
+from trading_journal.journal.tests.factories import AccountFactory, HistoryFactory, PositionFactory
+from trading_journal.markets.rates import exchange_rates, load_rates, read_rates_csv
+
+RATES_CSV = "day,currency,rate\n2024-01-01,EUR,0.9\n2024-01-01,PLN,4.0\n2024-01-03,EUR,0.8\n2024-01-03,PLN,4.0\n"
+
+
+class ConsolidationTestCase(TestCase):
+    def setUp(self) -> None:
+        """
+        Set up USD, EUR and PLN accounts of one owner with deposits and a closed position each, and USD based rates.
+        """
+        cache.clear()
+        exchange_rates.clear()
+        load_rates(read_rates_csv(StringIO(RATES_CSV), base="USD"))
+        usd = AccountFactory(currency="USD")
+        self.accounts = [
+            usd,
+            AccountFactory(currency="EUR", owner=usd.owner),
+            AccountFactory(currency="PLN", owner=usd.owner),
+        ]
+
+        for day, account in enumerate(self.accounts, start=1):
+            HistoryFactory(account=account, profit=Decimal("360.00"), created_at=datetime(2024, 1, day, tzinfo=UTC))
+            History.add_closed_position(
+                PositionFactory(account=account, closed_at=datetime(2024, 1, day, 12, tzinfo=UTC)),
+            )
+
+    def test_get_history_profits(self) -> None:
+        """
+        Test that history profits of all accounts are converted with the rate of their day, in time order.
+        """
+        # The rows, the known currencies and a rate series per account currency.
+        with self.assertNumQueries(4):
+            series = get_history_profits(self.accounts, "USD")
+
+        self.assertListEqual(series.accounts.tolist(), [account.pk for account in self.accounts for _ in range(2)])
+        np.testing.assert_allclose(series.profits, [360, 9.5, 360 / 0.9, 9.5 / 0.9, 360 / 4, 9.5 / 4])
+        self.assertAlmostEqual(series.cumulative()[-1], series.total)
+
+    def test_get_position_profits(self) -> None:
+        """
+        Test that net profits of closed positions are converted, and positions outside the period are left out.
+        """
+        series = get_position_profits(self.accounts, "PLN", since=datetime(2024, 1, 2, tzinfo=UTC))
+
+        self.assertEqual(series.currency, "PLN")
+        np.testing.assert_allclose(series.profits, [9.5 / 0.9 * 4, 9.5])
+
+    def test_get_consolidated_balance(self) -> None:
+        """
+        Test that current balances are converted with the rates of the given day.
+        """
+        for account in self.accounts:
+            account.refresh_from_db()
+
+        self.assertAlmostEqual(
+            get_consolidated_balance(self.accounts, "USD", date(2024, 1, 3)),
+            369.5 + 369.5 / 0.8 + 369.5 / 4,
+        )
@@ -0,0 +1,308 @@
+import json
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+import fakeredis
+import pytest
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from trading_journal.journal.events import (
+    EVENTS_KEY_PREFIX,
+    apply_events,
+    drain_shard,
+    get_shard,
+    push_events,
+    validate_events,
+)
+from trading_journal.journal.exceptions import InvalidEventError
+from trading_journal.journal.models import ApiToken, History, Position
+from trading_journal.journal.tests.factories import AccountFactory, HistoryFactory
+from trading_journal.journal.types import EventType
+from trading_journal.markets.tests.factories import SymbolFactory
+
+
+def build_events(account_id: int, ticket: int) -> list[dict]:
+    return [
+        {
+            "account": account_id,
+            "type": EventType.OPEN,
+            "ticket": ticket,
+            "symbol": "EURUSD",
+            "volume": "0.10",
+            "opened_at": "2024-01-02T10:00:00Z",
+            "open_price": 1.1,
+        },
+        {
+            "account": account_id,
+            "type": EventType.MODIFY,
+            "ticket": ticket,
+            "time": "2024-01-02T10:30:00Z",
+            "sl": 1.09,
+        },
+        {
+            "account": account_id,
+            "type": EventType.MODIFY,
+            "ticket": ticket,
+            "time": "2024-01-02T11:00:00Z",
+            "sl": 1.095,
+            "tp": 1.12,
+        },
+        {
+            "account": account_id,
+            "type": EventType.CLOSE,
+            "ticket": ticket,
+            "closed_at": "2024-01-02T12:00:00Z",
+            "close_price": 1.101,
+            "commissions": 0.5,
+            "profit": 10,
+        },
+    ]
+
+
+class EventsTestCase(TestCase):
+    def setUp(self) -> None:
+        """
+        Set up an account with an opening deposit, a symbol of its broker and a fake Redis server.
+        """
+        self.account = AccountFactory()
+        HistoryFactory(account=self.account, profit=Decimal("1000.00"), created_at="2024-01-01T00:00:00Z")
+        SymbolFactory(code="EURUSD", brokers=[self.account.broker])
+        self.redis = fakeredis.FakeRedis()
+        patcher = mock.patch("trading_journal.journal.events.get_redis_connection", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_apply_events(self) -> None:
+        """
+        Test that events are applied in order, modifications are logged and the closed trade is booked.
+        """
+        result = apply_events(build_events(self.account.pk, 1))
+
+        position = Position.objects.get(account=self.account, ticket=1)
+        self.assertEqual(result.positions, 1)
+        self.assertEqual(result.history, 1)
+        self.assertEqual(position.sl_price, Decimal("1.0950"))
+        self.assertEqual(position.tp_price, Decimal("1.1200"))
+        self.assertDictEqual(
+            position.modifications,
+            {
+                "sl": [["2024-01-02T10:30:00+00:00", "1.09"], ["2024-01-02T11:00:00+00:00", "1.095"]],
+                "tp": [["2024-01-02T11:00:00+00:00", "1.12"]],
+            },
+        )
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("1009.50"))
+
+    def test_apply_events_twice(self) -> None:
+        """
+        Test that replayed events change nothing.
+        """
+        apply_events(build_events(self.account.pk, 1))
+
+        result = apply_events(build_events(self.account.pk, 1))
+
+        self.assertEqual(result.history, 0)
+        self.assertEqual(len(Position.objects.get(account=self.account, ticket=1).modifications["sl"]), 2)
+        self.assertEqual(History.objects.filter(account=self.account).count(), 2)
+
+    def test_apply_events_across_batches(self) -> None:
+        """
+        Test that a position opened in one batch is modified and closed in the next ones.
+        """
+        for event in build_events(self.account.pk, 1):
+            apply_events([event])
+
+        self.assertEqual(History.objects.filter(account=self.account, position__ticket=1).get().balance, 1009.5)
+
+    def test_apply_events_dead_letter(self) -> None:
+        """
+        Test that the events of an account that cannot be applied are set aside and other accounts go on.
+        """
+        other = AccountFactory(broker=self.account.broker)
+        events = build_events(self.account.pk, 1)
+        events[0]["symbol"] = "XAUUSD"
+
+        result = apply_events([*events, *build_events(other.pk, 2)])
+
+        self.assertEqual(result.failed, 4)
+        self.assertEqual(result.positions, 1)
+        self.assertEqual(json.loads(self.redis.lpop(f"{EVENTS_KEY_PREFIX}:dead"))["events"], events)
+
+    def test_apply_events_database_error(self) -> None:
+        """
+        Test that an account whose events the database refuses is set aside after retrying account by account.
+        """
+        other = AccountFactory(broker=self.account.broker)
+        events = build_events(self.account.pk, 1)
+        events[0]["volume"] = "10000000"
+
+        result = apply_events([*events, *build_events(other.pk, 2)])
+
+        self.assertEqual(result.failed, 4)
+        self.assertEqual(result.history, 1)
+        self.assertFalse(Position.objects.filter(account=self.account).exists())
+        self.assertTrue(History.objects.filter(account=other, position__ticket=2).exists())
+
+    def test_apply_events_retry_counts(self) -> None:
+        """
+        Test that retrying the accounts of a refused batch does not count their skipped events twice.
+        """
+        other = AccountFactory(broker=self.account.broker)
+        events = build_events(self.account.pk, 1)
+        events[0]["volume"] = "10000000"
+
+        result = apply_events([*events, *build_events(other.pk, 2), build_events(other.pk, 3)[1]])
+
+        self.assertEqual(result.skipped, 1)
+        self.assertEqual(result.failed, 4)
+
+    def test_apply_events_unknown_ticket(self) -> None:
+        """
+        Test that a modification of a ticket never opened is skipped.
+        """
+        result = apply_events(build_events(self.account.pk, 1)[1:2])
+
+        self.assertEqual(result.skipped, 1)
+
+    def test_drain_shard(self) -> None:
+        """
+        Test that pushed events are drained in batches and removed from the buffer.
+        """
+        events = build_events(self.account.pk, 1)
+        shard = get_shard(self.account.pk)
+
+        self.assertSetEqual(push_events(events), {shard})
+
+        result = drain_shard(shard, batch_size=3)
+
+        self.assertEqual(result.events, 4)
+        self.assertEqual(result.pending, 0)
+        self.assertEqual(self.redis.llen(f"{EVENTS_KEY_PREFIX}:{shard}"), 0)
+        self.assertTrue(History.objects.filter(account=self.account, position__ticket=1).exists())
+
+    def test_drain_shard_malformed_events(self) -> None:
+        """
+        Test that events the consumer cannot parse are set aside instead of blocking their shard.
+        """
+        other = AccountFactory(broker=self.account.broker)
+        # Both accounts share a shard, so the malformed events sit in front of the valid ones.
+        while get_shard(other.pk) != get_shard(self.account.pk):
+            other = AccountFactory(broker=self.account.broker)
+
+        impossible_date = build_events(self.account.pk, 1)
+        impossible_date[0]["opened_at"] = "2024-02-30T10:00:00Z"
+        numeric_symbol = build_events(self.account.pk, 2)
+        numeric_symbol[0]["symbol"] = 5
+        shard = get_shard(self.account.pk)
+
+        for events in (impossible_date, numeric_symbol):
+            push_events([*events, *build_events(other.pk, events[0]["ticket"])])
+            result = drain_shard(shard)
+
+            self.assertEqual(result.failed, 4)
+            self.assertEqual(self.redis.llen(f"{EVENTS_KEY_PREFIX}:{shard}"), 0)
+            self.assertEqual(json.loads(self.redis.lpop(f"{EVENTS_KEY_PREFIX}:dead"))["events"], events)
+
+        self.assertEqual(History.objects.filter(account=other, position__isnull=False).count(), 2)
+
+    def test_drain_shard_locked(self) -> None:
+        """
+        Test that a shard drained by another consumer is left alone.
+        """
+        shard = get_shard(self.account.pk)
+        push_events(build_events(self.account.pk, 1))
+
+        with self.redis.lock(f"{EVENTS_KEY_PREFIX}:{shard}:lock"):
+            result = drain_shard(shard)
+
+        self.assertEqual(result.events, 0)
+        self.assertEqual(self.redis.llen(f"{EVENTS_KEY_PREFIX}:{shard}"), 4)
+
+    def test_validate_events(self) -> None:
+        """
+        Test that events of other accounts, without a type or ticket, or with data of the wrong type are refused.
+        """
+        events = build_events(self.account.pk, 1)
+
+        self.assertListEqual(validate_events(events, {self.account.pk}), events)
+
+        for invalid in (
+            {**events[0], "account": 0},
+            {**events[0], "type": "delete"},
+            {**events[0], "ticket": "1"},
+            {**events[0], "opened_at": "2024-02-30T10:00:00Z"},
+            {**events[0], "symbol": 5},
+            {**events[0], "open_price": "1,1"},
+        ):
+            with pytest.raises(InvalidEventError, match="#1"):
+                validate_events([events[0], invalid], {self.account.pk})
+
+    def post_events(self, events: list[dict], **headers) -> HttpResponse:
+        # Terminals send no CSRF token, so the client checks it like a browser would.
+        client = Client(enforce_csrf_checks=True)
+        return client.post(reverse("journal:events"), events, content_type="application/json", headers=headers)
+
+    def test_view(self) -> None:
+        """
+        Test that the endpoint buffers the events of a token's owner and queues a consumer for their shard.
+        """
+        _, key = ApiToken.issue(self.account.owner, "terminal")
+
+        with mock.patch("trading_journal.journal.views.drain_events.delay") as delay:
+            response = self.post_events(build_events(self.account.pk, 1), authorization=f"Bearer {key}")
+
+        self.assertEqual(response.status_code, 202)
+        self.assertDictEqual(response.json(), {"accepted": 4})
+        delay.assert_called_once_with(get_shard(self.account.pk))
+        self.assertEqual(self.redis.llen(f"{EVENTS_KEY_PREFIX}:{get_shard(self.account.pk)}"), 4)
+
+    def test_view_unauthenticated(self) -> None:
+        """
+        Test that requests without a valid token are refused, also when they carry a session.
+        """
+        ApiToken.issue(self.account.owner, "terminal")
+        inactive = AccountFactory(owner__is_active=False)
+        _, inactive_key = ApiToken.issue(inactive.owner, "terminal")
+        self.client.force_login(self.account.owner)
+
+        for headers in ({}, {"authorization": "Bearer wrong"}, {"authorization": f"Bearer {inactive_key}"}):
+            response = self.post_events(build_events(self.account.pk, 1), **headers)
+
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response["WWW-Authenticate"], "Bearer")
+
+        response = self.client.post(
+            reverse("journal:events"),
+            build_events(self.account.pk, 1),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(self.redis.keys())
+
+    def test_view_foreign_account(self) -> None:
+        """
+        Test that events of an account the token's owner does not own are refused as a whole.
+        """
+        _, key = ApiToken.issue(AccountFactory().owner, "terminal")
+
+        response = self.post_events(build_events(self.account.pk, 1), authorization=f"Bearer {key}")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.redis.keys())
+
+    def test_create_api_token(self) -> None:
+        """
+        Test that the command prints a key which authenticates as the user, and only its digest is stored.
+        """
+        out = StringIO()
+
+        call_command("create_api_token", self.account.owner.email, "terminal", stdout=out)
+
+        key = out.getvalue().splitlines()[0]
+        self.assertEqual(ApiToken.authenticate(f"Bearer {key}"), self.account.owner)
+        self.assertFalse(ApiToken.objects.filter(digest=key).exists())
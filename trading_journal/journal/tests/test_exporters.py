@@ -0,0 +1,261 @@
+import csv
+import json
+import tempfile
+import warnings
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from pathlib import Path
+
+import pyarrow.parquet as pq
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import AsyncClient, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from trading_journal.journal.exporters import export_rows, get_export_rows, read_arrow, write_columnar
+from trading_journal.journal.models import Account, History
+from trading_journal.journal.stats import get_file_trade_statistics, get_trade_statistics
+from trading_journal.journal.tests.factories import AccountFactory, HistoryFactory, PositionFactory
+from trading_journal.journal.types import ColumnarFormat, ExportFormat, ExportKind
+
+
+class ExportTestCase(TestCase):
+    def setUp(self) -> None:
+        """
+        Set up two accounts of one owner with deposits and closed positions, and an account of another owner.
+        """
+        self.account = AccountFactory()
+        self.other = AccountFactory(owner=self.account.owner)
+        self.stranger = AccountFactory()
+        self.deposits = [HistoryFactory(account=account) for account in (self.account, self.other, self.stranger)]
+        self.positions = PositionFactory.create_batch(3, account=self.account)
+        self.open_position = PositionFactory(account=self.account, closed_at=None, close_price=None)
+        self.accounts = Account.objects.filter(owner=self.account.owner)
+
+
+class ExportRowsTestCase(ExportTestCase):
+    def test_export_csv(self) -> None:
+        """
+        Test that history rows of the accounts are exported as CSV in account and time order.
+        """
+        with self.assertNumQueries(1):
+            content = "".join(
+                export_rows(ExportFormat.CSV, *get_export_rows(ExportKind.HISTORY, self.accounts), chunk_size=1),
+            )
+
+        rows = list(csv.DictReader(StringIO(content)))
+
+        self.assertListEqual([int(row["account_id"]) for row in rows], sorted([self.account.pk, self.other.pk]))
+        self.assertEqual(Decimal(rows[0]["balance"]), Decimal("100.00"))
+        self.assertEqual(rows[0]["position_ticket"], "")
+
+    def test_export_jsonl(self) -> None:
+        """
+        Test that positions are exported as JSON lines with their symbol code.
+        """
+        content = "".join(
+            export_rows(ExportFormat.JSONL, *get_export_rows(ExportKind.POSITIONS, self.accounts), chunk_size=2),
+        )
+        rows = [json.loads(line) for line in content.splitlines()]
+
+        self.assertListEqual(
+            [row["ticket"] for row in rows],
+            [*(position.ticket for position in self.positions), self.open_position.ticket],
+        )
+        self.assertEqual(rows[0]["symbol_code"], self.positions[0].symbol.code)
+        self.assertEqual(rows[0]["profit"], "10.0000")
+
+    def test_export_range(self) -> None:
+        """
+        Test that positions are filtered by close time, leaving open positions out of a range.
+        """
+        since = self.positions[1].closed_at
+        content = "".join(
+            export_rows(
+                ExportFormat.JSONL,
+                *get_export_rows(ExportKind.POSITIONS, self.accounts, since, since + timedelta(days=1)),
+            ),
+        )
+
+        self.assertListEqual(
+            [json.loads(line)["ticket"] for line in content.splitlines()],
+            [self.positions[1].ticket, self.positions[2].ticket],
+        )
+
+    def test_export_empty(self) -> None:
+        """
+        Test that an empty CSV export still has its header.
+        """
+        content = "".join(export_rows(ExportFormat.CSV, *get_export_rows(ExportKind.HISTORY, Account.objects.none())))
+
+        self.assertEqual(content, "account_id,created_at,operation,profit,balance,position_ticket\r\n")
+
+
+class ExportViewTestCase(ExportTestCase):
+    def test_export_view(self) -> None:
+        """
+        Test that the user's accounts are streamed as an attachment.
+        """
+        self.client.force_login(self.account.owner)
+
+        response = self.client.get(reverse("journal:export-history"), {"format": ExportFormat.JSONL})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/jsonl")
+        self.assertIn("attachment", response["Content-Disposition"])
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+
+    def test_export_view_account(self) -> None:
+        """
+        Test that a single account can be exported and accounts of other users cannot.
+        """
+        self.client.force_login(self.account.owner)
+        url = reverse("journal:export-history")
+
+        response = self.client.get(url, {"account": self.other.pk})
+        self.assertEqual(len(b"".join(response.streaming_content).decode().splitlines()), 2)
+
+        response = self.client.get(url, {"account": self.stranger.pk})
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_view_anonymous(self) -> None:
+        """
+        Test that anonymous users are denied.
+        """
+        response = self.client.get(reverse("journal:export-positions"))
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_command(self) -> None:
+        """
+        Test the export_journal management command for an owner.
+        """
+        out = StringIO()
+
+        call_command("export_journal", ExportKind.HISTORY, owner=self.account.owner.pk, stdout=out)
+
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+        self.assertEqual(History.objects.count(), 3)
+
+    def test_command_without_accounts(self) -> None:
+        """
+        Test that the command refuses to export every account.
+        """
+        with pytest.raises(CommandError, match="--account or --owner"):
+            call_command("export_journal", ExportKind.HISTORY)
+
+
+class AsyncExportViewTestCase(TransactionTestCase):
+    def setUp(self) -> None:
+        """
+        Set up an account with a deposit and a closed position.
+        """
+        self.account = AccountFactory()
+        self.deposit = HistoryFactory(account=self.account)
+        self.position = PositionFactory(account=self.account)
+
+    async def test_export_view(self) -> None:
+        """
+        Test that under ASGI the export is streamed chunk by chunk rather than read into a list first.
+        """
+        client = AsyncClient()
+        await client.aforce_login(self.account.owner)
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            response = await client.get(reverse("journal:export-positions"), {"format": ExportFormat.JSONL})
+            # Read like the ASGI handler sends it.
+            content = b"".join([chunk async for chunk in response])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        self.assertListEqual([json.loads(line)["ticket"] for line in content.splitlines()], [self.position.ticket])
+        self.assertListEqual([str(warning.message) for warning in caught if "synchronous" in str(warning.message)], [])
+
+
+class ColumnarExportTestCase(ExportTestCase):
+    def setUp(self) -> None:
+        """
+        Set up the accounts and a temporary directory for the exported files.
+        """
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "positions.arrow"
+
+    def test_write_parquet(self) -> None:
+        """
+        Test that history rows are written to Parquet in record batches with exact amounts.
+        """
+        file = BytesIO()
+
+        written = write_columnar(
+            ColumnarFormat.PARQUET,
+            ExportKind.HISTORY,
+            get_export_rows(ExportKind.HISTORY, self.accounts)[1],
+            file,
+            batch_size=1,
+        )
+
+        table = pq.read_table(file)
+        self.assertEqual(written, 2)
+        self.assertEqual(table.num_rows, 2)
+        self.assertListEqual(table.column("balance").to_pylist(), [Decimal("100.00"), Decimal("100.00")])
+
+    def test_write_arrow(self) -> None:
+        """
+        Test that only closed positions are written to Arrow and read back memory-mapped.
+        """
+        written = write_columnar(
+            ColumnarFormat.ARROW,
+            ExportKind.POSITIONS,
+            get_export_rows(ExportKind.POSITIONS, self.accounts)[1],
+            self.path,
+            batch_size=2,
+        )
+
+        table = read_arrow(self.path)
+        self.assertEqual(written, 3)
+        self.assertListEqual(table.column("ticket").to_pylist(), [position.ticket for position in self.positions])
+        self.assertListEqual(table.column("net_profit").to_pylist(), [9.5, 9.5, 9.5])
+        self.assertEqual(table.column("closed_at").num_chunks, 2)
+
+    def test_file_trade_statistics(self) -> None:
+        """
+        Test that statistics of a memory-mapped file match the ones computed from the database.
+        """
+        PositionFactory(account=self.account, profit=Decimal("-30.0000"), swaps=None)
+        write_columnar(
+            ColumnarFormat.ARROW,
+            ExportKind.POSITIONS,
+            get_export_rows(ExportKind.POSITIONS, self.accounts)[1],
+            self.path,
+            batch_size=3,
+        )
+
+        self.assertEqual(get_file_trade_statistics(self.path), get_trade_statistics(self.account))
+
+    def test_command_columnar(self) -> None:
+        """
+        Test that the command writes columnar formats to a file only.
+        """
+        err = StringIO()
+
+        call_command(
+            "export_journal",
+            ExportKind.POSITIONS,
+            account=[self.account.pk],
+            format=ColumnarFormat.ARROW,
+            output=self.path,
+            stderr=err,
+        )
+
+        self.assertEqual(read_arrow(self.path).num_rows, 3)
+        self.assertIn("Exported 3 positions rows", err.getvalue())
+
+        with pytest.raises(CommandError, match="pass --output"):
+            call_command("export_journal", ExportKind.POSITIONS, owner=1, format=ColumnarFormat.PARQUET)
@@ -0,0 +1,231 @@
+import codecs
+from datetime import UTC, datetime
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from trading_journal.journal.exceptions import InvalidStatementError, UnknownSymbolError
+from trading_journal.journal.importers import import_statement, open_statement, read_mt4, read_mt5
+from trading_journal.journal.models import History, Position
+from trading_journal.journal.tasks import import_statement as import_statement_task
+from trading_journal.journal.tests.factories import AccountFactory, HistoryFactory
+from trading_journal.journal.types import StatementFormat
+from trading_journal.markets.tests.factories import MarketFactory, SymbolFactory
+
+CSV_STATEMENT = (
+    "ticket,symbol,volume,opened_at,open_price,sl_price,tp_price,closed_at,close_price,commissions,swaps,profit\n"
+    "1,EURUSD,0.10,2024-01-02T10:00:00Z,1.10000,1.09000,,2024-01-02T12:00:00Z,1.10100,0.70,0,10.00\n"
+    "3,GBPUSD,0.20,2024-01-03T10:00:00Z,1.27000,,,2024-01-03T11:00:00Z,1.26900,1.40,-0.30,-20.00\n"
+    "2,EURUSD,0.10,2024-01-02T11:00:00Z,1.10050,,,2024-01-02T11:30:00Z,1.10150,0.70,0,10.00\n"
+    "4,EURUSD,0.30,2024-01-04T10:00:00Z,1.09000,,,,,,,\n"
+)
+
+MT4_STATEMENT = """<html><body><table>
+<tr><td colspan=4>Account: 1234</td><td colspan=5>Name: Trader</td><td colspan=3>Currency: USD</td></tr>
+<tr><td colspan=14><b>Closed Transactions:</b></td></tr>
+<tr><td>Ticket</td><td>Open Time</td><td>Type</td><td>Size</td><td>Item</td><td>Price</td><td>S / L</td>
+<td>T / P</td><td>Close Time</td><td>Price</td><td>Commission</td><td>Taxes</td><td>Swap</td><td>Profit</td></tr>
+<tr><td>101</td><td>2024.01.02 10:00:00</td><td>buy</td><td>1.00</td><td>eurusd</td><td>1.10000</td>
+<td>0.00000</td><td>1.11000</td><td>2024.01.02 12:00:00</td><td>1.10100</td><td>-7.00</td><td>0.00</td>
+<td>-1.50</td><td>1&nbsp;000.00</td></tr>
+<tr><td>100</td><td>2024.01.01 09:00:00</td><td>balance</td><td colspan=10>Deposit</td><td>5 000.00</td></tr>
+<tr><td colspan=14><b>Open Trades:</b></td></tr>
+<tr><td>102</td><td>2024.01.03 10:00:00</td><td>sell</td><td>0.50</td><td>eurusd</td><td>1.10500</td>
+<td>1.11000</td><td>0.00000</td><td>&nbsp;</td><td>1.10400</td><td>-3.50</td><td>0.00</td>
+<td>0.00</td><td>50.00</td></tr>
+</table></body></html>
+"""
+
+MT5_STATEMENT = """<html><body><table>
+<tr><th colspan=13><div><b>Positions</b></div></th></tr>
+<tr><td>Time</td><td>Position</td><td>Symbol</td><td>Type</td><td>Volume</td><td>Price</td><td>S / L</td>
+<td>T / P</td><td>Time</td><td>Price</td><td>Commission</td><td>Swap</td><td>Profit</td></tr>
+<tr><td>2024.01.02 10:00:00</td><td>201</td><td>EURUSD</td><td>buy</td><td>0.1</td><td>1.10000</td><td></td>
+<td></td><td>2024.01.02 12:00:00</td><td>1.10100</td><td>-0.70</td><td>0.00</td><td>10.00</td></tr>
+<tr><th colspan=13><div><b>Orders</b></div></th></tr>
+<tr><td>2024.01.02 10:00:00</td><td>201</td><td>EURUSD</td><td>buy</td><td>0.1 / 0.1</td><td></td>
+<td></td><td></td><td>2024.01.02 10:00:00</td><td>filled</td><td></td></tr>
+<tr><th colspan=13><div><b>Open Positions</b></div></th></tr>
+<tr><td>2024.01.03 10:00:00</td><td>202</td><td>EURUSD</td><td>sell</td><td>0.2</td><td>1.10500</td><td></td>
+<td></td><td>1.10400</td><td>-0.10</td><td>20.00</td><td></td></tr>
+</table></body></html>
+"""
+
+
+class ReadersTestCase(TestCase):
+    def test_read_mt4(self) -> None:
+        """
+        Test that trades are read from a MetaTrader 4 statement and balance operations are skipped.
+        """
+        closed, opened = read_mt4(StringIO(MT4_STATEMENT))
+
+        self.assertEqual(closed.ticket, 101)
+        self.assertEqual(closed.symbol, "eurusd")
+        self.assertEqual(closed.opened_at, datetime(2024, 1, 2, 10, tzinfo=UTC))
+        self.assertEqual(closed.closed_at, datetime(2024, 1, 2, 12, tzinfo=UTC))
+        self.assertIsNone(closed.sl_price)
+        self.assertEqual(closed.tp_price, Decimal("1.1100"))
+        self.assertEqual(closed.commissions, Decimal("7.0000"))
+        self.assertEqual(closed.swaps, Decimal("-1.5000"))
+        self.assertEqual(closed.profit, Decimal("1000.0000"))
+        self.assertEqual(opened.ticket, 102)
+        self.assertIsNone(opened.closed_at)
+        self.assertIsNone(opened.close_price)
+
+    def test_read_mt5(self) -> None:
+        """
+        Test that closed and open positions are read from a MetaTrader 5 report and orders are skipped.
+        """
+        closed, opened = read_mt5(StringIO(MT5_STATEMENT))
+
+        self.assertEqual(closed.ticket, 201)
+        self.assertEqual(closed.commissions, Decimal("0.7000"))
+        self.assertEqual(closed.closed_at, datetime(2024, 1, 2, 12, tzinfo=UTC))
+        self.assertEqual(opened.ticket, 202)
+        self.assertEqual(opened.swaps, Decimal("-0.1000"))
+        self.assertIsNone(opened.closed_at)
+
+    def test_open_statement_utf16(self) -> None:
+        """
+        Test that UTF-16 encoded MetaTrader 5 reports are decoded.
+        """
+        file = BytesIO(codecs.BOM_UTF16_LE + MT5_STATEMENT.encode("utf-16-le"))
+
+        self.assertEqual(len(list(read_mt5(open_statement(file)))), 2)
+
+
+class ImportStatementTestCase(TestCase):
+    def setUp(self) -> None:
+        """
+        Set up an account with an opening deposit and the symbols of the statements.
+        """
+        self.market = MarketFactory()
+        self.account = AccountFactory()
+        HistoryFactory(
+            account=self.account,
+            profit=Decimal("1000.00"),
+            created_at=datetime(2024, 1, 1, tzinfo=UTC),
+        )
+        SymbolFactory(code="EURUSD", market=self.market)
+        SymbolFactory(code="GBPUSD", market=self.market)
+
+    def test_import_statement(self) -> None:
+        """
+        Test that positions are written in chunks and closed trades are booked in close time order.
+        """
+        result = import_statement(self.account, self.market, StringIO(CSV_STATEMENT), StatementFormat.CSV, chunk_size=2)
+
+        self.assertEqual(result.positions, 4)
+        self.assertEqual(result.history, 3)
+        self.assertListEqual(
+            list(
+                History.objects.filter(account=self.account, position__isnull=False)
+                .order_by("created_at")
+                .values_list("position__ticket", "balance"),
+            ),
+            [(2, Decimal("1009.30")), (1, Decimal("1018.60")), (3, Decimal("996.90"))],
+        )
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("996.90"))
+
+    def test_import_statement_twice(self) -> None:
+        """
+        Test that importing the same statement again changes nothing.
+        """
+        import_statement(self.account, self.market, StringIO(CSV_STATEMENT), StatementFormat.CSV)
+
+        result = import_statement(self.account, self.market, StringIO(CSV_STATEMENT), StatementFormat.CSV)
+
+        self.assertEqual(result.history, 0)
+        self.assertEqual(Position.objects.filter(account=self.account).count(), 4)
+        self.assertEqual(History.objects.filter(account=self.account).count(), 4)
+
+    def test_import_statement_unknown_symbol(self) -> None:
+        """
+        Test that a symbol missing in the market stops the import.
+        """
+        statement = CSV_STATEMENT.replace("GBPUSD", "XAUUSD")
+
+        with pytest.raises(UnknownSymbolError, match="XAUUSD"):
+            import_statement(self.account, self.market, StringIO(statement), StatementFormat.CSV)
+
+    def test_import_statement_invalid_row(self) -> None:
+        """
+        Test that a row missing a required cell or with a garbled one stops the import and is named in the error.
+        """
+        cases = [
+            ("1.10050,", ",", "line 4: open_price is missing"),
+            ("2024-01-02T11:00:00Z", "2024-01-32T11:00:00Z", "line 4: day is out of range"),
+            ("2024-01-02T11:00:00Z", "yesterday", "line 4: 'yesterday' is not a date"),
+            ("0.10,2024-01-02T11", "lots,2024-01-02T11", "line 4: 'lots' is not a number"),
+        ]
+
+        for old, new, error in cases:
+            with self.subTest(error=error), pytest.raises(InvalidStatementError, match=error):
+                import_statement(
+                    self.account,
+                    self.market,
+                    StringIO(CSV_STATEMENT.replace(old, new)),
+                    StatementFormat.CSV,
+                )
+
+    def test_read_mt5_invalid_row(self) -> None:
+        """
+        Test that a closed MetaTrader 5 position without its close time is named in the error.
+        """
+        statement = MT5_STATEMENT.replace("<td></td><td>2024.01.02 12:00:00</td>", "<td></td><td></td>")
+
+        with pytest.raises(InvalidStatementError, match="position 201: close time is missing"):
+            list(read_mt5(StringIO(statement)))
+
+    def test_import_older_statement(self) -> None:
+        """
+        Test that an older statement showing a position as open does not reopen it.
+        """
+        import_statement(self.account, self.market, StringIO(CSV_STATEMENT), StatementFormat.CSV)
+        older = CSV_STATEMENT.replace("2024-01-02T12:00:00Z,1.10100", ",")
+
+        result = import_statement(self.account, self.market, StringIO(older), StatementFormat.CSV)
+
+        self.assertEqual(result.history, 0)
+        position = Position.objects.get(account=self.account, ticket=1)
+        self.assertEqual(position.closed_at, datetime(2024, 1, 2, 12, tzinfo=UTC))
+        self.assertEqual(position.close_price, Decimal("1.1010"))
+
+    def test_command(self) -> None:
+        """
+        Test the import_statement management command.
+        """
+        path = default_storage.path(default_storage.save("statement.csv", ContentFile(CSV_STATEMENT)))
+        out = StringIO()
+
+        call_command("import_statement", self.account.pk, path, market=self.market.pk, stdout=out)
+
+        self.assertEqual(out.getvalue(), "Imported 4 positions, booked 3 history rows.\n")
+
+    def test_command_invalid_statement(self) -> None:
+        """
+        Test that the import_statement management command reports an invalid row as a command error.
+        """
+        statement = CSV_STATEMENT.replace("1.10050,", ",")
+        path = default_storage.path(default_storage.save("statement.csv", ContentFile(statement)))
+
+        with pytest.raises(CommandError, match="line 4: open_price is missing"):
+            call_command("import_statement", self.account.pk, path, market=self.market.pk)
+
+    def test_task(self) -> None:
+        """
+        Test the import_statement Celery task reading from the default storage.
+        """
+        name = default_storage.save("statement.htm", ContentFile(MT4_STATEMENT.encode()))
+        SymbolFactory(code="eurusd", market=self.market)
+
+        result = import_statement_task(self.account.pk, self.market.pk, name, StatementFormat.MT4)
+
+        self.assertDictEqual(result, {"positions": 2, "history": 1})
@@ -0,0 +1,73 @@
+import pytest
+from django.db import connection
+from django.test import TestCase
+
+from trading_journal.journal.models import History, Position
+from trading_journal.journal.tests.factories import AccountFactory, seed_history, seed_positions
+
+
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="EXPLAIN output is PostgreSQL specific")
+class HotQueryPlanTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """
+        Seed enough accounts that a single account is a small slice of each table, then refresh the statistics.
+        """
+        cls.accounts = AccountFactory.create_batch(10)
+
+        for account in cls.accounts:
+            seed_history(account, 500)
+            seed_positions(account, 2000)
+
+        cls.account = cls.accounts[0]
+        cls.position = Position.objects.filter(account=cls.account).first()
+        cls.recent_position = Position.objects.filter(account=cls.account)[1900]
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {History._meta.db_table}")  # noqa: SLF001
+            cursor.execute(f"ANALYZE {Position._meta.db_table}")  # noqa: SLF001
+
+    def assert_index_scan(self, queryset, index: str) -> None:
+        plan = queryset.explain()
+        self.assertNotIn("Seq Scan", plan, plan)
+        self.assertIn(index, plan, plan)
+
+    def test_last_history_row(self) -> None:
+        """
+        Test the "last row" lookup done by every ledger write.
+        """
+        self.assert_index_scan(
+            History.objects.filter(account=self.account).order_by("-created_at", "-id")[:1],
+            "history_account_created_idx",
+        )
+
+    def test_history_position_lookup(self) -> None:
+        """
+        Test the "position already booked" lookup.
+        """
+        self.assert_index_scan(
+            History.objects.filter(account=self.account, position=self.position),
+            "unique_position",
+        )
+
+    def test_positions_by_opened_at(self) -> None:
+        """
+        Test listing an account's recent positions in their default order.
+        """
+        opened_at = self.recent_position.opened_at
+
+        self.assert_index_scan(
+            Position.objects.filter(account=self.account, opened_at__gte=opened_at).order_by("opened_at"),
+            "position_account_opened_idx",
+        )
+
+    def test_positions_by_closed_at(self) -> None:
+        """
+        Test listing an account's positions closed in a date range.
+        """
+        closed_at = self.recent_position.closed_at
+
+        self.assert_index_scan(
+            Position.objects.filter(account=self.account, closed_at__gte=closed_at).order_by("closed_at"),
+            "position_account_closed_idx",
+        )
@@ -0,0 +1,181 @@
+import asyncio
+import json
+from datetime import timedelta
+from decimal import Decimal
+from functools import partial
+from unittest import mock
+
+import fakeredis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.test import TestCase, TransactionTestCase
+
+from trading_journal.journal.live import CLOSE_FORBIDDEN, CLOSE_NOT_FOUND, BalanceHub, balance_application
+from trading_journal.journal.models import History, get_balance_channel
+from trading_journal.journal.tests.factories import AccountFactory, HistoryFactory, PositionFactory
+from trading_journal.journal.types import OperationType
+
+
+class Socket:
+    """
+    The server side of a WebSocket driven through the ASGI interface.
+    """
+
+    def __init__(self, application, path: str, headers: list[tuple[bytes, bytes]], *, timeout: float = 5):
+        self.timeout = timeout
+        self.incoming = asyncio.Queue()
+        self.outgoing = asyncio.Queue()
+        scope = {"type": "websocket", "path": path, "headers": headers}
+        self.task = asyncio.create_task(application(scope, self.incoming.get, self.outgoing.put))
+
+    async def connect(self) -> dict:
+        await self.incoming.put({"type": "websocket.connect"})
+        return await self.next()
+
+    async def next(self) -> dict:
+        return await asyncio.wait_for(self.outgoing.get(), timeout=self.timeout)
+
+    async def disconnect(self):
+        await self.incoming.put({"type": "websocket.disconnect", "code": 1000})
+        await asyncio.wait_for(self.task, timeout=self.timeout)
+
+
+class PublishBalanceChangesTestCase(TestCase):
+    def setUp(self) -> None:
+        """
+        Set up an account with an opening deposit and a subscription to a fake Redis server.
+        """
+        self.account = AccountFactory()
+        HistoryFactory(account=self.account, profit=Decimal("1000.00"))
+        self.account.refresh_from_db()
+        self.redis = fakeredis.FakeRedis()
+        self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        self.pubsub.subscribe(get_balance_channel(self.account.pk))
+        # The confirmation of the subscription is read as None.
+        self.pubsub.get_message()
+        patcher = mock.patch("trading_journal.journal.models.get_redis_connection", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_messages(self) -> list[dict]:
+        messages = []
+
+        while message := self.pubsub.get_message():
+            messages.append(json.loads(message["data"]))
+
+        return messages
+
+    def test_add_row(self) -> None:
+        """
+        Test that the new balance and profit are published once the row is committed.
+        """
+        with self.captureOnCommitCallbacks() as callbacks:
+            History.add_row(self.account, Decimal("-25.50"), OperationType.WITHDRAWAL)
+
+        self.assertListEqual(self.get_messages(), [])
+
+        for callback in callbacks:
+            callback()
+
+        self.assertListEqual(
+            self.get_messages(),
+            [{"account": self.account.pk, "balance": "974.50", "profit": "-25.50", "rows": 1}],
+        )
+
+    def test_add_closed_positions_of_accounts(self) -> None:
+        """
+        Test that a batch of closed positions is published as one message per account.
+        """
+        closed_at = History.objects.get(account=self.account).created_at
+        positions = [
+            PositionFactory(account=self.account, closed_at=closed_at + timedelta(minutes=minute)) for minute in (1, 2)
+        ]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            History.add_closed_positions_of_accounts(positions)
+
+        self.assertListEqual(
+            self.get_messages(),
+            [{"account": self.account.pk, "balance": "1019.00", "profit": "19.00", "rows": 2}],
+        )
+
+    def test_without_redis(self) -> None:
+        """
+        Test that writes succeed when the cache is not Redis and nothing can be published.
+        """
+        with (
+            mock.patch("trading_journal.journal.models.get_redis_connection", side_effect=NotImplementedError),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            History.add_row(self.account, Decimal("1.00"), OperationType.DEPOSIT)
+
+        self.assertListEqual(self.get_messages(), [])
+
+
+class BalanceApplicationTestCase(TransactionTestCase):
+    def setUp(self) -> None:
+        """
+        Set up a logged in owner of an account, someone else's account and a hub listening to a fake Redis server.
+        """
+        self.account = AccountFactory()
+        self.other = AccountFactory()
+        self.client.force_login(self.account.owner)
+        self.cookie = f"{settings.SESSION_COOKIE_NAME}={self.client.cookies[settings.SESSION_COOKIE_NAME].value}"
+        server = fakeredis.FakeServer()
+        self.hub = BalanceHub(connect=partial(fakeredis.FakeAsyncRedis, server=server))
+        self.application = partial(balance_application, hub=self.hub)
+        patcher = mock.patch(
+            "trading_journal.journal.models.get_redis_connection",
+            return_value=fakeredis.FakeRedis(server=server),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def open(self, account_id: int, headers: list[tuple[bytes, bytes]] | None = None) -> Socket:
+        if headers is None:
+            headers = [(b"cookie", self.cookie.encode())]
+
+        return Socket(self.application, f"/ws/journal/accounts/{account_id}/", headers)
+
+    async def test_push(self) -> None:
+        """
+        Test that balance changes of the account are pushed to every socket listening to it.
+        """
+        sockets = [self.open(self.account.pk) for _ in range(2)]
+
+        for socket in sockets:
+            self.assertDictEqual(await socket.connect(), {"type": "websocket.accept"})
+
+        await sync_to_async(History.add_row)(self.account, Decimal("100.00"), OperationType.DEPOSIT)
+
+        for socket in sockets:
+            message = await socket.next()
+            self.assertEqual(message["type"], "websocket.send")
+            self.assertDictEqual(
+                json.loads(message["text"]),
+                {"account": self.account.pk, "balance": "100.00", "profit": "100.00", "rows": 1},
+            )
+            await socket.disconnect()
+
+        self.assertEqual(self.hub.subscribers, 0)
+
+    async def test_forbidden(self) -> None:
+        """
+        Test that sockets of anonymous users, foreign accounts and foreign origins are refused.
+        """
+        for socket in (
+            self.open(self.account.pk, headers=[]),
+            self.open(self.other.pk),
+            self.open(self.account.pk, headers=[(b"cookie", self.cookie.encode()), (b"origin", b"https://evil.com")]),
+        ):
+            self.assertDictEqual(await socket.connect(), {"type": "websocket.close", "code": CLOSE_FORBIDDEN})
+
+        self.assertEqual(self.hub.subscribers, 0)
+
+    async def test_not_found(self) -> None:
+        """
+        Test that sockets to unknown paths are refused.
+        """
+        socket = Socket(self.application, "/ws/journal/accounts/", [])
+
+        self.assertDictEqual(await socket.connect(), {"type": "websocket.close", "code": CLOSE_NOT_FOUND})
@@ -0,0 +1,149 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+
+from trading_journal.journal.loaders import load_history, load_positions
+from trading_journal.journal.models import History, Position
+from trading_journal.journal.tests.factories import AccountFactory, HistoryFactory, PositionFactory
+from trading_journal.journal.types import OperationType
+
+
+class LoadPositionsTestCase(TestCase):
+    def setUp(self) -> None:
+        """
+        Set up an account and an unsaved stream of positions.
+        """
+        self.account = AccountFactory()
+        self.symbol = PositionFactory(account=self.account).symbol
+        self.positions = PositionFactory.build_batch(20, account=self.account, symbol=self.symbol)
+
+    def test_load_positions(self) -> None:
+        """
+        Test that the positions are copied in and existing tickets are updated only when they changed.
+        """
+        self.assertEqual(load_positions(iter(self.positions)), 20)
+
+        self.positions[0].profit = Decimal("-1.0000")
+        self.positions[1].modifications = {"sl": ["1.0900"]}
+
+        with self.assertNumQueries(7):
+            self.assertEqual(load_positions(self.positions), 2)
+
+        self.assertEqual(Position.objects.filter(account=self.account).count(), 21)
+        self.assertEqual(Position.objects.get(account=self.account, ticket=self.positions[0].ticket).profit, -1)
+        self.assertDictEqual(
+            Position.objects.get(account=self.account, ticket=self.positions[1].ticket).modifications,
+            {"sl": ["1.0900"]},
+        )
+
+    def test_load_positions_fallback(self) -> None:
+        """
+        Test the batched upsert used on non-PostgreSQL backends, which counts only the written positions.
+        """
+        with mock.patch.object(connection, "vendor", "sqlite"):
+            self.assertEqual(load_positions(iter(self.positions), batch_size=7), 20)
+            self.assertEqual(load_positions(iter(self.positions), batch_size=7), 0)
+
+        self.assertEqual(Position.objects.filter(account=self.account).count(), 21)
+
+    def test_load_positions_repeated_ticket(self) -> None:
+        """
+        Test that a ticket coming more than once in a load is written once, with its last occurrence.
+        """
+        closed = PositionFactory.build(
+            account=self.account,
+            symbol=self.symbol,
+            ticket=self.positions[0].ticket,
+            profit=Decimal("-5.0000"),
+        )
+        self.positions[0].closed_at = self.positions[0].close_price = None
+
+        for vendor in ("postgresql", "sqlite"):
+            with self.subTest(vendor=vendor), mock.patch.object(connection, "vendor", vendor):
+                Position.objects.filter(ticket=closed.ticket).delete()
+
+                self.assertEqual(load_positions([self.positions[0], closed], batch_size=7), 1)
+
+                position = Position.objects.get(account=self.account, ticket=closed.ticket)
+                self.assertEqual(position.profit, Decimal("-5.0000"))
+                self.assertIsNotNone(position.closed_at)
+
+    def test_load_positions_keeps_closed(self) -> None:
+        """
+        Test that loading an open position does not reopen its stored closed ticket.
+        """
+        load_positions(self.positions)
+        self.positions[0].closed_at = self.positions[0].close_price = None
+
+        for vendor in ("postgresql", "sqlite"):
+            with self.subTest(vendor=vendor), mock.patch.object(connection, "vendor", vendor):
+                self.assertEqual(load_positions(self.positions[:1]), 0)
+
+                position = Position.objects.get(account=self.account, ticket=self.positions[0].ticket)
+                self.assertIsNotNone(position.closed_at)
+                self.assertIsNotNone(position.close_price)
+
+
+class LoadHistoryTestCase(TestCase):
+    def setUp(self) -> None:
+        """
+        Set up an account with an opening deposit and a booked closed position.
+        """
+        self.account = AccountFactory()
+        self.deposit = HistoryFactory(account=self.account, profit=Decimal("1000.00"))
+        self.booked = History.add_closed_position(
+            PositionFactory(account=self.account, closed_at=self.deposit.created_at + timedelta(days=2)),
+        )
+
+    def build_rows(self) -> list[History]:
+        positions = [
+            PositionFactory(account=self.account, closed_at=self.deposit.created_at + timedelta(days=day))
+            for day in (1, 3)
+        ]
+        return [
+            *(
+                History(
+                    account=self.account,
+                    position=position,
+                    operation=OperationType.POSITION_CLOSE,
+                    profit=History.get_position_profit(position),
+                    created_at=position.closed_at,
+                )
+                for position in positions
+            ),
+            History(
+                account=self.account,
+                position=self.booked.position,
+                operation=OperationType.POSITION_CLOSE,
+                profit=Decimal("999.00"),
+                created_at=self.booked.created_at,
+            ),
+        ]
+
+    def assert_balances(self) -> None:
+        self.assertListEqual(
+            list(History.objects.filter(account=self.account).order_by("created_at").values_list("balance", flat=True)),
+            [Decimal("1000.00"), Decimal("1009.50"), Decimal("1019.00"), Decimal("1028.50")],
+        )
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("1028.50"))
+
+    def test_load_history(self) -> None:
+        """
+        Test that new rows are copied in, booked positions are skipped and balances are repaired.
+        """
+        self.assertEqual(load_history(iter(self.build_rows())), 2)
+
+        self.assert_balances()
+
+    def test_load_history_fallback(self) -> None:
+        """
+        Test the ``bulk_create`` path used on non-PostgreSQL backends.
+        """
+        with mock.patch.object(connection, "vendor", "sqlite"):
+            load_history(self.build_rows(), batch_size=2)
+
+        self.assert_balances()
@@ -0,0 +1,131 @@
+from datetime import UTC, datetime
+from decimal import Decimal
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+from django.utils.timezone import now
+
+from trading_journal.journal.models import AccountDailySnapshot, History, Position
+from trading_journal.journal.tests.factories import AccountFactory, PositionFactory
+from trading_journal.journal.types import OperationType
+
+BEFORE = [("journal", "0003_history_position_account_indexes")]
+
+
+class UniqueTicketMigrationTestCase(TransactionTestCase):
+    def setUp(self) -> None:
+        """
+        Set up an account and a symbol, then take the journal back to before the unique ticket constraint.
+        """
+        position = PositionFactory()
+        self.account_id = position.account_id
+        self.symbol_id = position.symbol_id
+        position.delete()
+        self.latest = MigrationExecutor(connection).loader.graph.leaf_nodes("journal")
+        executor = MigrationExecutor(connection)
+        executor.migrate(BEFORE)
+        self.apps = executor.loader.project_state(BEFORE).apps
+
+    def tearDown(self) -> None:
+        MigrationExecutor(connection).migrate(self.latest)
+
+    def add_position(self, ticket: int, *, booked: bool = False):
+        position = self.apps.get_model("journal", "Position").objects.create(
+            account_id=self.account_id,
+            ticket=ticket,
+            symbol_id=self.symbol_id,
+            volume=1,
+            opened_at=now(),
+            open_price=1,
+        )
+
+        if booked:
+            self.apps.get_model("journal", "History").objects.create(
+                account_id=self.account_id,
+                operation=OperationType.POSITION_CLOSE,
+                position_id=position.pk,
+                profit=1,
+                balance=1,
+                created_at=now(),
+            )
+
+        return position
+
+    def test_remove_duplicates(self) -> None:
+        """
+        Test that the latest row of every ticket is kept and takes over a single booking of the ticket.
+        """
+        first = self.add_position(1, booked=True)
+        latest = self.add_position(1)
+        self.add_position(2, booked=True)
+        self.add_position(2, booked=True)
+        twice = self.add_position(2)
+        self.add_position(3, booked=True)
+        booked = self.add_position(3, booked=True)
+        single = self.add_position(4, booked=True)
+
+        MigrationExecutor(connection).migrate(self.latest)
+
+        self.assertListEqual(
+            list(Position.objects.order_by("ticket").values_list("pk", flat=True)),
+            [latest.pk, twice.pk, booked.pk, single.pk],
+        )
+        self.assertFalse(Position.objects.filter(pk=first.pk).exists())
+        self.assertListEqual(
+            list(History.objects.order_by("id").values_list("position_id", flat=True)),
+            [latest.pk, twice.pk, None, None, booked.pk, single.pk],
+        )
+        self.assertEqual(History.objects.count(), 6)
+
+
+class SnapshotBackfillMigrationTestCase(TransactionTestCase):
+    def setUp(self) -> None:
+        """
+        Set up two accounts with history written through the ledger API.
+        """
+        self.latest = MigrationExecutor(connection).loader.graph.leaf_nodes("journal")
+        self.accounts = [AccountFactory(), AccountFactory()]
+
+        for index, account in enumerate(self.accounts):
+            History.add_row(
+                account,
+                Decimal(1000 * (index + 1)),
+                OperationType.DEPOSIT,
+                datetime(2024, 1, 1, tzinfo=UTC),
+            )
+            History.add_closed_positions(
+                account,
+                [
+                    PositionFactory(account=account, closed_at=datetime(2024, 1, 1, 15, tzinfo=UTC)),
+                    PositionFactory(account=account, closed_at=datetime(2024, 1, 3, 10, tzinfo=UTC), profit=-20),
+                ],
+            )
+            History.add_row(account, Decimal(-100), OperationType.WITHDRAWAL, datetime(2024, 1, 3, 12, tzinfo=UTC))
+
+    def snapshots(self) -> list[tuple]:
+        return list(
+            AccountDailySnapshot.objects.order_by("account_id", "day").values_list(
+                "account_id",
+                "day",
+                "closing_balance",
+                "profit",
+                "deposits",
+                "withdrawals",
+                "trades",
+            ),
+        )
+
+    def test_backfill(self) -> None:
+        """
+        Test that the snapshots missing for the history written before the table existed are rebuilt.
+        """
+        recorded = self.snapshots()
+        AccountDailySnapshot.objects.all().delete()
+        executor = MigrationExecutor(connection)
+        executor.migrate([("journal", "0007_apitoken")])
+
+        MigrationExecutor(connection).migrate(self.latest)
+
+        self.assertEqual(len(recorded), 4)
+        self.assertListEqual(self.snapshots(), recorded)
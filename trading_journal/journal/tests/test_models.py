@@ -0,0 +1,682 @@
+from datetime import UTC, date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.utils.timezone import localdate, now
+
+from trading_journal.journal.exceptions import (
+    PositionAccountMismatchError,
+    PositionAlreadyExistsError,
+    PositionNotClosedError,
+    TemporalDisturbanceError,
+)
+from trading_journal.journal.models import AccountDailySnapshot, History, Position, get_summary_cache_stats
+from trading_journal.journal.tests.factories import AccountFactory, HistoryFactory, PositionFactory, seed_history
+from trading_journal.journal.types import AccountSummary, OperationType
+
+
+class AddClosedPositionsTestCase(TestCase):
+    def setUp(self) -> None:
+        """
+        Set up an account with an opening deposit older than any factory-made position.
+        """
+        self.account = AccountFactory()
+        self.deposit = HistoryFactory(
+            account=self.account,
+            profit=Decimal("1000.00"),
+            created_at=now() - timedelta(days=730),
+        )
+
+    def test_add_closed_positions(self) -> None:
+        """
+        Test that the batch is booked in ``closed_at`` order with running balances.
+        """
+        positions = PositionFactory.create_batch(3, account=self.account)
+
+        rows = History.add_closed_positions(self.account, reversed(positions))
+
+        self.assertListEqual([row.position for row in rows], positions)
+        self.assertListEqual(
+            [row.balance for row in History.objects.filter(account=self.account).order_by("created_at")],
+            [Decimal("1000.00"), Decimal("1009.50"), Decimal("1019.00"), Decimal("1028.50")],
+        )
+        self.assertTrue(all(row.operation == OperationType.POSITION_CLOSE for row in rows))
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("1028.50"))
+
+    def test_add_closed_positions_matches_row_by_row(self) -> None:
+        """
+        Test that the batch produces the same balances as booking positions one by one.
+        """
+        other_account = AccountFactory()
+        HistoryFactory(account=other_account, profit=Decimal("1000.00"), created_at=self.deposit.created_at)
+        profits = [Decimal("1.0050"), Decimal("-2.3349"), Decimal("0.0051")]
+
+        for profit in profits:
+            History.add_closed_position(PositionFactory(account=other_account, profit=profit))
+
+        History.add_closed_positions(
+            self.account,
+            [PositionFactory(account=self.account, profit=profit) for profit in profits],
+        )
+
+        self.assertListEqual(
+            list(History.objects.filter(account=self.account).values_list("balance", flat=True)),
+            list(History.objects.filter(account=other_account).values_list("balance", flat=True)),
+        )
+
+    def test_add_closed_positions_query_count(self) -> None:
+        """
+        Test that the number of queries does not depend on the batch size.
+        """
+        positions = PositionFactory.create_batch(50, account=self.account)
+
+        with self.assertNumQueries(9):
+            History.add_closed_positions(self.account, positions)
+
+    def test_add_closed_positions_empty(self) -> None:
+        """
+        Test that an empty batch is a no-op.
+        """
+        with self.assertNumQueries(0):
+            self.assertListEqual(History.add_closed_positions(self.account, []), [])
+
+    def test_add_closed_positions_not_closed(self) -> None:
+        """
+        Test that an open position rejects the whole batch.
+        """
+        positions = [PositionFactory(account=self.account), PositionFactory(account=self.account, closed_at=None)]
+
+        with pytest.raises(PositionNotClosedError):
+            History.add_closed_positions(self.account, positions)
+
+        self.assertEqual(History.objects.filter(account=self.account).count(), 1)
+
+    def test_add_closed_positions_already_exists(self) -> None:
+        """
+        Test that a position already in the history rejects the whole batch.
+        """
+        booked = PositionFactory(account=self.account)
+        History.add_closed_position(booked)
+
+        with pytest.raises(PositionAlreadyExistsError):
+            History.add_closed_positions(self.account, [PositionFactory(account=self.account), booked])
+
+        position = PositionFactory(account=self.account)
+
+        with pytest.raises(PositionAlreadyExistsError):
+            History.add_closed_positions(self.account, [position, position])
+
+        with pytest.raises(PositionAlreadyExistsError):
+            History.add_closed_positions(
+                self.account,
+                [position, PositionFactory.build(account=self.account, ticket=position.ticket)],
+            )
+
+    def test_add_closed_positions_other_account(self) -> None:
+        """
+        Test that a position of another account rejects the whole batch.
+        """
+        positions = [PositionFactory(account=self.account), PositionFactory()]
+
+        with pytest.raises(PositionAccountMismatchError):
+            History.add_closed_positions(self.account, positions)
+
+        self.assertEqual(History.objects.count(), 1)
+
+    def test_add_closed_positions_temporal_disturbance(self) -> None:
+        """
+        Test that a batch older than the last history row is rejected unless forced.
+        """
+        position = PositionFactory(
+            account=self.account,
+            closed_at=self.deposit.created_at - timedelta(days=1),
+        )
+
+        with pytest.raises(TemporalDisturbanceError):
+            History.add_closed_positions(self.account, [position])
+
+        rows = History.add_closed_positions(self.account, [position], force=True)
+
+        self.assertEqual(len(rows), 1)
+
+
+class AddClosedPositionsOfAccountsTestCase(TestCase):
+    def setUp(self) -> None:
+        """
+        Set up three accounts with an opening deposit older than any factory-made position.
+        """
+        self.accounts = AccountFactory.create_batch(3)
+        self.deposits = [
+            HistoryFactory(account=account, profit=Decimal("1000.00"), created_at=now() - timedelta(days=730))
+            for account in self.accounts
+        ]
+
+    def test_add_closed_positions_of_accounts(self) -> None:
+        """
+        Test that every account gets its positions booked in ``closed_at`` order with its own running balance.
+        """
+        positions = [PositionFactory(account=account) for _ in range(2) for account in self.accounts]
+
+        with self.assertNumQueries(9):
+            rows = History.add_closed_positions_of_accounts(reversed(positions))
+
+        self.assertEqual(len(rows), 6)
+
+        for account in self.accounts:
+            account.refresh_from_db()
+            self.assertEqual(account.balance, Decimal("1019.00"))
+            self.assertListEqual(
+                list(History.objects.filter(account=account).order_by("created_at").values_list("balance", flat=True)),
+                [Decimal("1000.00"), Decimal("1009.50"), Decimal("1019.00")],
+            )
+            self.assertEqual(account.daily_snapshots.get(day=localdate(positions[0].closed_at)).trades, 2)
+
+    def test_add_closed_positions_of_accounts_backdated(self) -> None:
+        """
+        Test that a backdated account is rejected unless forced, and then rebalanced on its own.
+        """
+        backdated = PositionFactory(account=self.accounts[0], closed_at=self.deposits[0].created_at - timedelta(days=1))
+        position = PositionFactory(account=self.accounts[1])
+
+        with pytest.raises(TemporalDisturbanceError):
+            History.add_closed_positions_of_accounts([backdated, position])
+
+        History.add_closed_positions_of_accounts([backdated, position], force=True)
+
+        self.accounts[0].refresh_from_db()
+        self.accounts[1].refresh_from_db()
+        self.assertEqual(self.accounts[0].balance, Decimal("1009.50"))
+        self.assertEqual(self.accounts[1].balance, Decimal("1009.50"))
+        self.assertEqual(History.objects.get(position=backdated).balance, Decimal("9.50"))
+
+    def test_add_closed_positions_of_accounts_already_exists(self) -> None:
+        """
+        Test that a position already in the history rejects the whole batch.
+        """
+        booked = PositionFactory(account=self.accounts[0])
+        History.add_closed_position(booked)
+
+        with pytest.raises(PositionAlreadyExistsError):
+            History.add_closed_positions_of_accounts([PositionFactory(account=self.accounts[1]), booked])
+
+        with pytest.raises(PositionAlreadyExistsError):
+            History.add_closed_positions_of_accounts(
+                [booked, PositionFactory.build(account=self.accounts[0], ticket=booked.ticket)],
+            )
+
+        self.assertEqual(History.objects.filter(account=self.accounts[1]).count(), 1)
+
+
+class RecalculateBalanceTestCase(TestCase):
+    def setUp(self) -> None:
+        """
+        Set up an account with stale history balances.
+        """
+        self.account = AccountFactory()
+        self.other_account = AccountFactory()
+        seed_history(self.account, 10)
+        seed_history(self.other_account, 3)
+
+    def assert_balances_recalculated(self) -> None:
+        self.assertListEqual(
+            list(History.objects.filter(account=self.account).values_list("balance", flat=True)),
+            [Decimal(balance) for balance in (-50, 50, 0, 100, 50, 150, 100, 200, 150, 250)],
+        )
+        self.assertFalse(History.objects.filter(account=self.other_account).exclude(balance=0).exists())
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("250.00"))
+
+    def test_recalculate_balance(self) -> None:
+        """
+        Test that every row of the account gets its running balance in a constant number of queries.
+        """
+        with self.assertNumQueries(12):
+            History.recalculate_balance(self.account)
+
+        self.assert_balances_recalculated()
+
+        # Planner settings are left as they were for the rest of the transaction.
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW enable_nestloop")
+            self.assertEqual(cursor.fetchone()[0], "on")
+
+    def test_recalculate_balance_fallback(self) -> None:
+        """
+        Test the chunked ``bulk_update`` path used on non-PostgreSQL backends, which streams the rows.
+        """
+        with (
+            mock.patch.object(connection, "vendor", "sqlite"),
+            mock.patch(
+                "trading_journal.journal.models.RECALCULATE_BATCH_SIZE",
+                4,
+            ),
+            mock.patch.object(QuerySet, "iterator", autospec=True, side_effect=QuerySet.iterator) as iterator,
+        ):
+            History.recalculate_balance(self.account)
+
+        self.assert_balances_recalculated()
+        self.assertEqual(iterator.call_args.kwargs, {"chunk_size": 4})
+
+    def test_recalculate_balance_empty(self) -> None:
+        """
+        Test that an account without history ends up with a zero balance.
+        """
+        account = AccountFactory(balance=Decimal("12.34"))
+
+        History.recalculate_balance(account)
+
+        account.refresh_from_db()
+        self.assertEqual(account.balance, Decimal(0))
+
+
+class BackdatedRowTestCase(TestCase):
+    def setUp(self) -> None:
+        """
+        Set up an account with ten rows of history with correct balances.
+        """
+        self.account = AccountFactory()
+        seed_history(self.account, 10)
+        History.recalculate_balance(self.account)
+        self.rows = list(History.objects.filter(account=self.account).order_by("created_at"))
+
+    def assert_balances_consistent(self) -> None:
+        balance = Decimal(0)
+
+        for row in History.objects.filter(account=self.account).order_by("created_at", "id"):
+            balance += row.profit
+            self.assertEqual(row.balance, balance)
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, balance)
+
+    def test_add_row_backdated(self) -> None:
+        """
+        Test that a forced backdated row repairs the balances of the rows after it.
+        """
+        row = History.add_row(
+            self.account,
+            Decimal("7.00"),
+            OperationType.DIVIDENDS,
+            self.rows[5].created_at - timedelta(seconds=1),
+            force=True,
+        )
+
+        self.assertEqual(row.balance, self.rows[4].balance + Decimal("7.00"))
+        self.assertEqual(self.account.balance, Decimal("257.00"))
+        self.assert_balances_consistent()
+
+    def test_add_row_backdated_leaves_earlier_rows(self) -> None:
+        """
+        Test that rows before the backdated one are not rewritten.
+        """
+        History.objects.filter(pk=self.rows[0].pk).update(balance=Decimal("999.00"))
+
+        History.add_row(
+            self.account,
+            Decimal("7.00"),
+            OperationType.DIVIDENDS,
+            self.rows[5].created_at - timedelta(seconds=1),
+            force=True,
+        )
+
+        self.assertEqual(History.objects.get(pk=self.rows[0].pk).balance, Decimal("999.00"))
+
+    def test_add_closed_position_backdated(self) -> None:
+        """
+        Test that a forced backdated closed position repairs the balances of the rows after it.
+        """
+        position = PositionFactory(account=self.account, closed_at=self.rows[2].created_at)
+
+        row = History.add_closed_position(position, force=True)
+
+        self.assertEqual(row.balance, self.rows[2].balance + Decimal("9.50"))
+        self.assert_balances_consistent()
+
+    def test_add_closed_positions_backdated(self) -> None:
+        """
+        Test that a forced backdated batch is interleaved with the existing rows.
+        """
+        positions = [
+            PositionFactory(account=self.account, closed_at=self.rows[n].created_at + timedelta(seconds=1))
+            for n in (1, 6, 9)
+        ]
+
+        rows = History.add_closed_positions(self.account, positions, force=True)
+
+        self.assertListEqual(
+            [row.balance for row in rows],
+            [self.rows[n].balance + Decimal("9.50") * (i + 1) for i, n in enumerate((1, 6, 9))],
+        )
+        self.assert_balances_consistent()
+
+    def test_add_row_backdated_fallback(self) -> None:
+        """
+        Test the backdated repair on non-PostgreSQL backends.
+        """
+        with mock.patch.object(connection, "vendor", "sqlite"):
+            History.add_row(
+                self.account,
+                Decimal("-3.00"),
+                OperationType.WITHDRAWAL,
+                self.rows[0].created_at,
+                force=True,
+            )
+
+        self.assert_balances_consistent()
+
+
+class SameTimeRowsTestCase(TestCase):
+    def setUp(self) -> None:
+        """
+        Set up an account whose last two rows share their time, and the planner without indexes.
+        """
+        self.account = AccountFactory()
+        self.created_at = now() - timedelta(days=1)
+        HistoryFactory(
+            account=self.account,
+            profit=Decimal("100.00"),
+            balance=Decimal("100.00"),
+            created_at=self.created_at,
+        )
+        HistoryFactory(
+            account=self.account,
+            profit=Decimal("50.00"),
+            balance=Decimal("150.00"),
+            created_at=self.created_at,
+        )
+        # The index lists ties by id anyway, without it their order is up to the sort.
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_indexscan = off")
+            cursor.execute("SET LOCAL enable_bitmapscan = off")
+
+    def test_add_row(self) -> None:
+        """
+        Test that a row is booked on top of the last row.
+        """
+        row = History.add_row(self.account, Decimal("10.00"), OperationType.DEPOSIT, self.created_at)
+
+        self.assertEqual(row.balance, Decimal("160.00"))
+
+    def test_add_closed_position(self) -> None:
+        """
+        Test that a closed position is booked on top of the last row.
+        """
+        row = History.add_closed_position(PositionFactory(account=self.account, closed_at=self.created_at))
+
+        self.assertEqual(row.balance, Decimal("159.50"))
+
+    def test_add_closed_positions(self) -> None:
+        """
+        Test that a batch is booked on top of the last row.
+        """
+        rows = History.add_closed_positions(
+            self.account,
+            [PositionFactory(account=self.account, closed_at=self.created_at)],
+        )
+
+        self.assertEqual(rows[-1].balance, Decimal("159.50"))
+
+    def test_add_closed_positions_of_accounts(self) -> None:
+        """
+        Test that a batch of many accounts is booked on top of the last row of each.
+        """
+        rows = History.add_closed_positions_of_accounts(
+            [PositionFactory(account=self.account, closed_at=self.created_at)],
+        )
+
+        self.assertEqual(rows[-1].balance, Decimal("159.50"))
+
+
+class PositionUpsertTestCase(TestCase):
+    def setUp(self) -> None:
+        """
+        Set up an account and an unsaved broker statement.
+        """
+        self.account = AccountFactory()
+        self.statement = PositionFactory.build_batch(
+            25,
+            account=self.account,
+            symbol=PositionFactory(account=self.account).symbol,
+        )
+
+    def build_statement(self) -> list[Position]:
+        return [
+            Position(**{field.attname: getattr(position, field.attname) for field in Position._meta.concrete_fields})  # noqa: SLF001
+            for position in self.statement
+        ]
+
+    def test_upsert_inserts(self) -> None:
+        """
+        Test that new positions are inserted and get their primary keys.
+        """
+        positions = Position.upsert(self.build_statement(), batch_size=10)
+
+        self.assertTrue(all(position.pk for position in positions))
+        self.assertEqual(Position.objects.filter(account=self.account).count(), 26)
+
+    def test_upsert_twice_changes_nothing(self) -> None:
+        """
+        Test that re-importing the same statement writes nothing and costs no more queries than the first import.
+        """
+        with self.assertNumQueries(8):
+            first = Position.upsert(self.build_statement(), batch_size=10)
+
+        with self.assertNumQueries(5):
+            second = Position.upsert(self.build_statement(), batch_size=10)
+
+        self.assertListEqual([position.pk for position in first], [position.pk for position in second])
+        self.assertEqual(Position.objects.filter(account=self.account).count(), 26)
+
+    def test_upsert_updates(self) -> None:
+        """
+        Test that changed positions are updated in place.
+        """
+        first = Position.upsert(self.build_statement())
+        statement = self.build_statement()
+        statement[3].profit = Decimal("-42.0000")
+        statement[3].sl_price = Decimal("1.2345")
+
+        with self.assertNumQueries(4):
+            second = Position.upsert(statement)
+
+        self.assertEqual(second[3].pk, first[3].pk)
+        position = Position.objects.get(pk=first[3].pk)
+        self.assertEqual(position.profit, Decimal("-42.0000"))
+        self.assertEqual(position.sl_price, Decimal("1.2345"))
+
+    def test_upsert_keeps_closed(self) -> None:
+        """
+        Test that an open position does not reopen a stored closed one and takes over its values instead.
+        """
+        first = Position.upsert(self.build_statement())
+        statement = self.build_statement()
+        statement[3].closed_at = None
+        statement[3].close_price = None
+
+        with self.assertNumQueries(3):
+            second = Position.upsert(statement)
+
+        self.assertEqual(second[3].closed_at, first[3].closed_at)
+        self.assertEqual(second[3].close_price, first[3].close_price)
+        position = Position.objects.get(pk=first[3].pk)
+        self.assertEqual(position.closed_at, first[3].closed_at)
+        self.assertEqual(position.close_price, first[3].close_price)
+
+    def test_unique_ticket(self) -> None:
+        """
+        Test that a ticket can exist only once per account.
+        """
+        position = PositionFactory(account=self.account)
+
+        with pytest.raises(IntegrityError):
+            PositionFactory(account=self.account, ticket=position.ticket)
+
+
+class AccountDailySnapshotTestCase(TestCase):
+    def setUp(self) -> None:
+        """
+        Set up an account with two days of history written through the ledger API.
+        """
+        self.account = AccountFactory()
+        History.add_row(self.account, Decimal("1000.00"), OperationType.DEPOSIT, datetime(2024, 1, 1, 9, tzinfo=UTC))
+        History.add_closed_position(
+            PositionFactory(account=self.account, closed_at=datetime(2024, 1, 1, 15, tzinfo=UTC)),
+        )
+        History.add_closed_positions(
+            self.account,
+            [
+                PositionFactory(account=self.account, closed_at=datetime(2024, 1, 1, 20, tzinfo=UTC)),
+                PositionFactory(account=self.account, closed_at=datetime(2024, 1, 3, 10, tzinfo=UTC), profit=-20),
+            ],
+        )
+        History.add_row(
+            self.account,
+            Decimal("-100.00"),
+            OperationType.WITHDRAWAL,
+            datetime(2024, 1, 3, 11, tzinfo=UTC),
+        )
+
+    def get_snapshots(self) -> list[tuple]:
+        return list(
+            AccountDailySnapshot.objects.filter(account=self.account).values_list(
+                "day",
+                "closing_balance",
+                "profit",
+                "deposits",
+                "withdrawals",
+                "trades",
+            ),
+        )
+
+    def test_record(self) -> None:
+        """
+        Test that every ledger write updates the snapshot of its day.
+        """
+        self.assertListEqual(
+            self.get_snapshots(),
+            [
+                (date(2024, 1, 1), Decimal("1019.00"), Decimal("19.00"), Decimal("1000.00"), Decimal(0), 2),
+                (date(2024, 1, 3), Decimal("898.50"), Decimal("-20.50"), Decimal(0), Decimal("-100.00"), 1),
+            ],
+        )
+
+    def test_rebuild(self) -> None:
+        """
+        Test that rebuilding from scratch yields the incrementally maintained snapshots.
+        """
+        expected = self.get_snapshots()
+        AccountDailySnapshot.objects.filter(account=self.account).update(closing_balance=0, trades=0)
+
+        AccountDailySnapshot.rebuild(self.account)
+
+        self.assertListEqual(self.get_snapshots(), expected)
+
+    def test_backdated_row(self) -> None:
+        """
+        Test that a backdated row adds its day and moves the closing balances of the later days.
+        """
+        History.add_row(
+            self.account,
+            Decimal("50.00"),
+            OperationType.DIVIDENDS,
+            datetime(2024, 1, 2, 12, tzinfo=UTC),
+            force=True,
+        )
+
+        self.assertListEqual(
+            [(day, closing_balance, profit) for day, closing_balance, profit, *_ in self.get_snapshots()],
+            [
+                (date(2024, 1, 1), Decimal("1019.00"), Decimal("19.00")),
+                (date(2024, 1, 2), Decimal("1069.00"), Decimal("50.00")),
+                (date(2024, 1, 3), Decimal("948.50"), Decimal("-20.50")),
+            ],
+        )
+
+    def test_command(self) -> None:
+        """
+        Test the rebuild_snapshots management command.
+        """
+        AccountDailySnapshot.objects.all().delete()
+        out = StringIO()
+
+        call_command("rebuild_snapshots", self.account.pk, stdout=out)
+
+        self.assertEqual(len(self.get_snapshots()), 2)
+        self.assertEqual(out.getvalue(), "Rebuilt the daily snapshots of 1 accounts.\n")
+
+
+class AccountSummaryTestCase(TestCase):
+    def setUp(self) -> None:
+        """
+        Set up an account with a deposit, a closed and an open position, and an empty cache.
+        """
+        cache.clear()
+        self.account = AccountFactory()
+        History.add_row(self.account, Decimal("1000.00"), OperationType.DEPOSIT, now() - timedelta(minutes=2))
+        self.closed = PositionFactory(account=self.account, closed_at=now())
+        History.add_closed_position(self.closed)
+        self.opened = PositionFactory(account=self.account, closed_at=None, opened_at=now())
+
+    def test_get_summary(self) -> None:
+        """
+        Test that the summary is computed once and then served from the cache.
+        """
+        expected = AccountSummary(
+            balance=Decimal("1009.50"),
+            open_positions=1,
+            today_profit=Decimal("9.50"),
+            last_trade_at=self.opened.opened_at,
+        )
+
+        with self.assertNumQueries(3):
+            self.assertEqual(self.account.get_summary(), expected)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.account.get_summary(), expected)
+
+        self.assertDictEqual(get_summary_cache_stats(), {"hits": 1, "misses": 1})
+
+    def test_history_write_invalidates(self) -> None:
+        """
+        Test that a history write replaces the cached summary once it is committed.
+        """
+        self.account.get_summary()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            History.add_row(self.account, Decimal("-9.50"), OperationType.WITHDRAWAL)
+            # Until the write commits, the cached summary is still the committed state.
+            self.assertEqual(self.account.get_summary().balance, Decimal("1009.50"))
+
+        self.assertEqual(self.account.get_summary().balance, Decimal("1000.00"))
+
+    def test_recalculate_balance_invalidates(self) -> None:
+        """
+        Test that recalculating the balance replaces the cached summary.
+        """
+        self.account.get_summary()
+        History.objects.filter(position=self.closed).update(profit=Decimal("19.50"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            History.recalculate_balance(self.account)
+
+        self.assertEqual(self.account.get_summary().balance, Decimal("1019.50"))
+
+    def test_position_save_invalidates(self) -> None:
+        """
+        Test that saving a position replaces the cached summary.
+        """
+        self.account.get_summary()
+        self.opened.closed_at = now()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.opened.save()
+
+        self.assertEqual(self.account.get_summary().open_positions, 0)
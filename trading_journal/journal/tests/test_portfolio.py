@@ -0,0 +1,69 @@
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+
+from trading_journal.journal.portfolio import get_equity_curve, get_owner_equity_curve
+from trading_journal.journal.tests.factories import AccountFactory, HistoryFactory
+
+STARTED_AT = datetime(2024, 1, 1, tzinfo=UTC)
+
+
+class EquityCurveTestCase(TestCase):
+    def setUp(self) -> None:
+        """
+        Set up two accounts of one owner with interleaved history rows, and an account of someone else.
+        """
+        self.first = AccountFactory()
+        self.second = AccountFactory(owner=self.first.owner)
+        self.other = AccountFactory()
+
+        for minute, account, profit, balance in (
+            (0, self.first, "100.00", "100.00"),
+            (1, self.second, "50.00", "50.00"),
+            (2, self.first, "-20.00", "80.00"),
+            (2, self.second, "10.00", "60.00"),
+            (3, self.other, "1000.00", "1000.00"),
+            (4, self.second, "-60.00", "0.00"),
+        ):
+            HistoryFactory(
+                account=account,
+                profit=Decimal(profit),
+                balance=Decimal(balance),
+                created_at=STARTED_AT + timedelta(minutes=minute),
+            )
+
+    def test_get_equity_curve(self) -> None:
+        """
+        Test that rows of all accounts are merged in time order with the combined balance after each of them.
+        """
+        curve = list(get_equity_curve([self.first, self.second], chunk_size=2))
+
+        self.assertListEqual(
+            [(point.account_id, point.profit, point.balance) for point in curve],
+            [
+                (self.first.pk, Decimal("100.00"), Decimal("100.00")),
+                (self.second.pk, Decimal("50.00"), Decimal("150.00")),
+                (self.first.pk, Decimal("-20.00"), Decimal("130.00")),
+                (self.second.pk, Decimal("10.00"), Decimal("140.00")),
+                (self.second.pk, Decimal("-60.00"), Decimal("80.00")),
+            ],
+        )
+        self.assertListEqual([point.created_at for point in curve], sorted(point.created_at for point in curve))
+
+    def test_since(self) -> None:
+        """
+        Test that a curve starting later opens with the balances the accounts had at that time.
+        """
+        curve = list(get_equity_curve([self.first, self.second], since=STARTED_AT + timedelta(minutes=2)))
+
+        self.assertListEqual([point.balance for point in curve], [Decimal("130.00"), Decimal("140.00"), Decimal(80)])
+
+    def test_get_owner_equity_curve(self) -> None:
+        """
+        Test that the owner's curve covers all of their accounts and nobody else's.
+        """
+        curve = list(get_owner_equity_curve(self.first.owner))
+
+        self.assertSetEqual({point.account_id for point in curve}, {self.first.pk, self.second.pk})
+        self.assertEqual(curve[-1].balance, Decimal("80.00"))
@@ -0,0 +1,78 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.test import TestCase
+
+from trading_journal.journal.stats import TradeStatistics, compute_statistics, get_trade_statistics
+from trading_journal.journal.tests.factories import AccountFactory, PositionFactory
+
+
+class ComputeStatisticsTestCase(TestCase):
+    def test_compute_statistics(self) -> None:
+        """
+        Test every figure on a short series with known results.
+        """
+        profits = np.array([10.0, 20.0, -5.0, -15.0, -10.0, 30.0, 0.0])
+
+        stats = compute_statistics(profits, np.array([60, 120], dtype="m8[s]"))
+
+        self.assertEqual(stats.trades, 7)
+        self.assertEqual(stats.wins, 3)
+        self.assertEqual(stats.losses, 3)
+        self.assertAlmostEqual(stats.win_rate, 3 / 7)
+        self.assertAlmostEqual(stats.net_profit, 30.0)
+        self.assertAlmostEqual(stats.expectancy, 30 / 7)
+        self.assertAlmostEqual(stats.profit_factor, 2.0)
+        self.assertAlmostEqual(stats.average_win, 20.0)
+        self.assertAlmostEqual(stats.average_loss, 10.0)
+        self.assertAlmostEqual(stats.payoff_ratio, 2.0)
+        self.assertEqual(stats.longest_win_streak, 2)
+        self.assertEqual(stats.longest_loss_streak, 3)
+        self.assertAlmostEqual(stats.max_drawdown, 30.0)
+        self.assertEqual(stats.average_holding_time, timedelta(seconds=90))
+
+    def test_compute_statistics_without_losses(self) -> None:
+        """
+        Test that ratios dividing by losses are undefined and a rising curve has no drawdown.
+        """
+        stats = compute_statistics(np.array([1.0, 2.0]))
+
+        self.assertIsNone(stats.profit_factor)
+        self.assertIsNone(stats.average_loss)
+        self.assertIsNone(stats.payoff_ratio)
+        self.assertIsNone(stats.average_holding_time)
+        self.assertEqual(stats.max_drawdown, 0.0)
+
+    def test_compute_statistics_empty(self) -> None:
+        """
+        Test that no trades give empty statistics.
+        """
+        self.assertEqual(compute_statistics(np.array([])), TradeStatistics())
+
+
+class GetTradeStatisticsTestCase(TestCase):
+    def test_get_trade_statistics(self) -> None:
+        """
+        Test that closed positions are read in close time order with swaps and commissions applied.
+        """
+        account = AccountFactory()
+        last = PositionFactory(account=account, profit=Decimal("-20.0000"), swaps=None, commissions=None)
+        first = PositionFactory(
+            account=account,
+            closed_at=last.closed_at - timedelta(days=1),
+            swaps=Decimal("1.0000"),
+        )
+        PositionFactory(account=account, closed_at=None)
+        PositionFactory()
+
+        stats = get_trade_statistics(account)
+
+        self.assertEqual(stats.trades, 2)
+        self.assertAlmostEqual(stats.net_profit, -9.5)
+        self.assertAlmostEqual(stats.max_drawdown, 20.0)
+        self.assertEqual(stats.longest_win_streak, 1)
+        self.assertEqual(
+            get_trade_statistics(account, until=last.closed_at).average_holding_time,
+            first.closed_at - first.opened_at,
+        )
@@ -1,3 +1,7 @@
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+
 from django.db.models import TextChoices
 from django.utils.translation import gettext_lazy as _
 
@@ -7,3 +11,38 @@ class OperationType(TextChoices):
     DIVIDENDS = "DI", _("Dividends")
     POSITION_CLOSE = "PC", _("Position Close")
     WITHDRAWAL = "WD", _("Withdrawal")
+
+
+class EventType(TextChoices):
+    OPEN = "open", _("Position opened")
+    MODIFY = "modify", _("Stop loss or take profit modified")
+    CLOSE = "close", _("Position closed")
+
+
+class ExportFormat(TextChoices):
+    CSV = "csv", _("CSV")
+    JSONL = "jsonl", _("JSON lines")
+
+
+class ColumnarFormat(TextChoices):
+    PARQUET = "parquet", _("Parquet")
+    ARROW = "arrow", _("Arrow IPC")
+
+
+class ExportKind(TextChoices):
+    POSITIONS = "positions", _("Positions")
+    HISTORY = "history", _("History")
+
+
+class StatementFormat(TextChoices):
+    CSV = "csv", _("CSV")
+    MT4 = "mt4", _("MetaTrader 4 HTML statement")
+    MT5 = "mt5", _("MetaTrader 5 HTML report")
+
+
+@dataclass(frozen=True, slots=True)
+class AccountSummary:
+    balance: Decimal
+    open_positions: int
+    today_profit: Decimal
+    last_trade_at: datetime | None
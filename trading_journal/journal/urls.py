@@ -0,0 +1,11 @@
+from django.urls import path
+
+from trading_journal.journal.types import ExportKind
+from trading_journal.journal.views import EventsView, ExportView
+
+app_name = "journal"
+urlpatterns = [
+    path("events/", EventsView.as_view(), name="events"),
+    path("export/positions/", ExportView.as_view(kind=ExportKind.POSITIONS), name="export-positions"),
+    path("export/history/", ExportView.as_view(kind=ExportKind.HISTORY), name="export-history"),
+]
@@ -0,0 +1,84 @@
+import json
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.utils.timezone import now
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from trading_journal.journal import messages
+from trading_journal.journal.events import push_events, validate_events
+from trading_journal.journal.exceptions import InvalidEventError
+from trading_journal.journal.exporters import CONTENT_TYPES, aiter_chunks, export_rows, get_export_rows
+from trading_journal.journal.forms import ExportForm
+from trading_journal.journal.models import Account, ApiToken
+from trading_journal.journal.tasks import drain_events
+from trading_journal.journal.types import ExportKind
+
+
+class ExportView(LoginRequiredMixin, View):
+    """
+    Stream the positions or history of the user's accounts, or of one of them, as a file download.
+    """
+
+    raise_exception = True
+    kind = ExportKind.POSITIONS
+
+    def get(self, request, *args, **kwargs):
+        form = ExportForm(request.GET, owner=request.user)
+
+        if not form.is_valid():
+            return HttpResponseBadRequest(form.errors.as_json(), content_type="application/json")
+
+        export_format = form.cleaned_data["format"]
+        chunks = export_rows(
+            export_format,
+            *get_export_rows(
+                self.kind,
+                form.get_accounts(),
+                form.cleaned_data["since"],
+                form.cleaned_data["until"],
+            ),
+        )
+
+        if isinstance(request, ASGIRequest):
+            chunks = aiter_chunks(chunks)
+
+        response = StreamingHttpResponse(chunks, content_type=CONTENT_TYPES[export_format])
+        filename = f"{self.kind}-{now():%Y%m%d%H%M%S}.{export_format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+        return response
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class EventsView(View):
+    """
+    Accept a JSON array of trade events of the token owner's accounts and buffer them for the event consumers.
+
+    Clients are trading terminals rather than browsers, so they authenticate with an ``Authorization: Bearer``
+    API token instead of a session. Without a session there is nothing to forge, hence no CSRF check.
+    """
+
+    def post(self, request, *args, **kwargs):
+        if (owner := ApiToken.authenticate(request.headers.get("Authorization", ""))) is None:
+            response = JsonResponse({"error": str(messages.INVALID_API_TOKEN)}, status=401)
+            response["WWW-Authenticate"] = "Bearer"
+            return response
+
+        try:
+            events = json.loads(request.body)
+            account_ids = {event.get("account") for event in events if isinstance(event, dict)}
+            validate_events(
+                events,
+                set(Account.objects.filter(owner=owner, pk__in=account_ids).values_list("pk", flat=True)),
+            )
+        except (ValueError, TypeError, InvalidEventError) as error:
+            return JsonResponse({"error": str(error)}, status=400)
+
+        for shard in push_events(events):
+            drain_events.delay(shard)
+
+        return JsonResponse({"accepted": len(events)}, status=202)
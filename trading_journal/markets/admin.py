@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from trading_journal.markets.models import Broker, Market, Symbol, SymbolType
+from trading_journal.core.helpers import annotate_joined_m2m_names
+from trading_journal.markets.models import Broker, ExchangeRate, Market, Symbol, SymbolType
 
 
 @admin.register(Broker)
@@ -10,6 +11,17 @@ class BrokerAdmin(admin.ModelAdmin):
     list_display_links = list_display
     search_fields = ("name",)
 
+    def get_queryset(self, request):
+        return annotate_joined_m2m_names(super().get_queryset(request), "markets")
+
+
+@admin.register(ExchangeRate)
+class ExchangeRateAdmin(admin.ModelAdmin):
+    date_hierarchy = "day"
+    list_display = ("day", "base", "currency", "rate")
+    list_display_links = list_display
+    list_filter = ("base", "currency")
+
 
 @admin.register(Market)
 class MarketAdmin(admin.ModelAdmin):
@@ -23,6 +35,7 @@ class SymbolAdmin(admin.ModelAdmin):
     autocomplete_fields = ("brokers", "market")
     list_display = ("pk", "name", "code", "type", "market")
     list_display_links = list_display
+    list_select_related = ("type", "market")
     list_filter = ("type", "market")
     search_fields = ("name", "code")
 
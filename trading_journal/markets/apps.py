@@ -1,3 +1,5 @@
+import contextlib
+
 from django.apps import AppConfig
 from django.utils.translation import gettext_lazy as _
 
@@ -5,3 +7,7 @@ from django.utils.translation import gettext_lazy as _
 class MarketsConfig(AppConfig):
     name = "trading_journal.markets"
     verbose_name = _("Markets")
+
+    def ready(self):
+        with contextlib.suppress(ImportError):
+            import trading_journal.markets.signals  # noqa: F401
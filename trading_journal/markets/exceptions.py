@@ -0,0 +1,6 @@
+from trading_journal.core.exceptions import CoreError
+from trading_journal.markets import messages
+
+
+class MissingExchangeRateError(CoreError):
+    error_message = messages.MISSING_EXCHANGE_RATE
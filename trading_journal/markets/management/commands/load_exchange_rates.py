@@ -0,0 +1,20 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from trading_journal.markets.rates import LOAD_BATCH_SIZE, load_rates, read_rates_csv
+
+
+class Command(BaseCommand):
+    help = "Load daily exchange rates from a CSV file with day, currency, rate and optionally base columns."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path, help="CSV file")
+        parser.add_argument("--base", help="Base currency of every rate, instead of a base column")
+        parser.add_argument("--batch-size", type=int, default=LOAD_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        with options["path"].open(newline="", encoding="utf-8-sig") as file:
+            written = load_rates(read_rates_csv(file, options["base"]), batch_size=options["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"Loaded {written} exchange rates."))
@@ -0,0 +1,3 @@
+from django.utils.translation import gettext_lazy as _
+
+MISSING_EXCHANGE_RATE = _("Missing exchange rate")
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.9 on 2026-10-17 08:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('markets', '0002_alter_symboltype_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Day')),
+                ('base', models.CharField(max_length=3, verbose_name='Base currency')),
+                ('currency', models.CharField(max_length=3, verbose_name='Currency')),
+                ('rate', models.DecimalField(decimal_places=8, max_digits=18, verbose_name='Rate')),
+            ],
+            options={
+                'verbose_name': 'Exchange Rate',
+                'verbose_name_plural': 'Exchange Rates',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='exchangerate',
+            constraint=models.UniqueConstraint(fields=('base', 'currency', 'day'), name='unique_exchange_rate'),
+        ),
+    ]
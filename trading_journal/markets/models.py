@@ -82,3 +82,24 @@ class Symbol(models.Model):
     @cached_property
     def brokers_names(self) -> str:
         return get_joined_m2m_names(self, "brokers")
+
+
+class ExchangeRate(models.Model):
+    """
+    Daily exchange rate, one unit of the ``base`` currency costs ``rate`` units of ``currency`` on ``day``.
+    """
+
+    day = models.DateField(_("Day"))
+    base = models.CharField(_("Base currency"), max_length=3)
+    currency = models.CharField(_("Currency"), max_length=3)
+    rate = models.DecimalField(_("Rate"), max_digits=18, decimal_places=8)
+
+    class Meta:
+        verbose_name = _("Exchange Rate")
+        verbose_name_plural = _("Exchange Rates")
+        constraints = [
+            models.UniqueConstraint(fields=["base", "currency", "day"], name="unique_exchange_rate"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.base}/{self.currency} {self.rate}"
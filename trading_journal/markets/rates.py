@@ -0,0 +1,177 @@
+import csv
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from datetime import date
+from decimal import Decimal
+from itertools import islice
+from typing import IO
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from trading_journal.markets.exceptions import MissingExchangeRateError
+from trading_journal.markets.models import ExchangeRate
+
+RATES_CACHE_PREFIX = "markets:rates"
+LOAD_BATCH_SIZE = 5000
+
+
+def get_rates_version() -> int:
+    # A version key lost to eviction restarts from the clock, above every version used before.
+    return cache.get_or_set(f"{RATES_CACHE_PREFIX}:version", time.time_ns, timeout=None)
+
+
+def _bump_rates_version():
+    try:
+        cache.incr(f"{RATES_CACHE_PREFIX}:version")
+    except ValueError:
+        get_rates_version()
+
+
+def invalidate_rates():
+    """
+    Drop the exchange rates cached by all workers once the current transaction commits.
+    """
+    transaction.on_commit(_bump_rates_version)
+
+
+def read_rates_csv(file: IO[str], base: str | None = None) -> Iterator[ExchangeRate]:
+    """
+    Read daily rates from a CSV file with ``day``, ``currency`` and ``rate`` columns.
+
+    The base currency is read from a ``base`` column, unless ``base`` is given for the whole file.
+    """
+    for record in csv.DictReader(file):
+        yield ExchangeRate(
+            day=parse_date(record["day"].strip()),
+            base=(base or record["base"]).strip().upper(),
+            currency=record["currency"].strip().upper(),
+            rate=Decimal(record["rate"].strip()),
+        )
+
+
+def load_rates(rates: Iterable[ExchangeRate], *, batch_size: int = LOAD_BATCH_SIZE) -> int:
+    """
+    Insert the rates, replacing the rate of a day that is already known. Returns the number of rates written.
+    """
+    written = 0
+    rates = iter(rates)
+
+    with transaction.atomic():
+        while batch := list(islice(rates, batch_size)):
+            ExchangeRate.objects.bulk_create(
+                batch,
+                update_conflicts=True,
+                unique_fields=["base", "currency", "day"],
+                update_fields=["rate"],
+            )
+            written += len(batch)
+
+        invalidate_rates()
+
+    return written
+
+
+class ExchangeRates:
+    """
+    Convert amounts between currencies with the daily rates, looking up whole arrays of days at once.
+
+    The rates of a currency pair are loaded with one query on first use and kept in process as arrays sorted by
+    day, so a lookup is a binary search per day instead of a query. Days without a rate, such as weekends, use the
+    last earlier rate. Pairs without a common base are converted across a base that quotes both currencies.
+    Like the symbol resolver, the cache is keyed by a global version which is bumped whenever rates change.
+    """
+
+    def __init__(self):
+        self._series: dict[tuple[str, str], tuple[np.ndarray, np.ndarray]] = {}
+        self._bases: dict[str, set[str]] | None = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+            self._bases = None
+
+    def get_rates(self, from_currency: str, to_currency: str, days: np.ndarray | Iterable[date]) -> np.ndarray:
+        """
+        Return the rates converting ``from_currency`` to ``to_currency`` on each of the days.
+        """
+        days = np.asarray(days, dtype="datetime64[D]")
+
+        if from_currency == to_currency:
+            return np.ones(days.shape)
+
+        version = get_rates_version()
+
+        with self._lock:
+            if version != self._version:
+                self._series.clear()
+                self._bases = None
+                self._version = version
+
+        base = self._get_base(from_currency, to_currency)
+
+        return self._lookup(base, to_currency, days) / self._lookup(base, from_currency, days)
+
+    def convert(
+        self,
+        amounts: np.ndarray,
+        days: np.ndarray | Iterable[date],
+        from_currency: str,
+        to_currency: str,
+    ) -> np.ndarray:
+        """
+        Convert amounts in ``from_currency`` to ``to_currency``, each with the rate of its day.
+        """
+        return np.asarray(amounts, dtype="f8") * self.get_rates(from_currency, to_currency, days)
+
+    def _get_base(self, from_currency: str, to_currency: str) -> str:
+        with self._lock:
+            if self._bases is None:
+                self._bases = {}
+
+                for base, currency in ExchangeRate.objects.values_list("base", "currency").distinct():
+                    self._bases.setdefault(base, {base}).add(currency)
+
+            bases = self._bases
+
+        # A base that is one of the two currencies needs a single rate series, not two.
+        for base in sorted(bases, key=lambda base: base not in (from_currency, to_currency)):
+            if {from_currency, to_currency} <= bases[base]:
+                return base
+
+        msg = f"{MissingExchangeRateError.error_message}: {from_currency}/{to_currency}"
+        raise MissingExchangeRateError(msg)
+
+    def _lookup(self, base: str, currency: str, days: np.ndarray) -> np.ndarray:
+        if currency == base:
+            return np.ones(days.shape)
+
+        with self._lock:
+            series = self._series.get((base, currency))
+
+        if series is None:
+            rates = ExchangeRate.objects.filter(base=base, currency=currency).order_by("day").values_list("day", "rate")
+            series = np.fromiter(rates, dtype=[("day", "M8[D]"), ("rate", "f8")])
+            series = (series["day"], series["rate"])
+
+            with self._lock:
+                self._series[(base, currency)] = series
+
+        known_days, rates = series
+        # The last rate on or before every day.
+        positions = np.searchsorted(known_days, days, side="right") - 1
+
+        if days.size and positions.min() < 0:
+            first = days[positions < 0].min()
+            msg = f"{MissingExchangeRateError.error_message}: {base}/{currency} on {first}"
+            raise MissingExchangeRateError(msg)
+
+        return rates[positions]
+
+
+exchange_rates = ExchangeRates()
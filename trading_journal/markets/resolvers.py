@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+
+from django.core.cache import cache
+from django.db import transaction
+from django_redis import get_redis_connection
+
+from trading_journal.markets.models import Broker, Market, Symbol
+
+SYMBOLS_CACHE_PREFIX = "markets:symbols"
+SYMBOLS_CACHE_TIMEOUT = 24 * 60 * 60
+LOCAL_CACHE_SIZE = 10_000
+SCOPE_BROKER = "broker"
+SCOPE_MARKET = "market"
+
+
+def get_symbols_version() -> int:
+    # A version key lost to eviction restarts from the clock, above every version used before.
+    return cache.get_or_set(f"{SYMBOLS_CACHE_PREFIX}:version", time.time_ns, timeout=None)
+
+
+def _bump_symbols_version():
+    try:
+        cache.incr(f"{SYMBOLS_CACHE_PREFIX}:version")
+    except ValueError:
+        get_symbols_version()
+
+
+def invalidate_symbols():
+    """
+    Drop every resolved symbol code, in the shared cache and in the local copies of all workers,
+    once the current transaction commits.
+    """
+    transaction.on_commit(_bump_symbols_version)
+
+
+class SymbolResolver:
+    """
+    Resolve symbol codes to symbol ids by broker or by market.
+
+    Lookups go through a bounded in-process LRU, then a hash per broker or market in the shared cache, and only
+    then to the database. Both layers are keyed by a global version which is bumped whenever symbols or brokers
+    change, so workers drop their local copy on their next lookup and never serve an outdated id.
+    Codes without a symbol are not cached.
+    """
+
+    def __init__(self, max_size: int = LOCAL_CACHE_SIZE):
+        self.max_size = max_size
+        self._local: OrderedDict[tuple[str, int, str], int] = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def by_market(self, market: Market | int, codes: Iterable[str]) -> dict[str, int]:
+        return self._resolve(SCOPE_MARKET, getattr(market, "pk", market), codes)
+
+    def by_broker(self, broker: Broker | int, codes: Iterable[str]) -> dict[str, int]:
+        """
+        Resolve codes of the symbols a broker offers. A code offered in several markets resolves to the oldest symbol.
+        """
+        return self._resolve(SCOPE_BROKER, getattr(broker, "pk", broker), codes)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+    def _resolve(self, scope: str, owner_id: int, codes: Iterable[str]) -> dict[str, int]:
+        codes = set(codes)
+        version = get_symbols_version()
+        resolved = {}
+
+        with self._lock:
+            if version != self._version:
+                self._local.clear()
+                self._version = version
+
+            for code in codes:
+                if (symbol_id := self._local.get((scope, owner_id, code))) is not None:
+                    self._local.move_to_end((scope, owner_id, code))
+                    resolved[code] = symbol_id
+
+        if missing := codes - resolved.keys():
+            name = f"{SYMBOLS_CACHE_PREFIX}:{version}:{scope}:{owner_id}"
+            shared = self._get_shared(name, missing)
+
+            if missing := missing - shared.keys():
+                loaded = self._load(scope, owner_id, missing)
+                self._set_shared(name, loaded)
+                shared.update(loaded)
+
+            resolved.update(shared)
+            self._remember(version, scope, owner_id, shared)
+
+        return resolved
+
+    def _load(self, scope: str, owner_id: int, codes: set[str]) -> dict[str, int]:
+        symbols = Symbol.objects.filter(code__in=codes)
+        symbols = symbols.filter(market=owner_id) if scope == SCOPE_MARKET else symbols.filter(brokers=owner_id)
+
+        # Newest first, so the oldest symbol of an ambiguous code ends up in the dict.
+        return dict(symbols.order_by("-id").values_list("code", "id"))
+
+    def _remember(self, version: int, scope: str, owner_id: int, symbols: dict[str, int]):
+        with self._lock:
+            if version != self._version:
+                return
+
+            for code, symbol_id in symbols.items():
+                self._local[(scope, owner_id, code)] = symbol_id
+                self._local.move_to_end((scope, owner_id, code))
+
+            while len(self._local) > self.max_size:
+                self._local.popitem(last=False)
+
+    @staticmethod
+    def _get_shared(name: str, codes: set[str]) -> dict[str, int]:
+        codes = sorted(codes)
+
+        try:
+            client = get_redis_connection()
+        except NotImplementedError:
+            # Not a Redis cache, one key per code.
+            values = cache.get_many([f"{name}:{code}" for code in codes])
+            return {key.removeprefix(f"{name}:"): symbol_id for key, symbol_id in values.items()}
+
+        values = client.hmget(cache.make_key(name), codes)
+        return {code: int(symbol_id) for code, symbol_id in zip(codes, values, strict=True) if symbol_id is not None}
+
+    @staticmethod
+    def _set_shared(name: str, symbols: dict[str, int]):
+        if not symbols:
+            return
+
+        try:
+            client = get_redis_connection()
+        except NotImplementedError:
+            cache.set_many({f"{name}:{code}": symbol_id for code, symbol_id in symbols.items()}, SYMBOLS_CACHE_TIMEOUT)
+            return
+
+        key = cache.make_key(name)
+        pipeline = client.pipeline()
+        pipeline.hset(key, mapping=symbols)
+        pipeline.expire(key, SYMBOLS_CACHE_TIMEOUT)
+        pipeline.execute()
+
+
+symbol_resolver = SymbolResolver()
@@ -0,0 +1,21 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from trading_journal.markets.models import Broker, ExchangeRate, Symbol
+from trading_journal.markets.rates import invalidate_rates
+from trading_journal.markets.resolvers import invalidate_symbols
+
+
+@receiver(post_save, sender=Symbol)
+@receiver(post_delete, sender=Symbol)
+@receiver(post_save, sender=Broker)
+@receiver(post_delete, sender=Broker)
+@receiver(m2m_changed, sender=Symbol.brokers.through)
+def invalidate_resolved_symbols(sender, **kwargs):
+    invalidate_symbols()
+
+
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=ExchangeRate)
+def invalidate_cached_rates(sender, **kwargs):
+    invalidate_rates()
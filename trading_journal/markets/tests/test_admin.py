@@ -1,8 +1,14 @@
+from collections.abc import Callable
+from unittest import mock
+
 from django.contrib import admin
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from trading_journal.markets.models import Broker, Market, Symbol, SymbolType
+from trading_journal.markets.tests.factories import BrokerFactory, MarketFactory, SymbolFactory
 from trading_journal.users.tests.factories import UserFactory
 
 
@@ -151,3 +157,58 @@ class AdminSiteTestCase(TestCase):
         """
         symbol_type_admin = self.admin_site.get_model_admin(SymbolType)
         self.assertListEqual(list(symbol_type_admin.search_fields), ["name"])
+
+
+class ChangelistQueryCountTestCase(TestCase):
+    def setUp(self) -> None:
+        """
+        Set up a staff user and a market shared by the brokers and symbols.
+        """
+        self.client.force_login(UserFactory(is_staff=True, is_superuser=True))
+        self.market = MarketFactory()
+
+    def assert_constant_queries(self, url: str, create_batch: Callable[[int], None]) -> None:
+        create_batch(5)
+
+        with CaptureQueriesContext(connection) as small_page:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        create_batch(45)
+
+        with CaptureQueriesContext(connection) as full_page:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.assertEqual(len(full_page), len(small_page))
+
+    def test_broker_changelist(self) -> None:
+        """
+        Test that the broker changelist does not query the markets of every broker.
+        """
+
+        def create_batch(size: int) -> None:
+            for broker in BrokerFactory.create_batch(size):
+                broker.markets.set([self.market, MarketFactory()])
+
+        self.assert_constant_queries(reverse("admin:markets_broker_changelist"), create_batch)
+
+    def test_symbol_changelist(self) -> None:
+        """
+        Test that the symbol changelist does not query the type and market of every symbol.
+        """
+
+        def create_batch(size: int) -> None:
+            SymbolFactory.create_batch(size, market=self.market)
+
+        self.assert_constant_queries(reverse("admin:markets_symbol_changelist"), create_batch)
+
+    def test_broker_changelist_fallback(self) -> None:
+        """
+        Test that other backends prefetch the markets instead of aggregating them.
+        """
+        broker = BrokerFactory()
+        broker.markets.set([self.market])
+
+        with mock.patch.object(connection, "vendor", "sqlite"):
+            response = self.client.get(reverse("admin:markets_broker_changelist"))
+
+        self.assertContains(response, self.market.name)
@@ -1,5 +1,6 @@
 from django.test import TestCase
 
+from trading_journal.core.helpers import annotate_joined_m2m_names
 from trading_journal.markets.models import Broker, Market, Symbol, SymbolType
 from trading_journal.markets.tests.factories import BrokerFactory, MarketFactory, SymbolFactory, SymbolTypeFactory
 
@@ -47,12 +48,25 @@ class BrokerTestCase(TestCase):
         """
         self.assertEqual(str(self.broker), self.broker.name)
 
+    def test_broker_markets_names(self) -> None:
+        """
+        Test that the markets names are joined in name order, with or without the annotation.
+        """
+        expected = ", ".join(sorted(market.name for market in self.markets))
+
+        self.assertEqual(Broker.objects.get(pk=self.broker.pk).markets_names, expected)
+
+        broker = annotate_joined_m2m_names(Broker.objects.filter(pk=self.broker.pk), "markets").get()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(broker.markets_names, expected)
+
     def test_broker_markets(self) -> None:
         """
         Test that the Broker instance has the correct markets associated.
         """
         self.assertEqual(self.broker.markets.count(), 3)
-        self.assertListEqual(list(self.broker.markets.all()), self.markets)
+        self.assertListEqual(list(self.broker.markets.order_by("pk")), self.markets)
 
 
 class SymbolTypeTestCase(TestCase):
@@ -101,9 +115,20 @@ class SymbolTestCase(TestCase):
         """
         self.assertEqual(str(self.symbol), self.symbol.name)
 
+    def test_symbol_brokers_names(self) -> None:
+        """
+        Test that the brokers names are read from the brokers relation.
+        """
+        self.assertEqual(self.symbol.brokers_names, ", ".join(sorted(broker.name for broker in self.brokers)))
+
+        symbol = Symbol.objects.prefetch_related("brokers").get(pk=self.symbol.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(symbol.brokers_names, ", ".join(sorted(broker.name for broker in self.brokers)))
+
     def test_symbol_brokers(self) -> None:
         """
         Test that the Symbol instance has the correct brokers associated.
         """
         self.assertEqual(self.symbol.brokers.count(), 2)
-        self.assertListEqual(list(self.symbol.brokers.all()), self.brokers)
+        self.assertListEqual(list(self.symbol.brokers.order_by("pk")), self.brokers)
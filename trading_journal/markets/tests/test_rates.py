@@ -0,0 +1,98 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+import numpy as np
+import pytest
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase
+
+from trading_journal.markets.exceptions import MissingExchangeRateError
+from trading_journal.markets.models import ExchangeRate
+from trading_journal.markets.rates import ExchangeRates, load_rates, read_rates_csv
+
+RATES_CSV = (
+    "day,currency,rate\n"
+    "2024-01-02,USD,1.1000\n"
+    "2024-01-02,PLN,4.4000\n"
+    "2024-01-05,USD,1.0000\n"
+    "2024-01-05,PLN,4.5000\n"
+)
+
+
+class ExchangeRatesTestCase(TestCase):
+    def setUp(self) -> None:
+        """
+        Set up EUR based rates of two days and an empty cache.
+        """
+        cache.clear()
+        load_rates(read_rates_csv(StringIO(RATES_CSV), base="eur"))
+        self.rates = ExchangeRates()
+
+    def test_load_rates(self) -> None:
+        """
+        Test that loading a day again replaces its rates.
+        """
+        load_rates(read_rates_csv(StringIO("day,base,currency,rate\n2024-01-02,EUR,USD,1.2\n")))
+
+        self.assertEqual(ExchangeRate.objects.count(), 4)
+        self.assertEqual(ExchangeRate.objects.get(day="2024-01-02", currency="USD").rate, Decimal("1.2"))
+
+    def test_get_rates(self) -> None:
+        """
+        Test that rates are looked up for whole arrays of days, days without a rate use the last earlier one.
+        """
+        days = np.array(["2024-01-02", "2024-01-03", "2024-01-05", "2024-01-06"], dtype="M8[D]")
+
+        with self.assertNumQueries(2):
+            rates = self.rates.get_rates("EUR", "USD", days)
+
+        np.testing.assert_allclose(rates, [1.1, 1.1, 1.0, 1.0])
+        np.testing.assert_allclose(self.rates.get_rates("USD", "EUR", days[:1]), [1 / 1.1])
+
+        with self.assertNumQueries(0):
+            self.rates.get_rates("EUR", "USD", days)
+
+    def test_cross_rates(self) -> None:
+        """
+        Test that currencies quoted against a common base are converted across it.
+        """
+        converted = self.rates.convert([100, 100], [date(2024, 1, 2), date(2024, 1, 5)], "USD", "PLN")
+
+        np.testing.assert_allclose(converted, [400, 450])
+
+    def test_missing_rates(self) -> None:
+        """
+        Test that days before the first rate and currencies without rates are refused.
+        """
+        with pytest.raises(MissingExchangeRateError, match="EUR/USD on 2024-01-01"):
+            self.rates.get_rates("EUR", "USD", [date(2024, 1, 1)])
+
+        with pytest.raises(MissingExchangeRateError, match="EUR/CHF"):
+            self.rates.get_rates("EUR", "CHF", [date(2024, 1, 2)])
+
+    def test_invalidation(self) -> None:
+        """
+        Test that loading rates drops the rates cached by every worker.
+        """
+        self.rates.get_rates("EUR", "USD", [date(2024, 1, 2)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ExchangeRate.objects.filter(day="2024-01-02", currency="USD").update(rate=2)
+            load_rates([ExchangeRate(day=date(2024, 1, 2), base="EUR", currency="USD", rate=2)])
+
+        np.testing.assert_allclose(self.rates.get_rates("EUR", "USD", [date(2024, 1, 2)]), [2])
+
+    def test_command(self) -> None:
+        """
+        Test the load_exchange_rates management command.
+        """
+        path = default_storage.path(default_storage.save("rates.csv", ContentFile(RATES_CSV)))
+        out = StringIO()
+
+        call_command("load_exchange_rates", path, base="EUR", stdout=out)
+
+        self.assertEqual(out.getvalue(), "Loaded 4 exchange rates.\n")
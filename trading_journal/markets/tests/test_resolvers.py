@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from trading_journal.markets.resolvers import SymbolResolver
+from trading_journal.markets.tests.factories import BrokerFactory, SymbolFactory
+
+
+class SymbolResolverTestCase(TestCase):
+    def setUp(self) -> None:
+        """
+        Set up two symbols of one market offered by a broker, and an empty cache.
+        """
+        cache.clear()
+        self.broker = BrokerFactory()
+        self.eurusd = SymbolFactory(code="EURUSD")
+        self.gbpusd = SymbolFactory(code="GBPUSD", market=self.eurusd.market)
+        self.eurusd.brokers.set([self.broker])
+        self.market = self.eurusd.market
+        self.resolver = SymbolResolver()
+
+    def test_by_market(self) -> None:
+        """
+        Test that codes are resolved with one query and then from the local cache, unknown codes are left out.
+        """
+        with self.assertNumQueries(1):
+            ids = self.resolver.by_market(self.market, ["EURUSD", "GBPUSD", "XAUUSD"])
+
+        self.assertDictEqual(ids, {"EURUSD": self.eurusd.pk, "GBPUSD": self.gbpusd.pk})
+
+        with self.assertNumQueries(0):
+            self.assertDictEqual(self.resolver.by_market(self.market.pk, ["EURUSD"]), {"EURUSD": self.eurusd.pk})
+
+    def test_by_broker(self) -> None:
+        """
+        Test that only the symbols offered by the broker are resolved.
+        """
+        self.assertDictEqual(self.resolver.by_broker(self.broker, ["EURUSD", "GBPUSD"]), {"EURUSD": self.eurusd.pk})
+
+    def test_shared_cache(self) -> None:
+        """
+        Test that another worker resolves codes from the shared cache without querying.
+        """
+        self.resolver.by_market(self.market, ["EURUSD", "GBPUSD"])
+
+        with self.assertNumQueries(0):
+            ids = SymbolResolver().by_market(self.market, ["EURUSD", "GBPUSD"])
+
+        self.assertDictEqual(ids, {"EURUSD": self.eurusd.pk, "GBPUSD": self.gbpusd.pk})
+
+    def test_local_cache_is_bounded(self) -> None:
+        """
+        Test that the least recently used codes are evicted from the local cache.
+        """
+        resolver = SymbolResolver(max_size=1)
+        resolver.by_market(self.market, ["EURUSD"])
+        resolver.by_market(self.market, ["GBPUSD"])
+
+        self.assertListEqual([code for *_, code in resolver._local], ["GBPUSD"])  # noqa: SLF001
+
+    def test_symbol_save_invalidates(self) -> None:
+        """
+        Test that a saved symbol drops the codes resolved before, locally and in the shared cache.
+        """
+        self.resolver.by_market(self.market, ["EURUSD"])
+        self.eurusd.code = "EUR/USD"
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.eurusd.save()
+
+        self.assertDictEqual(self.resolver.by_market(self.market, ["EURUSD"]), {})
+        self.assertDictEqual(self.resolver.by_market(self.market, ["EUR/USD"]), {"EUR/USD": self.eurusd.pk})
+
+    def test_broker_symbols_change_invalidates(self) -> None:
+        """
+        Test that changing the symbols a broker offers drops the codes resolved before.
+        """
+        self.resolver.by_broker(self.broker, ["EURUSD"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.eurusd.brokers.clear()
+
+        self.assertDictEqual(self.resolver.by_broker(self.broker, ["EURUSD"]), {})